@@ -6,6 +6,10 @@ It contains the following submodules:
 - agent
 - engine
 - utils
+- tournament
+
+The benchmark suite in :mod:`pyneg.benchmark` isn't imported with the package,
+it has to be imported explicitly or run with ``python -m pyneg.benchmark``.
 
 see :ref:`API` or :ref:`Getting Started` in the docs for more information.
 """
@@ -15,3 +19,4 @@ from pyneg import types
 from pyneg import utils
 from pyneg import agent
 from pyneg import engine
+from pyneg import tournament
@@ -2,12 +2,17 @@
 communication logic and the main negotiation loop is defined.
 """
 
-from typing import Dict, List, Optional
+import asyncio
+from concurrent.futures import Executor
+from typing import Dict, Optional
 
-from pyneg.comms import AtomicConstraint, Message, Offer
-from pyneg.engine import AbstractEngine
+from pyneg.comms import (AtomicConstraint, InMemorySink, InMemoryTranscript, Message, Offer,
+                         Transcript, TranscriptSink)
+from pyneg.engine import AbstractEngine, NegotiationStats, Profiler
 from pyneg.types import MessageType, NegSpace
 
+from .mediator import Mediator
+
 
 class Agent:
     """
@@ -17,12 +22,18 @@ class Agent:
 
      Public Methods:
        - receive_negotiation_request(self, opponent: Agent, neg_space: NegSpace) -> bool:
-       - negotiate(self, opponent: Agent) -> bool:
+       - negotiate(self, opponent: Agent, max_rounds, deadline) -> bool:
+       - negotiate_async(self, opponent: Agent, max_rounds, deadline, executor) -> bool:
        - send_message(self, opponent: Agent, msg: Message) -> None
        - receive_message(self, msg: Message) -> None
+       - receive_message_async(self, msg: Message, executor) -> None
        - generate_next_message(self) -> Message
+       - generate_next_message_async(self, executor) -> Message
        - add_utilities(self, new_utils: Dict[str, float]) -> bool
        - set_utilities(self, new_utils: Dict[str, float]) -> bool
+       - set_transcript_sink(self, sink: TranscriptSink) -> None
+       - enable_profiling(self) -> None
+       - disable_profiling(self) -> None
     """
     # pylint: disable=too-many-instance-attributes
     def __init__(self) -> None:
@@ -31,7 +42,8 @@ class Agent:
             to make the linters a bit happier.
         """
         self.name: str = "" #: Name of the agent. mainly used for logging
-        self._transcript: List[Message] = []
+        self._transcript: Transcript = InMemoryTranscript()
+        self._transcript_sink: TranscriptSink = InMemorySink()
         self._max_rounds: int = 0
         self._neg_space: NegSpace = {}
         self._engine: AbstractEngine = AbstractEngine()
@@ -41,10 +53,12 @@ class Agent:
         self.successful: bool = False
         self.negotiation_active: bool = False
         self._last_offer_received_was_acceptable = False
+        self._last_offer_received: Optional[Offer] = None
         self._next_constraint: Optional[AtomicConstraint] = None
         self._constraints_satisfiable = True
         self._accepts_all = False
         self._should_terminate = False
+        self._profiler: Optional[Profiler] = None
 
     # for string annotation reason see
     # https://www.python.org/dev/peps/pep-0484/#the-problem-of-forward-declarations
@@ -98,38 +112,51 @@ class Agent:
         self.negotiation_active = response
         return response
 
-    def negotiate(self, opponent: 'Agent') -> bool:
+    def negotiate(self, opponent: 'Agent',
+                  max_rounds: Optional[int] = None,
+                  deadline: Optional[float] = None) -> bool:
         """
-        This is the entrypoint to run a negotiation, and where the main loop is located.
+        This is the entrypoint to run a negotiation. The alternating offers protocol
+        itself is run by a :class:`Mediator`.
         `self` is assumed to have set up the negotiation before hand, meaning that it must
         have both a neotiation space and a utility function defined. This should be the case if
         the agent was created by the factory. See :doc:`/usage/agent-setup` for more information.
 
         :param opponent: Agent that `self` is going to negotiate with
         :type opponent: Agent
+        :param max_rounds: The number of messages after which the negotiation is ended \
+            without agreement. Defaults to no limit.
+        :type max_rounds: Optional[int]
+        :param deadline: The maximum number of seconds the negotiation may take before \
+            it is ended without agreement. Defaults to no limit.
+        :type deadline: Optional[float]
         :return: Whether the negotiation came to an agreement or not.
         :rtype: bool
         """
-        # self is assumed to have setup the negotiation (including issues) beforehand
-        self.negotiation_active = self._call_for_negotiation(
-            opponent, self._neg_space)
-
-        if not self.negotiation_active or not self.opponent:
-            return self.successful
+        return Mediator(self, opponent, max_rounds, deadline).run()
 
-        next_message_to_send = Message(self.name, self.opponent.name, MessageType.EMPTY, None)
-        while self.negotiation_active:
-            try:
-                next_message_to_send = self.generate_next_message()
-            except StopIteration:
-                # raised when no acceptable offers can be found
-                self.send_message(opponent, self._terminate(False))
-                break
-
-            self.send_message(opponent, next_message_to_send)
-            self._wait_for_response(self.opponent)
+    async def negotiate_async(self, opponent: 'Agent',
+                              max_rounds: Optional[int] = None,
+                              deadline: Optional[float] = None,
+                              executor: Optional[Executor] = None) -> bool:
+        """
+        Asynchronous version of :func:`negotiate`. The agents reason about offers
+        in the executor, so the event loop can run other negotiations in the mean time.
+        see :func:`Mediator.run_async`
 
-        return self.successful
+        :param opponent: Agent that `self` is going to negotiate with
+        :type opponent: Agent
+        :param max_rounds: see :func:`negotiate`
+        :type max_rounds: Optional[int]
+        :param deadline: see :func:`negotiate`
+        :type deadline: Optional[float]
+        :param executor: The thread pool to run the agents in. Defaults to the default \
+            executor of the event loop.
+        :type executor: Optional[Executor]
+        :return: Whether the negotiation came to an agreement or not.
+        :rtype: bool
+        """
+        return await Mediator(self, opponent, max_rounds, deadline).run_async(executor)
 
     def _terminate(self, successful: bool) -> Message:
         """
@@ -155,7 +182,7 @@ class Agent:
             return Message(self.name,
                            self.opponent.name,
                            MessageType.ACCEPT,
-                           self._transcript[-1].offer)
+                           self._last_offer_received)
 
         self.successful = False
         self.negotiation_active = False
@@ -203,6 +230,20 @@ class Agent:
         self._record_message(msg)
         self._parse_response(msg)
 
+    async def receive_message_async(self, msg: Message,
+                                    executor: Optional[Executor] = None) -> None:
+        """
+        Asynchronous version of :func:`receive_message`. The message is handled in the
+        executor since that is where the offer it contains is evaluated.
+
+        :param msg: Message to be parsed
+        :type msg: Message
+        :param executor: The thread pool to handle the message in. Defaults to the default \
+            executor of the event loop.
+        :type executor: Optional[Executor]
+        """
+        await asyncio.get_running_loop().run_in_executor(executor, self.receive_message, msg)
+
     def _parse_response(self, response: Message):
         """
         Parse a recieved message. If the message was either acceptance
@@ -232,6 +273,8 @@ class Agent:
         if not response.offer:
             raise RuntimeError(f"Malformed message: {response}")
 
+        self._last_offer_received = response.offer
+
         if self.accepts(response.offer):
             self._last_offer_received_was_acceptable = True
             return
@@ -290,6 +333,29 @@ class Agent:
             # weren't able to come up with acceptable offer so terminate anyway
             return self._terminate(False)
 
+    async def generate_next_message_async(self,
+                                          executor: Optional[Executor] = None) -> Message:
+        """
+        Asynchronous version of :func:`generate_next_message`, the message is generated in
+        the executor. Instead of raising StopIteration when no acceptable offers can be
+        found, this returns the message that terminates the negotiation.
+
+        :param executor: The thread pool to generate the message in. Defaults to the \
+            default executor of the event loop.
+        :type executor: Optional[Executor]
+        :return: The message to be sent back
+        :rtype: Message
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, self._generate_next_message_or_terminate)
+
+    def _generate_next_message_or_terminate(self) -> Message:
+        try:
+            return self.generate_next_message()
+        except StopIteration:
+            # raised when no acceptable offers can be found
+            return self._terminate(False)
+
     def accepts(self, offer: Offer) -> bool:
         """
         Determines whether an offer is acceptable or not. Mostly just a passthrough
@@ -327,5 +393,51 @@ class Agent:
         """
         return self._engine.set_utilities(new_utilities)
 
+    def set_transcript_sink(self, sink: TranscriptSink) -> None:
+        """
+        Sets where the negotiations this agent starts are recorded. By default every
+        message is kept in memory, see :mod:`pyneg.comms.transcript` for the alternatives.
+
+        :param sink: The sink that creates the transcript of every negotiation
+        :type sink: TranscriptSink
+        """
+        self._transcript_sink = sink
+
+    def enable_profiling(self) -> None:
+        """
+        Starts recording where the agent spends its time in every negotiation, see
+        :class:`NegotiationStats`. The stats of the last negotiation are available
+        through :attr:`negotiation_stats`. The methods involved are only replaced on this
+        agent and its engine, so agents that aren't profiled don't pay for it.
+        """
+        if self._profiler is not None:
+            return
+
+        profiler = self._engine.enable_profiling()
+        profiler.call_before(self, "_call_for_negotiation", profiler.new_negotiation)
+        profiler.call_before(self, "receive_negotiation_request", profiler.new_negotiation)
+        profiler.call_before(self, "_parse_response", profiler.new_round)
+        self._profiler = profiler
+
+    def disable_profiling(self) -> None:
+        """
+        Stops recording where the agent spends its time and restores the original methods.
+        """
+        if self._profiler is None:
+            return
+
+        self._profiler.remove()
+        self._profiler = None
+
+    @property
+    def negotiation_stats(self) -> Optional[NegotiationStats]:
+        """
+        :return: The stats of the last negotiation if profiling is enabled.
+        :rtype: Optional[NegotiationStats]
+        """
+        if self._profiler is None:
+            return None
+        return self._profiler.stats
+
     def __repr__(self) -> str:
         return self.name
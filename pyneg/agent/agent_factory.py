@@ -18,10 +18,11 @@ from typing import Dict, List, Optional, Set, Union
 from numpy import isclose
 
 from pyneg.comms import AtomicConstraint
-from pyneg.engine import (ConstrainedEnumGenerator, ConstrainedLinearEvaluator,
-                          ConstrainedRandomGenerator, Engine, EnumGenerator,
-                          Evaluator, Generator, LinearEvaluator,
-                          ProblogEvaluator, RandomGenerator)
+from pyneg.engine import (CachedEvaluator, CompiledLinearEvaluator,
+                          ConstrainedEnumGenerator, ConstrainedLinearEvaluator,
+                          ConstrainedRandomGenerator,
+                          Engine, Evaluator, Generator, HeapEnumGenerator,
+                          RandomGenerator)
 from pyneg.types import NegSpace
 from pyneg.utils import issue_value_tuple_from_atom, nested_dict_from_atom_dict
 
@@ -59,7 +60,8 @@ def make_linear_concession_agent(
         utilities: Dict[str, float],
         reservation_value: float,
         non_agreement_cost: float,
-        issue_weights: Optional[Dict[str, float]] = None) -> Agent:
+        issue_weights: Optional[Dict[str, float]] = None,
+        utility_cache_size: Optional[int] = None) -> Agent:
     """
     This function constructs a linear constraint. That means that the resulting agent,
     calculates the utility of an offer with linear additive functions using numpy as a backend.
@@ -81,6 +83,10 @@ def make_linear_concession_agent(
     :param issue_weights: Relative importance of the issues to the agent. Should be a distribution \
         indexed by issues. Defaults to uniform if none is provided.
     :type issue_weights: Optional[Dict[str, float]]
+    :param utility_cache_size: If given, the utilities of this many of the most recently \
+        evaluated offers are cached. see :class:`CachedEvaluator`. Defaults to None, \
+        meaning nothing is cached
+    :type utility_cache_size: Optional[int]
     :return: The agent with the correct mechanisms initialised.
     :rtype: Agent
     """
@@ -102,8 +108,11 @@ def make_linear_concession_agent(
     estimate_max_utility = estimate_max_linear_utility(weight_adjusted_utilities)
     reservation_value = reservation_value * estimate_max_utility
     agent._absolute_reservation_value = reservation_value
-    evaluator: Evaluator = LinearEvaluator(utilities, issue_weights, non_agreement_cost)
-    generator: Generator = EnumGenerator(neg_space, utilities, evaluator, reservation_value)
+    evaluator: Evaluator = CompiledLinearEvaluator(
+        neg_space, utilities, issue_weights, non_agreement_cost)
+    if utility_cache_size:
+        evaluator = CachedEvaluator(evaluator, utility_cache_size)
+    generator: Generator = HeapEnumGenerator(neg_space, utilities, evaluator, reservation_value)
     engine: Engine = Engine(generator, evaluator)
     if isclose(reservation_value, 0):
         engine._accepts_all = True
@@ -120,7 +129,8 @@ def make_linear_random_agent(
         reservation_value: float,
         non_agreement_cost: float,
         issue_weights: Optional[Dict[str, float]] = None,
-        max_rounds: int = None) -> Agent:
+        max_rounds: int = None,
+        utility_cache_size: Optional[int] = None) -> Agent:
     """
     This agent calculates utility in a linear additive way using numpy as a backend.
     it also uses numpy to generate random offers by sampling from the strategy distribution.
@@ -144,6 +154,10 @@ def make_linear_random_agent(
     :param max_rounds: Maximum number of rounds the agent will try to generate an offer. \
         This is to make sure that even impossible negotiations terminate. Defaults to 200
     :type max_rounds: int, optional
+    :param utility_cache_size: If given, the utilities of this many of the most recently \
+        evaluated offers are cached. see :class:`CachedEvaluator`. Defaults to None, \
+        meaning nothing is cached
+    :type utility_cache_size: Optional[int]
     :return:  The agent with the correct mechanisms initialised.
     :rtype: Agent
     """
@@ -169,7 +183,10 @@ def make_linear_random_agent(
     reservation_value = reservation_value * estimate_max_utility
 
     agent._absolute_reservation_value = reservation_value
-    evaluator: Evaluator = LinearEvaluator(utilities, issue_weights, non_agreement_cost)
+    evaluator: Evaluator = CompiledLinearEvaluator(
+        neg_space, utilities, issue_weights, non_agreement_cost)
+    if utility_cache_size:
+        evaluator = CachedEvaluator(evaluator, utility_cache_size)
     generator: Generator = RandomGenerator(
         neg_space,
         utilities,
@@ -195,7 +212,8 @@ def make_random_agent(
         reservation_value: Union[float, int],
         non_agreement_cost: float,
         knowledge_base: List[str],
-        max_rounds: int = None) -> Agent:
+        max_rounds: int = None,
+        utility_cache_size: Optional[int] = 1024) -> Agent:
     """
     This agent uses ProbLog as a backend to evaluate offers. That means that it can
     handle non-linear utility functions and non trivial (probabalistic) knowledge bases.
@@ -218,6 +236,9 @@ def make_random_agent(
     :param max_rounds: Maximum number of rounds the agent will try to generate an offer. \
         This is to make sure that even impossible negotiations terminate. Defaults to 200
     :type max_rounds: int, optional
+    :param utility_cache_size: If given, the utilities of this many of the most recently \
+        evaluated offers are cached. see :class:`CachedEvaluator`. Defaults to 1024
+    :type utility_cache_size: Optional[int]
     :return:  The agent with the correct mechanisms initialised.
     :rtype: Agent
     """
@@ -235,10 +256,15 @@ def make_random_agent(
     reservation_value = reservation_value * estimate_max_utility
 
     agent._absolute_reservation_value = reservation_value
+    # imported here so only agents that reason with ProbLog have to import it
+    # pylint: disable=import-outside-toplevel
+    from pyneg.engine.problog_evaluator import ProblogEvaluator
     evaluator: Evaluator = ProblogEvaluator(neg_space,
                                             utilities,
                                             non_agreement_cost,
                                             knowledge_base)
+    if utility_cache_size:
+        evaluator = CachedEvaluator(evaluator, utility_cache_size)
     generator: Generator = RandomGenerator(
         neg_space,
         utilities,
@@ -262,7 +288,8 @@ def make_constrained_linear_concession_agent(
         reservation_value: float, non_agreement_cost: float,
         initial_constraints: Optional[Set[AtomicConstraint]] = None,
         issue_weights: Optional[Dict[str, float]] = None,
-        auto_constraints=True) -> ConstrainedAgent:
+        auto_constraints=True,
+        utility_cache_size: Optional[int] = None) -> ConstrainedAgent:
     """
     This function constructs a linear constraint agent. That means that the resulting agent,
     calculates the utility of an offer with linear additive functions using numpy as a backend.
@@ -294,6 +321,10 @@ def make_constrained_linear_concession_agent(
         whether constraints can be created. ONly works for linear additive utility functions.
         defaults to True
     :type auto_constraints: bool
+    :param utility_cache_size: If given, the utilities of this many of the most recently \
+        evaluated offers are cached. see :class:`CachedEvaluator`. Defaults to None, \
+        meaning nothing is cached
+    :type utility_cache_size: Optional[int]
     :return: The agent with the correct mechanisms initialised.
     :rtype: ConstrainedAgent
     """
@@ -326,6 +357,8 @@ def make_constrained_linear_concession_agent(
         non_agreement_cost,
         constr_value,
         initial_constraints)
+    if utility_cache_size:
+        evaluator = CachedEvaluator(evaluator, utility_cache_size)
     generator: Generator = ConstrainedEnumGenerator(
         neg_space,
         utilities,
@@ -353,7 +386,8 @@ def make_constrained_linear_random_agent(
         issue_weights: Optional[Dict[str, float]] = None,
         initial_constraints: Optional[Set[AtomicConstraint]] = None,
         max_rounds: int = None,
-        auto_constraints=True) -> ConstrainedAgent:
+        auto_constraints=True,
+        utility_cache_size: Optional[int] = None) -> ConstrainedAgent:
     """
     [summary]
 
@@ -387,6 +421,10 @@ def make_constrained_linear_random_agent(
         whether constraints can be created. ONly works for linear additive utility functions.
         defaults to True
     :type auto_constraints: bool
+    :param utility_cache_size: If given, the utilities of this many of the most recently \
+        evaluated offers are cached. see :class:`CachedEvaluator`. Defaults to None, \
+        meaning nothing is cached
+    :type utility_cache_size: Optional[int]
     :return: The agent with the correct mechanisms initialised.
     :rtype: ConstrainedAgent
     """
@@ -422,6 +460,8 @@ def make_constrained_linear_random_agent(
         non_agreement_cost,
         constr_value,
         initial_constraints)
+    if utility_cache_size:
+        evaluator = CachedEvaluator(evaluator, utility_cache_size)
     generator: Generator = ConstrainedRandomGenerator(
         neg_space,
         utilities,
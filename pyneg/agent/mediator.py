@@ -0,0 +1,194 @@
+"""
+This module defines the :class:`Mediator` class, which drives the alternating
+offers protocol between two agents, and :func:`run_negotiations_async` which runs
+many negotiations concurrently on an asyncio event loop.
+"""
+# pylint: disable=protected-access
+# the mediator drives the agents through their protocol methods
+import asyncio
+from concurrent.futures import Executor
+from time import monotonic
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+from pyneg.comms import Message, Transcript
+
+if TYPE_CHECKING:
+    from pyneg.agent.agent import Agent
+
+
+class Mediator:
+    """
+    Runs a negotiation between two agents using the alternating offers protocol.
+    The agents take turns generating a message which the mediator delivers to the other
+    agent, until one of them accepts or terminates. This happens in a single flat loop
+    so the length of a negotiation does not influence the depth of the call stack.
+
+    Every message is recorded exactly once, in a transcript that is shared by both agents.
+    The transcript is created by the transcript sink of the initiator once the responder
+    has agreed to negotiate, see :func:`Agent.set_transcript_sink`.
+    Optionally the mediator enforces a maximum number of messages and a deadline. When
+    either is reached the agent whose turn it is terminates the negotiation
+    without agreement.
+
+    >>> mediator = Mediator(agent, opponent, max_rounds=100, deadline=1.0)
+    >>> mediator.run()
+    True
+    """
+    def __init__(self, initiator: 'Agent',
+                 responder: 'Agent',
+                 max_rounds: Optional[int] = None,
+                 deadline: Optional[float] = None):
+        """
+        :param initiator: The agent that proposes the negotiation and makes the first offer
+        :type initiator: Agent
+        :param responder: The agent that responds
+        :type responder: Agent
+        :param max_rounds: The number of messages after which the negotiation is ended \
+            without agreement. Defaults to no limit.
+        :type max_rounds: Optional[int]
+        :param deadline: The maximum number of seconds the negotiation may take before \
+            it is ended without agreement. Defaults to no limit.
+        :type deadline: Optional[float]
+        """
+        self.initiator = initiator
+        self.responder = responder
+        self.max_rounds = max_rounds
+        self.deadline = deadline
+        # created once the responder has agreed to negotiate,
+        # so refused negotiations don't show up in the transcript sink
+        self.transcript: Optional[Transcript] = None
+        self.rounds = 0
+
+    def run(self) -> bool:
+        """
+        Runs the negotiation until it has ended.
+
+        :return: Whether the negotiation came to an agreement.
+        :rtype: bool
+        """
+        if not self._start():
+            return self.initiator.successful
+
+        end_time = self._calc_end_time()
+        sender, receiver = self.initiator, self.responder
+        while sender.negotiation_active and receiver.negotiation_active:
+            if self._out_of_time(end_time):
+                message = sender._terminate(False)
+            else:
+                message = sender._generate_next_message_or_terminate()
+
+            self._deliver(message, receiver)
+            sender, receiver = receiver, sender
+
+        return self.initiator.successful
+
+    async def run_async(self, executor: Optional[Executor] = None) -> bool:
+        """
+        Runs the negotiation like :func:`run`, but generating and handling messages,
+        which is where the agents evaluate offers, is done in an executor so the
+        event loop is free to run other negotiations in the mean time.
+
+        :param executor: The executor to run the agents in. Because the agents themselves \
+            are used this has to be a thread pool, not a process pool. \
+            Defaults to the default executor of the event loop.
+        :type executor: Optional[Executor]
+        :return: Whether the negotiation came to an agreement.
+        :rtype: bool
+        """
+        if not self._start():
+            return self.initiator.successful
+
+        loop = asyncio.get_running_loop()
+        end_time = self._calc_end_time()
+        sender, receiver = self.initiator, self.responder
+        while sender.negotiation_active and receiver.negotiation_active:
+            if self._out_of_time(end_time):
+                message = sender._terminate(False)
+            else:
+                message = await sender.generate_next_message_async(executor)
+
+            self._record(message)
+            await loop.run_in_executor(executor, receiver._parse_response, message)
+            sender, receiver = receiver, sender
+
+        return self.initiator.successful
+
+    def _start(self) -> bool:
+        if not self.initiator._call_for_negotiation(self.responder,
+                                                    self.initiator._neg_space):
+            return False
+
+        self.transcript = self.initiator._transcript_sink.new_transcript(
+            self.initiator._neg_space)
+        self.initiator._transcript = self.transcript
+        self.responder._transcript = self.transcript
+        return True
+
+    def _calc_end_time(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+
+        return monotonic() + self.deadline
+
+    def _out_of_time(self, end_time: Optional[float]) -> bool:
+        if self.max_rounds is not None and self.rounds >= self.max_rounds:
+            return True
+
+        return end_time is not None and monotonic() >= end_time
+
+    def _deliver(self, message: Message, receiver: 'Agent') -> None:
+        """
+        Records the message in the shared transcript and lets the receiver handle it.
+
+        :param message: The message to deliver
+        :type message: Message
+        :param receiver: The agent the message is meant for
+        :type receiver: Agent
+        """
+        self._record(message)
+        receiver._parse_response(message)
+
+    def _record(self, message: Message) -> None:
+        self.transcript.append(message)
+        self.rounds += 1
+
+
+async def run_negotiations_async(pairs: Iterable[Tuple['Agent', 'Agent']],
+                                 max_concurrent: Optional[int] = None,
+                                 executor: Optional[Executor] = None,
+                                 max_rounds: Optional[int] = None,
+                                 deadline: Optional[float] = None) -> List[bool]:
+    """
+    Runs the negotiations between all of the given pairs of agents concurrently on the
+    running event loop. see :func:`Mediator.run_async`
+
+    >>> results = asyncio.run(run_negotiations_async([(a1, b1), (a2, b2)]))
+
+    :param pairs: Pairs of agents, the first of which starts the negotiation. \
+        Every agent should only take part in one negotiation.
+    :type pairs: Iterable[Tuple[Agent, Agent]]
+    :param max_concurrent: The maximum number of negotiations that are active at the \
+        same time. Defaults to no limit.
+    :type max_concurrent: Optional[int]
+    :param executor: The thread pool to run the agents in. Defaults to the default \
+        executor of the event loop.
+    :type executor: Optional[Executor]
+    :param max_rounds: see :class:`Mediator`
+    :type max_rounds: Optional[int]
+    :param deadline: see :class:`Mediator`
+    :type deadline: Optional[float]
+    :return: For every pair whether the negotiation came to an agreement, in the same order.
+    :rtype: List[bool]
+    """
+    semaphore = asyncio.Semaphore(max_concurrent) if max_concurrent else None
+
+    async def run_one(initiator: 'Agent', responder: 'Agent') -> bool:
+        mediator = Mediator(initiator, responder, max_rounds, deadline)
+        if semaphore is None:
+            return await mediator.run_async(executor)
+
+        async with semaphore:
+            return await mediator.run_async(executor)
+
+    return list(await asyncio.gather(*(run_one(initiator, responder)
+                                       for initiator, responder in pairs)))
@@ -0,0 +1,15 @@
+"""
+This submodule contains a benchmark suite that times negotiations and the components
+they spend most of their time in, for every agent factory across a grid of scenarios.
+Results are written as JSON so they can be compared between runs. It can also be run
+from the command line, see `python -m pyneg.benchmark --help`.
+"""
+
+from pyneg.benchmark.benchmark import (BENCHMARK_SHAPES, IMPORT_MODULES, BenchmarkComparison,
+                                       BenchmarkResult, benchmark_agent_components,
+                                       benchmark_import, benchmark_negotiation,
+                                       benchmark_offers,
+                                       compare_results, default_agent_specs,
+                                       make_benchmark_scenarios, random_offers,
+                                       read_results, run_benchmarks, time_calls,
+                                       write_results)
@@ -0,0 +1,76 @@
+"""
+Command line interface of the benchmark suite.
+
+Run the benchmarks and write the results to a file::
+
+    python -m pyneg.benchmark run results.json
+
+Compare them to an earlier run, exiting with status 1 if anything regressed::
+
+    python -m pyneg.benchmark compare baseline.json results.json
+"""
+import sys
+from argparse import ArgumentParser
+from typing import List, Optional
+
+from pyneg.benchmark.benchmark import (IMPORT_MODULES, compare_results, default_agent_specs,
+                                       make_benchmark_scenarios, read_results,
+                                       run_benchmarks, write_results)
+
+
+def _parse_shape(shape: str):
+    issues, values = shape.lower().split("x")
+    return int(issues), int(values)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = ArgumentParser(prog="python -m pyneg.benchmark",
+                            description="Benchmark negotiations and their components.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("output", help="the JSON file to write the results to")
+    run_parser.add_argument("--shapes", nargs="+", type=_parse_shape,
+                            help="scenario sizes as ISSUESxVALUES, e.g. 5x10")
+    run_parser.add_argument("--agents", nargs="+",
+                            help="names of the agents to benchmark, defaults to all")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--number", type=int, default=100)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--deadline", type=float, default=10,
+                            help="seconds after which a negotiation is ended, "
+                            "so slow agents in large scenarios can't stall the run")
+    run_parser.add_argument("--skip-imports", action="store_true",
+                            help="don't time importing pyneg in a fresh interpreter")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two runs")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.2,
+                                help="allowed slowdown as a fraction of the baseline")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        specs = default_agent_specs()
+        if args.agents:
+            specs = [spec for spec in specs if spec.name in args.agents]
+        scenarios = make_benchmark_scenarios(args.shapes, seed=args.seed) if args.shapes \
+            else make_benchmark_scenarios(seed=args.seed)
+        import_modules = () if args.skip_imports else IMPORT_MODULES
+        results = run_benchmarks(specs, scenarios, args.repeat, args.number, args.seed,
+                                 args.deadline, import_modules, progress=print)
+        write_results(results, args.output)
+        return 0
+
+    comparisons = compare_results(read_results(args.baseline), read_results(args.current),
+                                  args.tolerance)
+    regressions = [comparison for comparison in comparisons if comparison.regression]
+    for comparison in comparisons:
+        print(("REGRESSION " if comparison.regression else "") + repr(comparison))
+    print(f"{len(regressions)} of {len(comparisons)} benchmarks regressed")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,451 @@
+"""
+This module defines a benchmark suite for pyneg. It times whole negotiations as well as
+the components they spend most of their time in, for every agent factory across a grid of
+scenarios. The results are written as JSON so that runs, e.g. of different releases,
+can be compared to catch performance regressions.
+"""
+# pylint: disable=protected-access
+# the components are timed through the engines of the agents
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from itertools import cycle
+from os import environ, path, pathsep
+from statistics import mean, median
+from time import perf_counter
+from timeit import Timer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pyneg.agent import (Agent, ConstrainedAgent, make_constrained_linear_concession_agent,
+                         make_constrained_linear_random_agent, make_linear_concession_agent,
+                         make_linear_random_agent, make_random_agent)
+from pyneg.comms import AtomicConstraint, Offer
+from pyneg.tournament import AgentSpec, Scenario
+from pyneg.utils import (generate_gradient_utility_matrices, generate_lex_utility_matrices,
+                         generate_random_scenario)
+
+# (benchmark, scenario, agent)
+BenchmarkKey = Tuple[str, str, str]
+
+BENCHMARK_SHAPES = ((3, 5), (5, 10), (10, 10))
+
+# pyneg on its own, and pyneg together with the ProbLog engine that only some agents use
+IMPORT_MODULES = ("pyneg", "pyneg.engine.dtp_generator")
+
+_IMPORT_SCRIPT = """
+import sys
+from time import perf_counter
+start = perf_counter()
+import {module}
+print(perf_counter() - start, any(name.split(".")[0] == "problog" for name in sys.modules))
+"""
+
+
+class BenchmarkResult:
+    """
+    The timings of one benchmark, for one agent in one scenario. `times` holds the
+    average time of a single call in seconds for every repetition. Benchmarks that don't
+    depend on the agent, such as creating offers, have an empty agent name. Any other
+    information about the runs, such as the number of rounds, is kept in `info`.
+    """
+    def __init__(self, benchmark: str, scenario: str, agent: str,
+                 times: Sequence[float], number: int, **info: Any):
+        self.benchmark = benchmark
+        self.scenario = scenario
+        self.agent = agent
+        self.times = list(times)
+        self.number = number
+        self.info = info
+
+    @property
+    def key(self) -> BenchmarkKey:
+        return self.benchmark, self.scenario, self.agent
+
+    @property
+    def median(self) -> float:
+        return median(self.times)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the result as a flat dictionary that can be written as JSON.
+
+        :return: The result as a dictionary
+        :rtype: Dict[str, Any]
+        """
+        return {
+            "benchmark": self.benchmark,
+            "scenario": self.scenario,
+            "agent": self.agent,
+            "min": min(self.times),
+            "median": self.median,
+            "mean": mean(self.times),
+            "repeat": len(self.times),
+            "number": self.number,
+            **self.info
+        }
+
+    def __repr__(self) -> str:
+        return f"BenchmarkResult({self.benchmark}, {self.scenario}, {self.agent}: " \
+            f"{self.median:.3g}s)"
+
+
+class BenchmarkComparison:
+    """
+    The median time of a benchmark in two runs. The benchmark has regressed if it
+    got slower by more than the tolerance, as a fraction of the baseline.
+    """
+    def __init__(self, key: BenchmarkKey, baseline: float, current: float,
+                 tolerance: float):
+        self.key = key
+        self.baseline = baseline
+        self.current = current
+        self.ratio = current / baseline if baseline > 0 else float("inf")
+        self.regression = self.ratio > 1 + tolerance
+
+    def __repr__(self) -> str:
+        benchmark, scenario, agent = self.key
+        return f"{benchmark} [{scenario}{', ' + agent if agent else ''}]: " \
+            f"{self.baseline:.3g}s -> {self.current:.3g}s ({self.ratio:.2f}x)"
+
+
+def make_benchmark_scenarios(shapes: Sequence[Tuple[int, int]] = BENCHMARK_SHAPES,
+                             num_constraints: int = 1,
+                             seed: int = 0) -> List[Scenario]:
+    """
+    Creates the scenarios to benchmark in. For every shape there is a scenario
+    with lexicographical utilities (see :func:`generate_lex_utility_matrices`),
+    one with gradient utilities (see :func:`generate_gradient_utility_matrices`)
+    and a random one (see :func:`generate_random_scenario`).
+
+    :param shapes: The (issues x values) shapes of the scenarios, defaults to \
+        BENCHMARK_SHAPES
+    :type shapes: Sequence[Tuple[int, int]]
+    :param num_constraints: The number of constraints to insert in the random scenarios, \
+        defaults to 1
+    :type num_constraints: int
+    :param seed: The seed used to generate the random scenarios, defaults to 0
+    :type seed: int
+    :return: The scenarios, named after how they were generated and their shape
+    :rtype: List[Scenario]
+    """
+    np.random.seed(seed)
+    scenarios = []
+    for shape in shapes:
+        size = "{}x{}".format(*shape)
+        scenarios.append(Scenario.from_util_matrices(
+            *generate_lex_utility_matrices(shape, 2), f"lex {size}"))
+        scenarios.append(Scenario.from_util_matrices(
+            *generate_gradient_utility_matrices(shape, max(2, shape[1] // 2)),
+            f"gradient {size}"))
+        scenarios.append(Scenario.from_util_matrices(
+            *generate_random_scenario(shape, num_constraints), f"random {size}"))
+
+    return scenarios
+
+
+def default_agent_specs(reservation_value: float = 0.5,
+                        non_agreement_cost: float = -1000) -> List[AgentSpec]:
+    """
+    :param reservation_value: The reservation value of the agents, defaults to 0.5
+    :type reservation_value: float
+    :param non_agreement_cost: The non agreement cost of the agents, defaults to -1000
+    :type non_agreement_cost: float
+    :return: A specification for every agent factory in :mod:`pyneg.agent.agent_factory`
+    :rtype: List[AgentSpec]
+    """
+    return [
+        AgentSpec("linear concession", make_linear_concession_agent,
+                  reservation_value=reservation_value, non_agreement_cost=non_agreement_cost),
+        AgentSpec("linear random", make_linear_random_agent,
+                  reservation_value=reservation_value, non_agreement_cost=non_agreement_cost),
+        AgentSpec("random", make_random_agent,
+                  reservation_value=reservation_value, non_agreement_cost=non_agreement_cost,
+                  knowledge_base=[]),
+        AgentSpec("constrained linear concession", make_constrained_linear_concession_agent,
+                  reservation_value=reservation_value, non_agreement_cost=non_agreement_cost),
+        AgentSpec("constrained linear random", make_constrained_linear_random_agent,
+                  reservation_value=reservation_value, non_agreement_cost=non_agreement_cost,
+                  knowledge_base=[]),
+    ]
+
+
+def time_calls(func: Callable[[], Any], repeat: int, number: int) -> List[float]:
+    """
+    Calls `func` `number` times in a row, `repeat` times.
+
+    :return: The average time of a single call in seconds, for every repetition
+    :rtype: List[float]
+    """
+    return [total / number for total in Timer(func).repeat(repeat, number)]
+
+
+def random_offers(scenario: Scenario, num_offers: int, seed: int = 0) -> List[Offer]:
+    """
+    :return: `num_offers` offers in the negotiation space of the scenario, \
+        with every value chosen uniformly at random
+    :rtype: List[Offer]
+    """
+    rng = np.random.RandomState(seed)
+    offers = []
+    for _ in range(num_offers):
+        nested_offer = {}
+        for issue, values in scenario.neg_space.items():
+            chosen = rng.randint(len(values))
+            nested_offer[issue] = {str(value): float(j == chosen)
+                                   for j, value in enumerate(values)}
+        offers.append(Offer(nested_offer))
+    return offers
+
+
+def benchmark_negotiation(spec: AgentSpec, scenario: Scenario,
+                          repeat: int = 5, seed: int = 0,
+                          deadline: Optional[float] = None) -> BenchmarkResult:
+    """
+    Times :func:`Agent.negotiate` between two agents of the same specification,
+    including the rounds that were needed and whether they came to an agreement.
+    The agents are created anew for every repetition, which is not timed. Negotiations
+    that take longer than `deadline` seconds are ended without agreement.
+    """
+    times = []
+    rounds = []
+    successes = 0
+    for i in range(repeat):
+        np.random.seed(seed + i)
+        agent_a = spec.make_agent(scenario.neg_space, scenario.utilities_a)
+        agent_b = spec.make_agent(scenario.neg_space, scenario.utilities_b)
+        start = perf_counter()
+        successes += agent_a.negotiate(agent_b, deadline=deadline)
+        times.append(perf_counter() - start)
+        rounds.append(len(agent_a._transcript))
+
+    return BenchmarkResult("negotiate", scenario.name, spec.name, times, 1,
+                           rounds=median(rounds), success_rate=successes / repeat)
+
+
+def _make_fresh_agent(spec: AgentSpec, scenario: Scenario, seed: int) -> Agent:
+    np.random.seed(seed)
+    return spec.make_agent(scenario.neg_space, scenario.utilities_a)
+
+
+def benchmark_agent_components(spec: AgentSpec, scenario: Scenario,
+                               repeat: int = 5, number: int = 100,
+                               seed: int = 0) -> List[BenchmarkResult]:
+    """
+    Times the parts of an agent that negotiations spend most of their time in:
+    evaluating offers, generating offers and, for constrained agents, adding a constraint.
+    Generating offers is timed on a fresh agent every repetition, until it has generated
+    `number` offers or can't generate any more.
+    """
+    results = []
+
+    agent = _make_fresh_agent(spec, scenario, seed)
+    offers = cycle(random_offers(scenario, number, seed))
+    results.append(BenchmarkResult(
+        "calc_offer_utility", scenario.name, spec.name,
+        time_calls(lambda: agent._engine.calc_offer_utility(next(offers)), repeat, number),
+        number))
+
+    times = []
+    generated = []
+    for i in range(repeat):
+        engine = _make_fresh_agent(spec, scenario, seed + i)._engine
+        count = 0
+        start = perf_counter()
+        try:
+            while count < number:
+                engine.generate_offer()
+                count += 1
+        except StopIteration:
+            pass
+        times.append((perf_counter() - start) / max(count, 1))
+        generated.append(count)
+    results.append(BenchmarkResult("generate_offer", scenario.name, spec.name,
+                                   times, number, offers_generated=median(generated)))
+
+    if isinstance(agent, ConstrainedAgent):
+        issue, values = next(iter(scenario.neg_space.items()))
+        constraint = AtomicConstraint(issue, str(values[-1]))
+        times = []
+        for i in range(repeat):
+            engine = _make_fresh_agent(spec, scenario, seed + i)._engine
+            start = perf_counter()
+            engine.add_constraint(constraint)
+            times.append(perf_counter() - start)
+        results.append(BenchmarkResult("add_constraint", scenario.name, spec.name, times, 1))
+
+    return results
+
+
+def benchmark_offers(scenario: Scenario, repeat: int = 5,
+                     number: int = 100) -> List[BenchmarkResult]:
+    """
+    Times creating offers from nested dictionaries and hashing them,
+    which doesn't depend on the agents.
+    """
+    offers = random_offers(scenario, number)
+    nested_offers = cycle([offer.values_by_issue for offer in offers])
+    cycled_offers = cycle(offers)
+    return [
+        BenchmarkResult("Offer.__init__", scenario.name, "",
+                        time_calls(lambda: Offer(next(nested_offers)), repeat, number),
+                        number),
+        BenchmarkResult("Offer.__hash__", scenario.name, "",
+                        time_calls(lambda: hash(next(cycled_offers)), repeat, number),
+                        number),
+    ]
+
+
+def benchmark_import(module: str, repeat: int = 5) -> BenchmarkResult:
+    """
+    Times importing a module in a fresh interpreter, which is what every worker process
+    pays when it starts. The time of starting the interpreter itself isn't included.
+    The result records whether ProbLog ended up being imported.
+    The benchmark is named "import" and the module is recorded as the scenario.
+    """
+    env = dict(environ)
+    # make sure the interpreter imports this copy of pyneg
+    root = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+    env["PYTHONPATH"] = pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+
+    times = []
+    imports_problog = False
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _IMPORT_SCRIPT.format(module=module)],
+                                check=True, capture_output=True, text=True, env=env).stdout
+        duration, problog = output.split()
+        times.append(float(duration))
+        imports_problog = problog == "True"
+
+    return BenchmarkResult("import", module, "", times, 1, imports_problog=imports_problog)
+
+
+def run_benchmarks(specs: Optional[Sequence[AgentSpec]] = None,
+                   scenarios: Optional[Sequence[Scenario]] = None,
+                   repeat: int = 5,
+                   number: int = 100,
+                   seed: int = 0,
+                   deadline: Optional[float] = None,
+                   import_modules: Sequence[str] = (),
+                   progress: Optional[Callable[[BenchmarkResult], None]] = None
+                   ) -> List[BenchmarkResult]:
+    """
+    Runs all benchmarks for every agent in every scenario, and times importing the
+    given modules.
+
+    >>> results = run_benchmarks(repeat=3, progress=print)
+    >>> write_results(results, "benchmarks.json")
+
+    :param specs: The agents to benchmark, defaults to :func:`default_agent_specs`
+    :type specs: Optional[Sequence[AgentSpec]]
+    :param scenarios: The scenarios to benchmark in, defaults to \
+        :func:`make_benchmark_scenarios`
+    :type scenarios: Optional[Sequence[Scenario]]
+    :param repeat: The number of times every benchmark is repeated, defaults to 5
+    :type repeat: int
+    :param number: The number of calls that are timed in a row for the components, \
+        defaults to 100
+    :type number: int
+    :param seed: The seed for the random number generator, defaults to 0
+    :type seed: int
+    :param deadline: The number of seconds after which negotiations are ended without \
+        agreement, defaults to no limit
+    :type deadline: Optional[float]
+    :param import_modules: The modules to time the import of, e.g. IMPORT_MODULES, \
+        defaults to none
+    :type import_modules: Sequence[str]
+    :param progress: Called with every result as soon as it is available, defaults to None
+    :type progress: Optional[Callable[[BenchmarkResult], None]]
+    :return: The results of all benchmarks
+    :rtype: List[BenchmarkResult]
+    """
+    if specs is None:
+        specs = default_agent_specs()
+    if scenarios is None:
+        scenarios = make_benchmark_scenarios(seed=seed)
+
+    results = []
+    for module in import_modules:
+        result = benchmark_import(module, repeat)
+        if progress:
+            progress(result)
+        results.append(result)
+
+    for scenario in scenarios:
+        scenario_results = benchmark_offers(scenario, repeat, number)
+        for spec in specs:
+            scenario_results.append(benchmark_negotiation(spec, scenario, repeat, seed,
+                                                          deadline))
+            scenario_results.extend(benchmark_agent_components(spec, scenario, repeat,
+                                                               number, seed))
+        for result in scenario_results:
+            if progress:
+                progress(result)
+        results.extend(scenario_results)
+
+    return results
+
+
+def write_results(results: Sequence[BenchmarkResult], path: str) -> None:
+    """
+    Writes the results to a JSON file, together with information about the
+    environment they were measured in.
+
+    :param results: The results to write
+    :type results: Sequence[BenchmarkResult]
+    :param path: The path of the file to write
+    :type path: str
+    """
+    data = {
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": [result.to_dict() for result in results]
+    }
+    with open(path, "w") as json_file:
+        json.dump(data, json_file, indent=2)
+
+
+def read_results(path: str) -> Dict[BenchmarkKey, Dict[str, Any]]:
+    """
+    Reads results that were written by :func:`write_results`.
+
+    :param path: The path of the file to read
+    :type path: str
+    :return: The results, indexed by benchmark, scenario and agent
+    :rtype: Dict[BenchmarkKey, Dict[str, Any]]
+    """
+    with open(path) as json_file:
+        data = json.load(json_file)
+
+    return {(result["benchmark"], result["scenario"], result["agent"]): result
+            for result in data["results"]}
+
+
+def compare_results(baseline: Dict[BenchmarkKey, Dict[str, Any]],
+                    current: Dict[BenchmarkKey, Dict[str, Any]],
+                    tolerance: float = 0.2) -> List[BenchmarkComparison]:
+    """
+    Compares the median times of the benchmarks that are in both runs.
+
+    :param baseline: The results to compare against, see :func:`read_results`
+    :type baseline: Dict[BenchmarkKey, Dict[str, Any]]
+    :param current: The new results
+    :type current: Dict[BenchmarkKey, Dict[str, Any]]
+    :param tolerance: How much slower, as a fraction of the baseline, a benchmark can get \
+        before it counts as a regression. Defaults to 0.2
+    :type tolerance: float
+    :return: The comparisons, slowest relative to the baseline first
+    :rtype: List[BenchmarkComparison]
+    """
+    comparisons = [BenchmarkComparison(key, baseline[key]["median"],
+                                       current[key]["median"], tolerance)
+                   for key in current if key in baseline]
+    return sorted(comparisons, key=lambda comparison: -comparison.ratio)
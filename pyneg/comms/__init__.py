@@ -4,8 +4,19 @@ Currently consists of:
     - AtomicConstraint
     - Message
     - Offer
+    - CompactOffer
+    - OfferSchema
+    - ConstraintIndex
+    - Transcripts and transcript sinks
+    - A binary wire format for messages
 '''
 
 from pyneg.comms.atomic_constraint import AtomicConstraint
 from pyneg.comms.message import Message
 from pyneg.comms.offer import Offer
+from pyneg.comms.compact_offer import CompactOffer, OfferSchema
+from pyneg.comms.constraint_index import ConstraintIndex
+from pyneg.comms.transcript import (Transcript, InMemoryTranscript, StreamingTranscript,
+                                   TranscriptSink, InMemorySink, NullSink, FileSink,
+                                   iter_transcript_file, read_transcript_file)
+from pyneg.comms.wire import pack_message, pack_messages, unpack_message, iter_messages
@@ -0,0 +1,259 @@
+"""
+Defines the :class:`OfferSchema` and :class:`CompactOffer` classes.
+A compact offer stores only the index of the chosen value of each issue,
+against a schema that is shared by all offers in the same negotiation space.
+"""
+from hashlib import blake2b
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Tuple
+from weakref import WeakValueDictionary
+
+from pyneg.types import AtomicDict, NegSpace, NestedDict
+from pyneg.utils import atom_dict_from_nested_dict, atom_from_issue_value
+
+from .offer import Offer
+
+
+class OfferSchema:
+    """
+    An interned description of a negotiation space. It fixes an order for the issues
+    and for the values of each issue so offers can be stored as a tuple of value indices.
+    Schemas should be created through :func:`OfferSchema.from_neg_space` which makes sure
+    that equal negotiation spaces share the same schema object. Every schema has a
+    `schema_id` that is derived from the negotiation space itself, so it is the same in
+    every process that uses that negotiation space.
+
+    The registry only holds weak references, so a schema is dropped once no evaluator,
+    offer or transcript refers to it anymore. It can be looked up with
+    :func:`OfferSchema.get` for as long as something, e.g. an agent in that negotiation
+    space, keeps it alive.
+
+    >>> schema = OfferSchema.from_neg_space({"First":["A","B"], "Second":["C","D"]})
+    >>> schema.offer_from_indices((1, 0))
+    [First->B, Second->C]
+    """
+    __slots__ = ("issues", "values", "issue_indices", "value_indices", "schema_id",
+                 "__weakref__")
+
+    _registry: 'WeakValueDictionary[int, OfferSchema]' = WeakValueDictionary()
+
+    def __init__(self, neg_space: NegSpace):
+        self.issues: Tuple[str, ...] = tuple(map(str, neg_space.keys()))
+        self.values: Tuple[Tuple[str, ...], ...] = tuple(
+            tuple(map(str, values)) for values in neg_space.values())
+        self.issue_indices: Dict[str, int] = {
+            issue: i for i, issue in enumerate(self.issues)}
+        self.value_indices: Tuple[Dict[str, int], ...] = tuple(
+            {value: j for j, value in enumerate(values)} for values in self.values)
+        self.schema_id: int = self._calc_schema_id()
+
+    @classmethod
+    def from_neg_space(cls, neg_space: NegSpace) -> 'OfferSchema':
+        """
+        Returns the schema for the given negotiation space, creating and registering
+        it if it does not exist yet.
+
+        :param neg_space: The negotiation space to get the schema of
+        :type neg_space: NegSpace
+        :raises ValueError: In the very unlikely case that two different negotiation \
+            spaces produce the same schema id.
+        :return: The shared schema of the negotiation space.
+        :rtype: OfferSchema
+        """
+        schema = cls(neg_space)
+        existing = cls._registry.get(schema.schema_id)
+        if existing is None:
+            cls._registry[schema.schema_id] = schema
+            return schema
+
+        if existing.issues != schema.issues or existing.values != schema.values:
+            raise ValueError(f"Schema id collision for negotiation space {neg_space}")
+
+        return existing
+
+    @classmethod
+    def get(cls, schema_id: int) -> 'OfferSchema':
+        """
+        Looks up a previously created schema by it's id.
+
+        :param schema_id: The id of the schema
+        :type schema_id: int
+        :raises KeyError: If no schema with that id was created in this process, or \
+            it has been dropped because nothing refers to it anymore.
+        :return: The schema with the given id
+        :rtype: OfferSchema
+        """
+        return cls._registry[schema_id]
+
+    def _calc_schema_id(self) -> int:
+        digest = blake2b(repr((self.issues, self.values)).encode("utf-8"), digest_size=8)
+        return int.from_bytes(digest.digest(), "little")
+
+    @property
+    def neg_space(self) -> NegSpace:
+        """
+        The negotiation space this schema describes.
+        """
+        return {issue: list(values) for issue, values in zip(self.issues, self.values)}
+
+    def offer_from_indices(self, indices: Iterable[int]) -> 'CompactOffer':
+        """
+        Create an offer from value indices in the order of this schema.
+
+        :param indices: For every issue, the index of the chosen value
+        :type indices: Iterable[int]
+        :return: The corresponding compact offer
+        :rtype: CompactOffer
+        """
+        return CompactOffer(self, tuple(indices))
+
+    def compact(self, offer: Offer) -> 'CompactOffer':
+        """
+        Converts any offer in this negotiation space into a compact one.
+
+        :param offer: The offer to convert
+        :type offer: Offer
+        :raises KeyError: If the offer does not fit this schema
+        :return: The compact equivalent of the offer
+        :rtype: CompactOffer
+        """
+        if isinstance(offer, CompactOffer) and offer.schema is self:
+            return offer
+
+        return CompactOffer(self, tuple(
+            self.value_indices[i][offer.get_chosen_value(issue)]
+            for i, issue in enumerate(self.issues)))
+
+    def __len__(self) -> int:
+        return len(self.issues)
+
+    def __reduce__(self):
+        return (OfferSchema.from_neg_space, (self.neg_space,))
+
+    def __repr__(self) -> str:
+        return f"OfferSchema({self.schema_id:016x})"
+
+
+class CompactOffer(Offer):
+    """
+    An :class:`Offer` that is stored as a tuple of value indices against an
+    :class:`OfferSchema` instead of a nested dictionary. This makes it a lot cheaper to
+    create, hash and store, while still behaving like a normal offer. The nested,
+    atomic and ProbLog representations are only computed when they are asked for.
+    Compact offers are equal to and hash the same as normal offers with the same assignments.
+
+    >>> schema = OfferSchema.from_neg_space({"First":["A","B"], "Second":["C","D"]})
+    >>> compact = CompactOffer(schema, (1, 0))
+    >>> compact.get_chosen_value("First")
+    'B'
+    >>> compact == Offer({"First": {"A":0.0, "B":1.0}, "Second":{"C":1.0,"D":0.0}})
+    True
+    """
+    __slots__ = ("schema", "indices", "_hash", "_nested")
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, schema: OfferSchema, indices: Sequence[int]):
+        self.indent_level = 1
+        indices = tuple(indices)
+        if len(indices) != len(schema.issues):
+            raise ValueError(
+                f"Invalid offer, expected {len(schema.issues)} indices but got {len(indices)}")
+        for issue_index, value_index in enumerate(indices):
+            if not 0 <= value_index < len(schema.values[issue_index]):
+                raise ValueError(
+                    f"Invalid offer, {schema.issues[issue_index]} has unknown value index: "
+                    f"{value_index}")
+
+        self.schema: OfferSchema = schema
+        self.indices: Tuple[int, ...] = indices
+        self._hash = hash(self.get_sparse_repr())
+        self._nested = None
+
+    @property
+    def values_by_issue(self) -> NestedDict:  # type: ignore
+        """
+        The nested dictionary representation of the offer. Only computed when needed.
+        """
+        if self._nested is None:
+            self._nested = {
+                issue: {value: 1.0 if j == chosen else 0.0 for j, value in enumerate(values)}
+                for issue, values, chosen in zip(
+                    self.schema.issues, self.schema.values, self.indices)}
+        return self._nested
+
+    def get_chosen_value(self, issue: str) -> str:
+        issue_index = self.schema.issue_indices[issue]
+        return self.schema.values[issue_index][self.indices[issue_index]]
+
+    def is_assigned(self, issue: str, value: str) -> bool:
+        issue_index = self.schema.issue_indices[issue]
+        if value not in self.schema.value_indices[issue_index]:
+            raise KeyError(value)
+        return self.schema.values[issue_index][self.indices[issue_index]] == value
+
+    def get_issues(self) -> Iterable[str]:
+        return self.schema.issue_indices.keys()
+
+    def get_chosen_values(self) -> List[str]:
+        """
+        Returns the chosen value of every issue, in the order of the schema.
+
+        :return: A list of the chosen values
+        :rtype: List[str]
+        """
+        return [values[index] for values, index in zip(self.schema.values, self.indices)]
+
+    def get_atom_dict(self) -> AtomicDict:
+        """
+        Returns the atomic dictionary representation of this offer.
+
+        :return: The offer as an atomic dictionary
+        :rtype: AtomicDict
+        """
+        return atom_dict_from_nested_dict(self.values_by_issue)
+
+    def to_offer(self) -> Offer:
+        """
+        Converts this offer into a regular, dictionary based, :class:`Offer`
+
+        :return: An equal offer backed by a nested dictionary.
+        :rtype: Offer
+        """
+        return Offer({issue: dict(values) for issue, values in self.values_by_issue.items()})
+
+    def get_problog_dists(self) -> str:
+        return_string = ""
+        for issue, values, chosen in zip(self.schema.issues, self.schema.values, self.indices):
+            return_string += ";".join(
+                "{prob}::{atom}".format(prob=1.0 if j == chosen else 0.0,
+                                        atom=atom_from_issue_value(issue, value))
+                for j, value in enumerate(values)) + ".\n"
+
+        return return_string
+
+    def get_sparse_repr(self) -> FrozenSet[Tuple[str, str]]:
+        return frozenset(zip(self.schema.issues, self.get_chosen_values()))
+
+    def get_sparse_str_repr(self) -> str:
+        return "[" \
+            + ", ".join([f"{issue}->{value}" for issue, value in
+                         zip(self.schema.issues, self.get_chosen_values())]) \
+            + "]"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CompactOffer) and other.schema is self.schema:
+            return self.indices == other.indices
+
+        if not isinstance(other, Offer):
+            return False
+
+        for issue, value in zip(self.schema.issues, self.get_chosen_values()):
+            if other.get_chosen_value(issue) != value:
+                return False
+
+        return True
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (CompactOffer, (self.schema, self.indices))
@@ -0,0 +1,203 @@
+"""
+Defines the :class:`ConstraintIndex` class, a set of atomic constraints that is
+indexed by issue so offers can be checked against it quickly.
+"""
+from collections.abc import MutableSet
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from numpy import isclose
+
+from .atomic_constraint import AtomicConstraint
+from .compact_offer import CompactOffer, OfferSchema
+from .offer import Offer
+
+
+class ConstraintIndex(MutableSet):
+    """
+    A set of :class:`AtomicConstraint` objects that also keeps track of the constrained
+    values of every issue. It can be used anywhere a `Set[AtomicConstraint]` is expected,
+    but checking an assignment takes constant time and checking an offer takes time
+    linear in the number of constrained issues, regardless of the number of constraints.
+
+    If an :class:`OfferSchema` is given the constrained values of every issue are also
+    kept as a bitmask over the value indices of the schema, in which bit j is set if the
+    j-th value of the issue is constrained. :class:`CompactOffer` objects of that
+    schema are checked against these masks directly.
+
+    >>> index = ConstraintIndex({AtomicConstraint("First", "A")})
+    >>> index.is_satisfied_by_assignment("First", "A")
+    False
+    >>> index.get_constrained_values("First")
+    {'A'}
+    """
+    def __init__(self, constraints: Iterable[AtomicConstraint] = (),
+                 schema: Optional[OfferSchema] = None):
+        self.schema = schema
+        self._constraints: Set[AtomicConstraint] = set()
+        self._values_by_issue: Dict[str, Set[str]] = {}
+        self._masks: List[int] = [0] * len(schema) if schema is not None else []
+        self.update(constraints)
+
+    def __contains__(self, constraint: object) -> bool:
+        return constraint in self._constraints
+
+    def __iter__(self) -> Iterator[AtomicConstraint]:
+        return iter(self._constraints)
+
+    def __len__(self) -> int:
+        return len(self._constraints)
+
+    def add(self, constraint: AtomicConstraint) -> None:
+        if constraint in self._constraints:
+            return
+
+        self._constraints.add(constraint)
+        self._values_by_issue.setdefault(constraint.issue, set()).add(constraint.value)
+        self._set_mask_bit(constraint, True)
+
+    def discard(self, constraint: AtomicConstraint) -> None:
+        if constraint not in self._constraints:
+            return
+
+        self._constraints.discard(constraint)
+        values = self._values_by_issue[constraint.issue]
+        values.discard(constraint.value)
+        if not values:
+            del self._values_by_issue[constraint.issue]
+        self._set_mask_bit(constraint, False)
+
+    def update(self, constraints: Iterable[AtomicConstraint]) -> None:
+        """
+        Adds all of the given constraints, like :func:`set.update`.
+
+        :param constraints: The constraints to add
+        :type constraints: Iterable[AtomicConstraint]
+        """
+        for constraint in constraints:
+            self.add(constraint)
+
+    def clear(self) -> None:
+        self._constraints = set()
+        self._values_by_issue = {}
+        self._masks = [0] * len(self._masks)
+
+    def _set_mask_bit(self, constraint: AtomicConstraint, value: bool) -> None:
+        if self.schema is None:
+            return
+
+        i = self.schema.issue_indices.get(constraint.issue)
+        if i is None:
+            return
+
+        j = self.schema.value_indices[i].get(constraint.value)
+        if j is None:
+            return
+
+        if value:
+            self._masks[i] |= 1 << j
+        else:
+            self._masks[i] &= ~(1 << j)
+
+    def get_constrained_issues(self) -> Iterable[str]:
+        """
+        :return: All issues that have at least one constrained value.
+        :rtype: Iterable[str]
+        """
+        return self._values_by_issue.keys()
+
+    def get_constrained_values(self, issue: str) -> Set[str]:
+        """
+        :param issue: The issue to get the constrained values of
+        :type issue: str
+        :return: The values of the issue that are ruled out. Should not be modified.
+        :rtype: Set[str]
+        """
+        return self._values_by_issue.get(issue, set())
+
+    def get_unconstrained_values(self, issue: str, values: Iterable[str]) -> Set[str]:
+        """
+        :param issue: The issue the values belong to
+        :type issue: str
+        :param values: All possible values of the issue
+        :type values: Iterable[str]
+        :return: The given values that are not ruled out by any constraint.
+        :rtype: Set[str]
+        """
+        return set(values) - self.get_constrained_values(issue)
+
+    def get_mask(self, issue: str) -> int:
+        """
+        :param issue: The issue to get the mask of
+        :type issue: str
+        :raises ValueError: if the index was created without a schema
+        :return: The bitmask of the constrained value indices of the issue.
+        :rtype: int
+        """
+        if self.schema is None:
+            raise ValueError("Bitmasks are only available for indices with a schema")
+
+        return self._masks[self.schema.issue_indices[issue]]
+
+    def is_satisfied_by_assignment(self, issue: str, value: str) -> bool:
+        """
+        :return: True iff assigning the value to the issue doesn't violate any constraint
+        :rtype: bool
+        """
+        values = self._values_by_issue.get(issue)
+        return not values or value not in values
+
+    def is_satisfied_by_offer(self, offer: Offer) -> bool:
+        """
+        :param offer: The offer to check
+        :type offer: Offer
+        :return: True iff the offer doesn't violate any constraint
+        :rtype: bool
+        """
+        return self.find_violated_constraint(offer) is None
+
+    def is_satisfied_by_strat(self, strat: 'Strategy') -> bool: # type: ignore
+        """
+        :param strat: The strategy to check
+        :type strat: Strategy
+        :return: True iff the strategy gives probability 0 to every constrained value.
+        :rtype: bool
+        """
+        for issue, values in self._values_by_issue.items():
+            value_dist = strat.get_value_dist(issue)
+            for value in values:
+                if not isclose(value_dist.get(value, 0), 0):
+                    return False
+
+        return True
+
+    def find_violated_constraint(self, offer: Offer) -> Optional[AtomicConstraint]:
+        """
+        :param offer: The offer to check
+        :type offer: Offer
+        :return: A constraint that the offer violates, if there is one.
+        :rtype: Optional[AtomicConstraint]
+        """
+        if not self._constraints:
+            return None
+
+        if isinstance(offer, CompactOffer) and self.schema is not None \
+                and offer.schema is self.schema:
+            for i, (mask, index) in enumerate(zip(self._masks, offer.indices)):
+                if mask >> index & 1:
+                    return AtomicConstraint(self.schema.issues[i],
+                                            self.schema.values[i][index])
+            return None
+
+        for issue, values in self._values_by_issue.items():
+            try:
+                chosen_value = offer.get_chosen_value(issue)
+            except KeyError:
+                # the offer doesn't say anything about this issue
+                continue
+            if chosen_value in values:
+                return AtomicConstraint(issue, chosen_value)
+
+        return None
+
+    def __repr__(self) -> str:
+        return f"ConstraintIndex({self._constraints})"
@@ -24,6 +24,8 @@ class Offer:
     >>> atomic = {"First_A":0.0, "First_B":1.0, "Second_C":1.0, "Second_D":0.0}
 
     """
+    __slots__ = ("indent_level", "values_by_issue")
+
     def __init__(self, values_by_issue: Union[NestedDict, AtomicDict],
                  indent_level: int = 1):
         self.indent_level = indent_level
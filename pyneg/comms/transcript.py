@@ -0,0 +1,265 @@
+"""
+Defines where the messages of a negotiation are recorded. A :class:`TranscriptSink`
+creates a :class:`Transcript` for every negotiation, which the :class:`Mediator` shares
+between both agents. There are three kinds:
+
+- :class:`InMemorySink` keeps every message in a list, this is the default.
+- :class:`NullSink` only keeps the number of messages and the last one.
+- :class:`FileSink` streams the messages to a file as they are sent, so long running
+  batch jobs can record many negotiations with bounded memory.
+  :func:`iter_transcript_file` and :func:`read_transcript_file` read them back.
+
+The file format has one JSON array per line. A negotiation starts with a header row
+``["N", negotiation_id, issues, values]`` which fixes the order of the issues and their
+values. Every message is a row ``["M", negotiation_id, sender, recipient, type,
+value_indices, constraint]`` where `value_indices` holds the index of the chosen value
+of every issue (or null if there is no offer) and `constraint` is ``[issue, value]``
+or null. Rows of concurrent negotiations may be interleaved.
+"""
+import json
+from typing import IO, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from pyneg.types import MessageType, NegSpace
+
+from .atomic_constraint import AtomicConstraint
+from .compact_offer import OfferSchema
+from .message import Message
+
+
+class Transcript:
+    """
+    The record of a single negotiation. Transcripts at least know how many messages were
+    sent and what the last one was, which is enough to determine the outcome.
+    """
+    def __init__(self) -> None:
+        self._length = 0
+        self._last: Optional[Message] = None
+
+    def append(self, message: Message) -> None:
+        """
+        Records a message.
+
+        :param message: The message to record
+        :type message: Message
+        """
+        self._length += 1
+        self._last = message
+
+    @property
+    def last(self) -> Optional[Message]:
+        """
+        The last message that was recorded, if any.
+        """
+        return self._last
+
+    def __len__(self) -> int:
+        return self._length
+
+
+class InMemoryTranscript(Transcript):
+    """
+    A transcript that keeps every message in memory. It can be indexed and iterated
+    like a list, and compares equal to other transcripts and lists with the same messages.
+    """
+    def __init__(self, messages: Sequence[Message] = ()) -> None:
+        super().__init__()
+        self.messages: List[Message] = list(messages)
+
+    def append(self, message: Message) -> None:
+        self.messages.append(message)
+
+    @property
+    def last(self) -> Optional[Message]:
+        return self.messages[-1] if self.messages else None
+
+    def __getitem__(self, index):
+        return self.messages[index]
+
+    def __iter__(self) -> Iterator[Message]:
+        return iter(self.messages)
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, InMemoryTranscript):
+            return self.messages == other.messages
+        if isinstance(other, list):
+            return self.messages == other
+        return False
+
+    def __repr__(self) -> str:
+        return repr(self.messages)
+
+
+class StreamingTranscript(Transcript):
+    """
+    A transcript that writes every message to the file of a :class:`FileSink` as soon
+    as it is recorded, keeping only the last one in memory.
+    """
+    def __init__(self, sink: 'FileSink', negotiation_id: int, schema: OfferSchema) -> None:
+        super().__init__()
+        self.sink = sink
+        self.negotiation_id = negotiation_id
+        self.schema = schema
+
+    def append(self, message: Message) -> None:
+        super().append(message)
+        self.sink.write_row(encode_message(message, self.negotiation_id, self.schema))
+
+
+class TranscriptSink:
+    """
+    Creates the transcripts that negotiations are recorded in.
+    """
+    def new_transcript(self, neg_space: NegSpace) -> Transcript:
+        """
+        Creates the transcript for a new negotiation.
+
+        :param neg_space: The negotiation space of the negotiation
+        :type neg_space: NegSpace
+        :raises NotImplementedError:
+        :return: The transcript to record the negotiation in
+        :rtype: Transcript
+        """
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        """
+        Releases any resources held by the sink.
+        """
+
+
+class InMemorySink(TranscriptSink):
+    """
+    Keeps every message of every negotiation in memory, see :class:`InMemoryTranscript`.
+    """
+    def new_transcript(self, neg_space: NegSpace) -> InMemoryTranscript:
+        return InMemoryTranscript()
+
+
+class NullSink(TranscriptSink):
+    """
+    Doesn't record messages, the transcripts only know the number of messages and
+    the last one.
+    """
+    def new_transcript(self, neg_space: NegSpace) -> Transcript:
+        return Transcript()
+
+
+class FileSink(TranscriptSink):
+    """
+    Streams the messages of all negotiations it creates transcripts for to a single file,
+    in the format described in :mod:`pyneg.comms.transcript`. Every negotiation gets the
+    next negotiation id, starting from `first_id`. Rows are written as soon as
+    messages are sent, but they are buffered by the file, so the sink should be closed
+    when all negotiations are done.
+
+    >>> with FileSink("transcripts.jsonl") as sink:
+    ...     agent.set_transcript_sink(sink)
+    ...     agent.negotiate(opponent)
+    >>> for negotiation_id, message in iter_transcript_file("transcripts.jsonl"):
+    ...     print(negotiation_id, message)
+    """
+    def __init__(self, file: Union[str, IO[str]], first_id: int = 0) -> None:
+        """
+        :param file: The path of the file to write to, or an open text file
+        :type file: Union[str, IO[str]]
+        :param first_id: The id of the first negotiation, defaults to 0
+        :type first_id: int
+        """
+        self._owns_file = isinstance(file, str)
+        self.file: IO[str] = open(file, "w") if isinstance(file, str) else file
+        self.next_id = first_id
+
+    def new_transcript(self, neg_space: NegSpace) -> StreamingTranscript:
+        schema = OfferSchema.from_neg_space(neg_space)
+        negotiation_id = self.next_id
+        self.next_id += 1
+        self.write_row(["N", negotiation_id, schema.issues, schema.values])
+        return StreamingTranscript(self, negotiation_id, schema)
+
+    def write_row(self, row: list) -> None:
+        self.file.write(json.dumps(row, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        if self._owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self) -> 'FileSink':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def encode_message(message: Message, negotiation_id: int, schema: OfferSchema) -> list:
+    """
+    Encodes a message as a row of a transcript file.
+
+    :param message: The message to encode
+    :type message: Message
+    :param negotiation_id: The id of the negotiation the message was sent in
+    :type negotiation_id: int
+    :param schema: The schema of the negotiation space
+    :type schema: OfferSchema
+    :return: The row representing the message
+    :rtype: list
+    """
+    indices = list(schema.compact(message.offer).indices) if message.offer is not None else None
+    constraint = [message.constraint.issue, message.constraint.value] \
+        if message.constraint is not None else None
+    return ["M", negotiation_id, message.sender_name, message.recipient_name,
+            message.type_.name, indices, constraint]
+
+
+def iter_transcript_file(path: str) -> Iterator[Tuple[int, Message]]:
+    """
+    Reads the messages from a file written by a :class:`FileSink` one at a time.
+    Offers are read as :class:`CompactOffer`.
+
+    :param path: The file to read
+    :type path: str
+    :raises ValueError: If the file contains a row that isn't a header or a message, \
+        or a message of a negotiation whose header hasn't been read.
+    :return: For every message, the id of it's negotiation and the message itself, \
+        in the order they were written.
+    :rtype: Iterator[Tuple[int, Message]]
+    """
+    schemas: Dict[int, OfferSchema] = {}
+    with open(path) as file:
+        for line in file:
+            row = json.loads(line)
+            if row[0] == "N":
+                _, negotiation_id, issues, values = row
+                schemas[negotiation_id] = OfferSchema.from_neg_space(
+                    dict(zip(issues, values)))
+            elif row[0] == "M":
+                _, negotiation_id, sender, recipient, type_, indices, constraint = row
+                if negotiation_id not in schemas:
+                    raise ValueError(f"Message of unknown negotiation {negotiation_id}")
+                offer = schemas[negotiation_id].offer_from_indices(indices) \
+                    if indices is not None else None
+                yield negotiation_id, Message(
+                    sender, recipient, MessageType[type_], offer,
+                    AtomicConstraint(*constraint) if constraint else None)
+            else:
+                raise ValueError(f"Invalid transcript row: {line!r}")
+
+
+def read_transcript_file(path: str) -> Dict[int, InMemoryTranscript]:
+    """
+    Reads all transcripts from a file written by a :class:`FileSink`.
+    see :func:`iter_transcript_file`
+
+    :param path: The file to read
+    :type path: str
+    :return: The transcript of every negotiation by negotiation id
+    :rtype: Dict[int, InMemoryTranscript]
+    """
+    transcripts: Dict[int, InMemoryTranscript] = {}
+    for negotiation_id, message in iter_transcript_file(path):
+        transcripts.setdefault(negotiation_id, InMemoryTranscript()).append(message)
+    return transcripts
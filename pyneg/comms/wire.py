@@ -0,0 +1,209 @@
+"""
+Defines a compact binary encoding for :class:`Message`, used to send messages and
+offers between processes without pickling their nested dictionaries.
+
+Every message is a single record, all integers are little endian:
+
+- ``I`` the size of the whole record in bytes
+- ``B`` the message type and ``B`` flags saying whether there is an offer and a constraint
+- ``H`` the size of the sender name and ``H`` the size of the recipient name, followed
+  by both names in UTF-8
+- if there is an offer: ``Q`` the id of it's :class:`OfferSchema`, ``H`` the number of
+  issues and ``H`` the index of the chosen value of every issue
+- if there is a constraint: ``H`` the index of it's issue and ``H`` the index of
+  it's value in the same schema
+
+Records can be concatenated into a single buffer. Decoding reads straight from a
+`memoryview` of the buffer and creates the offers as :class:`CompactOffer` from their
+value indices, so no intermediate dictionaries are built. The schema of an offer is
+looked up by it's id, so it has to be created in the decoding process as well, which
+happens as soon as an agent is created for that negotiation space.
+
+>>> data = pack_message(message)
+>>> message, end = unpack_message(data)
+>>> messages = list(iter_messages(pack_messages([first, second])))
+"""
+from functools import lru_cache
+from struct import Struct
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+from pyneg.types import MessageType
+
+from .atomic_constraint import AtomicConstraint
+from .compact_offer import CompactOffer, OfferSchema
+from .message import Message
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+_HEADER = Struct("<IBBHH")
+_OFFER_HEADER = Struct("<QH")
+_CONSTRAINT = Struct("<HH")
+
+_HAS_OFFER = 1
+_HAS_CONSTRAINT = 2
+
+# the largest name size, number of issues and value index that fit in an H
+_MAX_SHORT = 0xFFFF
+
+_MESSAGE_TYPES = {message_type.value: message_type for message_type in MessageType}
+
+
+@lru_cache(maxsize=None)
+def _indices_struct(num_issues: int) -> Struct:
+    return Struct(f"<{num_issues}H")
+
+
+def pack_message(message: Message, schema: Optional[OfferSchema] = None) -> bytes:
+    """
+    Encodes a message as a single binary record.
+
+    :param message: The message to encode
+    :type message: Message
+    :param schema: The schema to encode the offer against. Defaults to the schema of \
+        the offer if it is a :class:`CompactOffer`
+    :type schema: Optional[OfferSchema]
+    :raises ValueError: If the message has an offer but no schema is known, a \
+        constraint that isn't part of the schema or without an offer, or names, \
+        issues or values that don't fit in the record.
+    :return: The encoded message
+    :rtype: bytes
+    """
+    sender = message.sender_name.encode("utf-8")
+    recipient = message.recipient_name.encode("utf-8")
+    if len(sender) > _MAX_SHORT or len(recipient) > _MAX_SHORT:
+        raise ValueError(f"Names can be at most {_MAX_SHORT} bytes long")
+
+    flags = 0
+    parts = [b"", sender, recipient]
+
+    if message.offer is None:
+        schema = None
+    else:
+        if schema is None:
+            if not isinstance(message.offer, CompactOffer):
+                raise ValueError("A schema is needed to encode offers that aren't compact")
+            schema = message.offer.schema
+        indices = schema.compact(message.offer).indices
+        if len(indices) > _MAX_SHORT or any(index > _MAX_SHORT for index in indices):
+            raise ValueError(f"Offers can have at most {_MAX_SHORT} issues "
+                             f"with at most {_MAX_SHORT + 1} values each")
+        flags |= _HAS_OFFER
+        parts.append(_OFFER_HEADER.pack(schema.schema_id, len(indices)))
+        parts.append(_indices_struct(len(indices)).pack(*indices))
+
+    if message.constraint is not None:
+        if schema is None:
+            raise ValueError("Constraints can only be encoded together with an offer")
+        try:
+            issue_index = schema.issue_indices[message.constraint.issue]
+            value_index = schema.value_indices[issue_index][message.constraint.value]
+        except KeyError as err:
+            raise ValueError(
+                f"Constraint {message.constraint} is not part of {schema}") from err
+        if value_index > _MAX_SHORT:
+            raise ValueError(f"Constraint {message.constraint} doesn't fit in a record")
+        flags |= _HAS_CONSTRAINT
+        parts.append(_CONSTRAINT.pack(issue_index, value_index))
+
+    size = _HEADER.size + sum(map(len, parts))
+    parts[0] = _HEADER.pack(size, message.type_.value, flags, len(sender), len(recipient))
+    return b"".join(parts)
+
+
+def pack_messages(messages: Iterable[Message], schema: Optional[OfferSchema] = None) -> bytes:
+    """
+    Encodes multiple messages into a single buffer. see :func:`pack_message`
+
+    :param messages: The messages to encode
+    :type messages: Iterable[Message]
+    :param schema: see :func:`pack_message`
+    :type schema: Optional[OfferSchema]
+    :return: The concatenated records
+    :rtype: bytes
+    """
+    return b"".join(pack_message(message, schema) for message in messages)
+
+
+def unpack_message(buffer: Buffer, offset: int = 0) -> Tuple[Message, int]:
+    """
+    Decodes the record starting at `offset`.
+
+    :param buffer: The buffer to read from
+    :type buffer: Buffer
+    :param offset: Where the record starts, defaults to 0
+    :type offset: int
+    :raises ValueError: If the record is truncated or malformed
+    :raises KeyError: If the schema of the offer doesn't exist in this process, \
+        see :func:`OfferSchema.get`
+    :return: The message and the offset of the next record
+    :rtype: Tuple[Message, int]
+    """
+    view = memoryview(buffer)
+    if offset + _HEADER.size > len(view):
+        raise ValueError(f"Truncated message header at {offset}")
+
+    size, type_value, flags, sender_size, recipient_size = _HEADER.unpack_from(view, offset)
+    end = offset + size
+    if end > len(view):
+        raise ValueError(f"Truncated message at {offset}, expected {size} bytes")
+
+    def check_fits(position: int, field_size: int) -> None:
+        # the size of the record may be wrong, so never read past it's end
+        if position + field_size > end:
+            raise ValueError(f"Malformed message at {offset}")
+
+    position = offset + _HEADER.size
+    check_fits(position, sender_size + recipient_size)
+    sender = str(view[position:position + sender_size], "utf-8")
+    position += sender_size
+    recipient = str(view[position:position + recipient_size], "utf-8")
+    position += recipient_size
+
+    offer = None
+    schema = None
+    if flags & _HAS_OFFER:
+        check_fits(position, _OFFER_HEADER.size)
+        schema_id, num_issues = _OFFER_HEADER.unpack_from(view, position)
+        position += _OFFER_HEADER.size
+        schema = OfferSchema.get(schema_id)
+        indices_struct = _indices_struct(num_issues)
+        check_fits(position, indices_struct.size)
+        offer = CompactOffer(schema, indices_struct.unpack_from(view, position))
+        position += indices_struct.size
+
+    constraint = None
+    if flags & _HAS_CONSTRAINT:
+        if schema is None:
+            raise ValueError(f"Message at {offset} has a constraint but no offer")
+        check_fits(position, _CONSTRAINT.size)
+        issue_index, value_index = _CONSTRAINT.unpack_from(view, position)
+        position += _CONSTRAINT.size
+        constraint = AtomicConstraint(schema.issues[issue_index],
+                                      schema.values[issue_index][value_index])
+
+    if position != end:
+        raise ValueError(f"Malformed message at {offset}")
+
+    try:
+        message_type = _MESSAGE_TYPES[type_value]
+    except KeyError as err:
+        raise ValueError(f"Unknown message type {type_value} at {offset}") from err
+
+    return Message(sender, recipient, message_type, offer, constraint), end
+
+
+def iter_messages(buffer: Buffer) -> Iterator[Message]:
+    """
+    Decodes all records in the buffer one at a time, without copying the buffer.
+    see :func:`unpack_message`
+
+    :param buffer: The buffer to read, e.g. created by :func:`pack_messages`
+    :type buffer: Buffer
+    :return: The messages in the order they were written
+    :rtype: Iterator[Message]
+    """
+    view = memoryview(buffer)
+    offset = 0
+    while offset < len(view):
+        message, offset = unpack_message(view, offset)
+        yield message
@@ -2,20 +2,53 @@
 This module handles how agents generate and evaluate offers.
 This is where utility functions, constraints and other
 information needed for that is stored.
+
+The classes that reason with ProbLog are only imported when they are first used,
+so agents that don't need ProbLog don't pay for importing it.
 """
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
 
 from pyneg.engine.strategy import Strategy
 from pyneg.engine.generator import Generator
 from pyneg.engine.enum_generator import EnumGenerator
+from pyneg.engine.heap_enum_generator import HeapEnumGenerator
+from pyneg.engine.acceptance_region_sampler import AcceptanceRegionSampler
 from pyneg.engine.random_generator import RandomGenerator
-from pyneg.engine.dtp_generator import DTPGenerator
 from pyneg.engine.evaluator import Evaluator
 from pyneg.engine.linear_evaluator import LinearEvaluator
-from pyneg.engine.problog_evaluator import ProblogEvaluator
+from pyneg.engine.compiled_linear_evaluator import CompiledLinearEvaluator
+from pyneg.engine.cached_evaluator import CachedEvaluator
+from pyneg.engine.constraint_discovery import discover_constraints
 from pyneg.engine.constrained_enum_generator import ConstrainedEnumGenerator
 from pyneg.engine.constrained_random_generator import ConstrainedRandomGenerator
-from pyneg.engine.constrained_dtp_generator import ConstrainedDTPGenerator
 from pyneg.engine.constrained_linear_evaluator import ConstrainedLinearEvaluator
-from pyneg.engine.constrained_problog_evaluator import ConstrainedProblogEvaluator
+from pyneg.engine.profiler import Profiler, NegotiationStats, CallStats
 from pyneg.engine.engine import Engine, AbstractEngine
 
+if TYPE_CHECKING:
+    from pyneg.engine.dtp_generator import DTPGenerator
+    from pyneg.engine.problog_evaluator import ProblogEvaluator
+    from pyneg.engine.constrained_dtp_generator import ConstrainedDTPGenerator
+    from pyneg.engine.constrained_problog_evaluator import ConstrainedProblogEvaluator
+
+# the classes that depend on ProbLog and the modules they are defined in
+_LAZY_IMPORTS = {
+    "DTPGenerator": "pyneg.engine.dtp_generator",
+    "ProblogEvaluator": "pyneg.engine.problog_evaluator",
+    "ConstrainedDTPGenerator": "pyneg.engine.constrained_dtp_generator",
+    "ConstrainedProblogEvaluator": "pyneg.engine.constrained_problog_evaluator",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(_LAZY_IMPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
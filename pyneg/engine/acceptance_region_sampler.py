@@ -0,0 +1,152 @@
+"""
+Defines the :class:`AcceptanceRegionSampler` class, which samples offers directly from
+the region of a negotiation space that is acceptable under a linear utility function.
+"""
+
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class _NodeBudgetExceeded(Exception):
+    pass
+
+
+class AcceptanceRegionSampler:
+    """
+    Samples offers whose utility is at least `threshold` under a linear additive
+    utility function (see :ref:`linear-additivity`), with probability proportional to
+    the product of the probabilities of the chosen values. This is the same distribution
+    rejection sampling from those probabilities would give, but without the rejections,
+    so the cost of a sample doesn't depend on how small the acceptable region is.
+
+    To do this the acceptable probability mass of every partial offer is calculated,
+    issue by issue. The values of every issue are sorted by utility so that, using the
+    best and worst case utility of the remaining issues, values that make every completion
+    acceptable or none of them can be skipped in bulk. Only the values in between are
+    explored further and the results are memoized on the issue and the utility that is
+    still needed. For utilities with many distinct sums this can still take exponential
+    time, so the number of explored partial offers is capped at `max_nodes`. If the cap is
+    reached :func:`acceptable_mass` returns None and the sampler can't be used.
+
+    Utilities and probabilities are given per issue as lists in the same order, with
+    entry j referring to the j-th value of the issue. Values with probability 0 are never
+    sampled. Samples are returned as value indices.
+
+    >>> sampler = AcceptanceRegionSampler([[10, 0], [4, 1]], [[0.5, 0.5], [0.5, 0.5]], 5)
+    >>> sampler.acceptable_mass()
+    0.5
+    >>> sampler.sample(3)[:, 0]
+    array([0, 0, 0])
+    """
+
+    def __init__(self, utilities: Sequence[Sequence[float]],
+                 probabilities: Sequence[Sequence[float]],
+                 threshold: float,
+                 max_nodes: int = 100000):
+        self.threshold = threshold
+        self.max_nodes = max_nodes
+        self.num_issues = len(utilities)
+        self._memo: Dict[Tuple[int, float], float] = {}
+        # per issue, the values that can be sampled sorted by decreasing utility
+        self._indices: List[List[int]] = []
+        self._utils: List[List[float]] = []
+        self._neg_utils: List[List[float]] = []
+        self._probs: List[List[float]] = []
+        self._cum_probs: List[List[float]] = []
+        for issue_utils, issue_probs in zip(utilities, probabilities):
+            total = sum(issue_probs)
+            ranked = sorted((j for j, prob in enumerate(issue_probs) if prob > 0),
+                            key=lambda j, utils=issue_utils: utils[j], reverse=True)
+            self._indices.append(ranked)
+            self._utils.append([float(issue_utils[j]) for j in ranked])
+            self._neg_utils.append([-float(issue_utils[j]) for j in ranked])
+            self._probs.append([issue_probs[j] / total for j in ranked])
+            self._cum_probs.append([0.0] + list(accumulate(self._probs[-1])))
+
+        # best and worst utility that issue i and all issues after it can contribute
+        self._suffix_max = [0.0] * (self.num_issues + 1)
+        self._suffix_min = [0.0] * (self.num_issues + 1)
+        for i in reversed(range(self.num_issues)):
+            utils = self._utils[i] or [float("-inf")]
+            self._suffix_max[i] = self._suffix_max[i + 1] + utils[0]
+            self._suffix_min[i] = self._suffix_min[i + 1] + utils[-1]
+
+    def acceptable_mass(self) -> Optional[float]:
+        """
+        The probability that an offer sampled from the value distributions is acceptable.
+
+        :return: The acceptable probability mass or None if calculating it would take \
+            more than `max_nodes` steps.
+        :rtype: Optional[float]
+        """
+        try:
+            return self._mass(0, self.threshold)
+        except _NodeBudgetExceeded:
+            return None
+
+    def sample(self, num_samples: int) -> np.ndarray:
+        """
+        Samples acceptable offers.
+
+        :param num_samples: The number of offers to sample
+        :type num_samples: int
+        :raises ValueError: If there are no acceptable offers or they can't be counted \
+            within the node budget
+        :return: an (num_samples x issues) array of value indices
+        :rtype: np.ndarray
+        """
+        mass = self.acceptable_mass()
+        if not mass:
+            raise ValueError("There are no acceptable offers to sample from")
+
+        samples = np.empty((num_samples, self.num_issues), dtype=np.intp)
+        for k in range(num_samples):
+            remaining = self.threshold
+            for i in range(self.num_issues):
+                start, stop = self._partially_acceptable_range(i, remaining)
+                weights = self._probs[i][:stop]
+                for rank in range(start, stop):
+                    weights[rank] *= self._mass(i + 1, remaining - self._utils[i][rank])
+                cum_weights = list(accumulate(weights))
+                rank = min(bisect_right(cum_weights, np.random.random() * cum_weights[-1]),
+                           stop - 1)
+                samples[k, i] = self._indices[i][rank]
+                remaining -= self._utils[i][rank]
+        return samples
+
+    def _partially_acceptable_range(self, issue: int, remaining: float) -> Tuple[int, int]:
+        """
+        Every value before `start` (in order of decreasing utility) makes all completions
+        acceptable and every value from `stop` onward makes none of them acceptable.
+        """
+        # utils >= remaining - suffix_min  <=>  -utils <= suffix_min - remaining
+        start = bisect_right(self._neg_utils[issue],
+                             self._suffix_min[issue + 1] - remaining)
+        # utils < remaining - suffix_max  <=>  -utils > suffix_max - remaining
+        stop = bisect_right(self._neg_utils[issue],
+                            self._suffix_max[issue + 1] - remaining, lo=start)
+        return start, stop
+
+    def _mass(self, issue: int, remaining: float) -> float:
+        if remaining <= self._suffix_min[issue]:
+            return 1.0
+        if remaining > self._suffix_max[issue]:
+            return 0.0
+
+        key = (issue, remaining)
+        if key in self._memo:
+            return self._memo[key]
+        if len(self._memo) >= self.max_nodes:
+            raise _NodeBudgetExceeded()
+
+        start, stop = self._partially_acceptable_range(issue, remaining)
+        mass = self._cum_probs[issue][start]
+        for rank in range(start, stop):
+            mass += self._probs[issue][rank] * \
+                self._mass(issue + 1, remaining - self._utils[issue][rank])
+
+        self._memo[key] = mass
+        return mass
@@ -0,0 +1,95 @@
+"""
+Defines the :class:`CachedEvaluator` class, a wrapper that memoizes the
+utilities calculated by any other :class:`Evaluator`.
+"""
+from collections import OrderedDict
+from typing import Any, Iterable
+
+from pyneg.comms import AtomicConstraint, Offer
+from pyneg.types import AtomicDict
+
+from .evaluator import Evaluator
+
+
+class CachedEvaluator(Evaluator):
+    """
+    Wraps another evaluator and remembers the utility of the most recently
+    evaluated offers. During a negotiation the same offer is often evaluated by the
+    generator, the engine and the agent, which this turns into a dictionary lookup.
+    This is mostly useful for evaluators where calculating the utility is expensive,
+    like the :class:`ProblogEvaluator`.
+
+    Offers are cached by their sparse representation (i.e. the value they assign to
+    every issue) and the cache is cleared whenever the utilities or constraints change
+    through this wrapper. When the cache is full, the least recently used offer is
+    evicted. Every other attribute and method is taken from the wrapped evaluator.
+
+    >>> evaluator = CachedEvaluator(ProblogEvaluator(neg_space, utilities, -1000, []), 1024)
+    >>> evaluator.calc_offer_utility(offer)
+    >>> evaluator.calc_offer_utility(offer)  # no ProbLog involved this time
+    >>> evaluator.hits, evaluator.misses
+    (1, 1)
+    """
+    def __init__(self, evaluator: Evaluator, max_size: int = 1024):
+        super().__init__()
+        if max_size < 1:
+            raise ValueError(f"Cache size should be positive, got {max_size}")
+        self.evaluator = evaluator
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: 'OrderedDict[Offer, float]' = OrderedDict()
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes that aren't found on the wrapper itself
+        if name == "evaluator":
+            raise AttributeError(name)
+        return getattr(self.evaluator, name)
+
+    def unwrap(self) -> Evaluator:
+        return self.evaluator.unwrap()
+
+    def calc_offer_utility(self, offer: Offer) -> float:
+        util = self._cache.get(offer)
+        if util is not None:
+            self._cache.move_to_end(offer)
+            self.hits += 1
+            return util
+
+        self.misses += 1
+        util = self.evaluator.calc_offer_utility(offer)
+        self._cache[offer] = util
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+        return util
+
+    def calc_assignment_util(self, issue: str, value: str) -> float:
+        return self.evaluator.calc_assignment_util(issue, value)
+
+    def add_utilities(self, new_utils: AtomicDict) -> bool:
+        self.invalidate()
+        return self.evaluator.add_utilities(new_utils)
+
+    def set_utilities(self, new_utils: AtomicDict) -> bool:
+        self.invalidate()
+        return self.evaluator.set_utilities(new_utils)
+
+    def add_constraint(self, constraint: AtomicConstraint) -> bool:
+        self.invalidate()
+        return self.evaluator.add_constraint(constraint)
+
+    def add_constraints(self, new_constraints: Iterable[AtomicConstraint]) -> bool:
+        self.invalidate()
+        return self.evaluator.add_constraints(new_constraints)
+
+    def invalidate(self) -> None:
+        """
+        Forgets all cached utilities. This happens automatically when
+        utilities or constraints are changed through this wrapper, but should be called
+        manually when the wrapped evaluator is modified directly.
+        """
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
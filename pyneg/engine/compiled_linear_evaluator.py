@@ -0,0 +1,144 @@
+"""
+Defines the :class:`CompiledLinearEvaluator` class, a version of :class:`LinearEvaluator`
+that indexes the negotiation space up front so offers can be scored in bulk.
+"""
+
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from pyneg.comms import CompactOffer, Offer, OfferSchema
+from pyneg.types import AtomicDict, NegSpace
+
+from .linear_evaluator import LinearEvaluator
+
+
+class CompiledLinearEvaluator(LinearEvaluator):
+    """
+    Evaluates offers using linear additive calculations, exactly like
+    :class:`LinearEvaluator`, but compiles the utility function into a dense
+    matrix of weighted utilities first. Rows of the matrix correspond to the
+    issues and columns to the values of that issue, both in the order of the
+    negotiation space. Issues with fewer values than the widest one are padded with 0.
+
+    This means a batch of offers can be represented as an (N x issues) integer
+    array of value indices and scored with a single gather and sum.
+    see :func:`calc_offer_utilities`. The indices are those of the :class:`OfferSchema`
+    of the negotiation space, so :class:`CompactOffer` objects can be scored directly.
+
+    >>> evaluator = CompiledLinearEvaluator({"boolean":["True","False"], "integer":["1","2"]},
+        {"boolean_True":10, "integer_2":4}, {"boolean":0.5, "integer":0.5}, -100)
+    >>> evaluator.calc_offer_utilities([[0, 1], [1, 0]])
+    array([7., 0.])
+    """
+
+    def __init__(self, neg_space: NegSpace,
+                 utilities: AtomicDict,
+                 issue_weights: Dict[str, float],
+                 non_agreement_cost: float):
+        super().__init__(utilities, issue_weights, non_agreement_cost)
+        self.neg_space = {issue: list(map(str, values))
+                          for issue, values in neg_space.items()}
+        self.schema = OfferSchema.from_neg_space(self.neg_space)
+        self.issues = list(self.schema.issues)
+        self._issue_range = np.arange(len(self.issues))
+        self.utility_matrix = np.zeros((0, 0))
+        self._value_utils: Dict[str, Dict[str, float]] = {}
+        self._index_utils: List[List[float]] = []
+        self.compile()
+
+    def compile(self) -> None:
+        """
+        (Re)builds the utility matrix from the current utilities and issue weights.
+        This is called automatically whenever the utilities change.
+        """
+        width = max([len(values) for values in self.neg_space.values()], default=0)
+        self.utility_matrix = np.zeros((len(self.issues), width))
+        self._value_utils = {}
+        self._index_utils = []
+        for i, issue in enumerate(self.issues):
+            self._value_utils[issue] = {}
+            self._index_utils.append([])
+            for j, value in enumerate(self.neg_space[issue]):
+                util = super().calc_assignment_util(issue, value)
+                self.utility_matrix[i, j] = util
+                self._value_utils[issue][value] = util
+                self._index_utils[i].append(util)
+
+    def add_utilities(self, new_utils: AtomicDict) -> bool:
+        super().add_utilities(new_utils)
+        self.compile()
+        return True
+
+    def set_utilities(self, new_utils: AtomicDict) -> bool:
+        super().set_utilities(new_utils)
+        self.compile()
+        return True
+
+    def calc_assignment_util(self, issue: str, value: str) -> float:
+        if issue in self._value_utils and value in self._value_utils[issue]:
+            return self._value_utils[issue][value]
+
+        return super().calc_assignment_util(issue, value)
+
+    def calc_offer_utility(self, offer: Offer) -> float:
+        score = 0.0
+        if isinstance(offer, CompactOffer) and offer.schema is self.schema:
+            for issue_utils, index in zip(self._index_utils, offer.indices):
+                score += issue_utils[index]
+            return score
+
+        value_utils = self._value_utils
+        for issue in offer.get_issues():
+            chosen_value = offer.get_chosen_value(issue)
+            try:
+                score += value_utils[issue][chosen_value]
+            except KeyError:
+                # not part of the negotiation space we compiled, so look it up the slow way
+                score += super().calc_assignment_util(issue, chosen_value)
+        return score
+
+    def index_offer(self, offer: Offer) -> np.ndarray:
+        """
+        Converts an offer into the vector of value indices that
+        :func:`calc_offer_utilities` expects.
+
+        :param offer: The offer to convert
+        :type offer: Offer
+        :raises KeyError: if the offer chooses a value that is not in the negotiation space
+        :return: an integer array with the index of the chosen value for every issue
+        :rtype: np.ndarray
+        """
+        return np.array(self.schema.compact(offer).indices, dtype=np.intp)
+
+    def index_offers(self, offers: Iterable[Offer]) -> np.ndarray:
+        """
+        Converts multiple offers into an (N x issues) index array.
+        see :func:`index_offer`
+
+        :param offers: The offers to convert
+        :type offers: Iterable[Offer]
+        :return: an integer array with one row per offer
+        :rtype: np.ndarray
+        """
+        rows = [self.index_offer(offer) for offer in offers]
+        if not rows:
+            return np.zeros((0, len(self.issues)), dtype=np.intp)
+        return np.stack(rows)
+
+    def calc_offer_utilities(self, batch) -> np.ndarray:
+        """
+        Calculates the utility of a batch of offers at once. The batch should be an integer
+        array of shape (N x issues) where entry (k,i) is the index of the value that offer k
+        chooses for issue i in the negotiation space. A single vector is treated as a batch
+        of one.
+
+        :param batch: The value indices of the offers to evaluate
+        :type batch: array_like
+        :return: An array of length N containing the utility of each offer.
+        :rtype: np.ndarray
+        """
+        batch = np.asarray(batch, dtype=np.intp)
+        if batch.ndim == 1:
+            batch = batch.reshape(1, -1)
+        return self.utility_matrix[self._issue_range, batch].sum(axis=1)
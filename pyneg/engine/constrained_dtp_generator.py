@@ -5,10 +5,11 @@ This module defines :class:`ConstrainedDTPGenerator` which is the constraint awa
 
 from typing import Optional, Set, List
 
-from pyneg.comms import AtomicConstraint
+from pyneg.comms import AtomicConstraint, ConstraintIndex
 from pyneg.comms import Offer
 from pyneg.types import NegSpace, AtomicDict
 from pyneg.utils import atom_from_issue_value
+from .constraint_discovery import discover_constraints
 from .constrained_problog_evaluator import ConstrainedProblogEvaluator
 from .dtp_generator import DTPGenerator
 
@@ -27,30 +28,28 @@ class ConstrainedDTPGenerator(DTPGenerator):
                  kb: List[str],
                  constr_value: float,
                  initial_constraints: Optional[Set[AtomicConstraint]],
-                 auto_constraints=True):
+                 auto_constraints=True,
+                 max_extensions: Optional[int] = None):
         self.constr_value = constr_value
         self.evaluator = ConstrainedProblogEvaluator(
             neg_space, utilities, non_agreement_cost, kb, constr_value, set())
         self.constr_value = constr_value
-        self.constraints: Set[AtomicConstraint] = set([])
-        if initial_constraints:
-            self.constraints.update(initial_constraints)
+        self.constraints = ConstraintIndex(initial_constraints or ())
         self.auto_constraints = auto_constraints
-        super().__init__(neg_space, utilities, non_agreement_cost, acceptance_threshold, kb)
-        self._index_max_utilities()
+        super().__init__(neg_space, utilities, non_agreement_cost, acceptance_threshold, kb,
+                         max_extensions)
         self.constraints_satisfiable = True
         if self.auto_constraints:
             self.add_constraints(self.discover_constraints())
 
     def reset_generator(self):
         super().reset_generator()
-        self.constraints = set()
-        self._index_max_utilities()
+        self.constraints = ConstraintIndex()
 
     def add_constraint(self, constraint: AtomicConstraint) -> bool:
         self.constraints.add(constraint)
         self.evaluator.add_constraint(constraint)
-        self._index_max_utilities()
+        self.clear_compiled_model()
         if not self.get_unconstrained_values_by_issue(constraint.issue):
             self.constraints_satisfiable = False
             return False
@@ -60,7 +59,7 @@ class ConstrainedDTPGenerator(DTPGenerator):
     def add_constraints(self, new_constraints: Set[AtomicConstraint]) -> bool:
         self.constraints.update(new_constraints)
         self.evaluator.add_constraints(self.constraints)
-        self._index_max_utilities()
+        self.clear_compiled_model()
         for issue in self.neg_space.keys():
             if not self.get_unconstrained_values_by_issue(issue):
                 self.constraints_satisfiable = False
@@ -77,11 +76,7 @@ class ConstrainedDTPGenerator(DTPGenerator):
         :return: True iff the given offer satisfies all known constraints.
         :rtype: bool
         """
-        for constr in self.constraints:
-            if not constr.is_satisfied_by_offer(offer):
-                return False
-
-        return True
+        return self.constraints.is_satisfied_by_offer(offer)
 
     # def _add_utilities(self, new_utils):
     #     super().add_utilities(new_utils)
@@ -91,6 +86,7 @@ class ConstrainedDTPGenerator(DTPGenerator):
             **self.utilities,
             **new_utils
         }
+        self.clear_compiled_model()
 
         if self.auto_constraints:
             self.add_constraints(self.discover_constraints())
@@ -99,6 +95,7 @@ class ConstrainedDTPGenerator(DTPGenerator):
 
     def set_utilities(self, new_utils: AtomicDict) -> bool:
         self.utilities = new_utils
+        self.clear_compiled_model()
         if self.auto_constraints:
             self.add_constraints(self.discover_constraints())
 
@@ -140,38 +137,14 @@ class ConstrainedDTPGenerator(DTPGenerator):
         :return: A set containing all the newly discovered constraints.
         :rtype: Set[AtomicConstraint]
         """
-        new_constraints = set()
-        for issue in self.neg_space.keys():
-            best_case = sum(
-                [bc for i, bc in self.max_utility_by_issue.items() if i != issue])
-
-            for value in self.neg_space[issue]:
-                atom = atom_from_issue_value(issue, value)
-                if atom in self.utilities.keys():
-                    value_util = self.utilities[atom]
-                else:
-                    value_util = 0
-
-                if best_case + value_util < self.acceptability_threshold:
-                    new_constraints.add(AtomicConstraint(issue, value))
-
-        return new_constraints
+        return discover_constraints(self.neg_space, self.utilities, self.constraints,
+                                    self.acceptability_threshold)
 
     def get_unconstrained_values_by_issue(self, issue: str):
-        issue_constrained_values = set(
-            constr.value for constr in self.constraints if constr.issue == issue)
-        issue_unconstrained_values = set(
-            self.neg_space[issue]) - issue_constrained_values
-        return issue_unconstrained_values
+        return self.constraints.get_unconstrained_values(issue, self.neg_space[issue])
 
     def find_violated_constraint(self, offer: Offer) -> Optional[AtomicConstraint]:
-        for constr in self.constraints:
-            for issue in offer.get_issues():
-                chosen_value = offer.get_chosen_value(issue)
-                if not constr.is_satisfied_by_assignment(issue, chosen_value):
-                    return AtomicConstraint(issue, chosen_value)
-
-        return None
+        return self.constraints.find_violated_constraint(offer)
 
     def generate_offer(self) -> Offer:
         if not self.constraints_satisfiable:
@@ -186,26 +159,5 @@ class ConstrainedDTPGenerator(DTPGenerator):
             raise RuntimeError()
         return offer
 
-    def _index_max_utilities(self):
-        """
-        Index the currently known utilities so we can use this as a heuristic during
-        the constraint discovery process. See :ref:`constraint-discovery` for more information.
-        """
-        self.max_utility_by_issue = {
-            issue: 0 for issue in self.neg_space.keys()}
-        for issue in self.neg_space.keys():
-            unconstrained_values = self.get_unconstrained_values_by_issue(
-                issue)
-            if not unconstrained_values:
-                self.constraints_satisfiable = False
-                return
-
-            max_issue_util = -(2 ** 31)
-            for value in self.neg_space[issue]:
-                util = self.evaluator.calc_assignment_util(issue, value)
-                if util > max_issue_util:
-                    max_issue_util = util
-                    self.max_utility_by_issue[issue] = max_issue_util
-
     def get_constraints(self):
         return self.constraints
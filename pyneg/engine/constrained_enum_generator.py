@@ -2,24 +2,32 @@
 Defines the :class:`ConstrainedEnumGenerator` class, the contraint aware version of
 :class:`EnumGenerator` see that entry for more information.
 """
-from copy import deepcopy
-from typing import Dict, Optional, Set, Union
-from uuid import uuid4
+from heapq import heappop
+from typing import Dict, List, Optional, Set, Tuple, Union
 
-from pyneg.comms import AtomicConstraint, Offer
+from pyneg.comms import AtomicConstraint, ConstraintIndex, Offer, OfferSchema
 from pyneg.types import AtomicDict, NegSpace
 from pyneg.utils import atom_from_issue_value
 
 from . import Strategy
-from .enum_generator import EnumGenerator
+from .constraint_discovery import discover_constraints
 from .evaluator import Evaluator
+from .heap_enum_generator import HeapEnumGenerator
 
 
-class ConstrainedEnumGenerator(EnumGenerator):
+class ConstrainedEnumGenerator(HeapEnumGenerator):
     """
         This class is equal to the :class:`EnumGenerator` class but with
         additional logic to handle constraints. See :class:`EnumGenerator` for
         more information on how the offers are generated.
+
+        The search itself is that of :class:`HeapEnumGenerator`. Constraints that arrive
+        during the negotiation don't restart it. Instead the ranks of the constrained values
+        are marked as forbidden, successors skip over them, and assignments on the frontier
+        that contain a forbidden rank are repaired when they come up, by moving them to the
+        next allowed value of every constrained issue. Within one search every offer is
+        generated at most once. Adding or setting utilities changes the order of the
+        values, so the search is started over and offers may be proposed again.
     """
     def __init__(self, neg_space: NegSpace,
                  utilities: AtomicDict,
@@ -30,11 +38,12 @@ class ConstrainedEnumGenerator(EnumGenerator):
                  auto_constraints=True) -> None:
         self.constr_value = constr_value
         self.acceptance_threshold = acceptance_threshold
-        self.constraints: Set[AtomicConstraint] = set()
+        self.constraints = ConstraintIndex(schema=OfferSchema.from_neg_space(neg_space))
         self.constraints_satisfiable = True
         self.max_util = 0.0
+        self._forbidden_ranks: List[Set[int]] = []
+        self._value_ranks: List[Dict[int, int]] = []
         super().__init__(neg_space, utilities, evaluator, acceptance_threshold)
-        self.init_generator()
         self.auto_constraints = auto_constraints
         self.max_utility_by_issue: Dict[str, int] = {}
         self._index_max_utilities()
@@ -43,13 +52,30 @@ class ConstrainedEnumGenerator(EnumGenerator):
         if self.auto_constraints:
             self.add_constraints(self.discover_constraints())
 
+    def init_generator(self) -> None:
+        """
+        Sets up the search like :func:`HeapEnumGenerator.init_generator` but starts from
+        the best offer that satisfies all known constraints.
+        """
+        super().init_generator()
+        self._frontier = []
+        self._visited = set()
+        self._forbidden_ranks = [set() for _ in self.schema.issues]
+        self._value_ranks = [{j: rank for rank, j in enumerate(ranked)}
+                             for ranked in self._ranked_indices]
+        for constraint in self.constraints:
+            self._forbid(constraint)
+
+        self.active = False
+        self._repair(tuple(0 for _ in self.schema.issues))
+
     def add_constraint(self, constraint: AtomicConstraint) -> bool:
         self.constraints.add(constraint)
         self.evaluator.add_constraint(constraint)
         self._add_utilities({atom_from_issue_value(constraint.issue, constraint.value):
                              self.constr_value})
+        self._forbid(constraint)
         self._index_max_utilities()
-        self.init_generator()
         return self.constraints_satisfiable
 
     def add_constraints(self, new_constraints: Set[AtomicConstraint]) -> bool:
@@ -57,10 +83,88 @@ class ConstrainedEnumGenerator(EnumGenerator):
         self.evaluator.add_constraints(new_constraints)
         self._add_utilities({atom_from_issue_value(constr.issue, constr.value): self.constr_value
                              for constr in new_constraints})
+        for constraint in new_constraints:
+            self._forbid(constraint)
         self._index_max_utilities()
-        self.init_generator()
         return self.constraints_satisfiable
 
+    def _forbid(self, constraint: AtomicConstraint) -> None:
+        """
+        Marks the rank of the constrained value as forbidden and removes the value
+        from the sorted values of it's issue.
+
+        :param constraint: The constraint to apply
+        :type constraint: AtomicConstraint
+        """
+        i = self.schema.issue_indices.get(constraint.issue)
+        if i is None:
+            return
+
+        j = self.schema.value_indices[i].get(constraint.value)
+        if j is None or self._value_ranks[i][j] in self._forbidden_ranks[i]:
+            return
+
+        self._forbidden_ranks[i].add(self._value_ranks[i][j])
+        self.sorted_utils[constraint.issue].remove(constraint.value)
+
+    def _next_allowed_rank(self, issue: int, rank: int) -> Optional[int]:
+        """
+        Returns the first rank of the issue from `rank` onward that isn't forbidden.
+        """
+        forbidden = self._forbidden_ranks[issue]
+        num_values = len(self._ranked_indices[issue])
+        while rank < num_values and rank in forbidden:
+            rank += 1
+        return rank if rank < num_values else None
+
+    def _repair(self, ranks: Tuple[int, ...]) -> None:
+        """
+        Moves every forbidden rank of the assignment to the next allowed one and puts
+        the result on the frontier if it is acceptable and hasn't been seen before.
+        Every allowed assignment that could be reached from the original one
+        can be reached from the repaired one, so nothing is skipped.
+
+        :param ranks: The ranks of the assignment to repair
+        :type ranks: Tuple[int, ...]
+        """
+        repaired = []
+        for i, rank in enumerate(ranks):
+            allowed_rank = self._next_allowed_rank(i, rank)
+            if allowed_rank is None:
+                return
+            repaired.append(allowed_rank)
+
+        key = sum(rank * stride for rank, stride in zip(repaired, self._strides))
+        if key in self._visited:
+            return
+
+        util = sum(scores[rank] for scores, rank in zip(self._sorted_scores, repaired))
+        if util >= self.acceptability_threshold:
+            self._push(util, key, tuple(repaired))
+            self.active = True
+
+    def _expand_ranks(self, util: float, key: int, ranks: Tuple[int, ...]) -> None:
+        """
+        see :func:`HeapEnumGenerator._expand_ranks`, but successors skip forbidden ranks.
+        """
+        for i, rank in enumerate(ranks):
+            child_rank = self._next_allowed_rank(i, rank + 1)
+            if child_rank is None:
+                continue
+
+            child_key = key + (child_rank - rank) * self._strides[i]
+            if child_key in self._visited:
+                continue
+
+            scores = self._sorted_scores[i]
+            child_util = util + scores[child_rank] - scores[rank]
+            if child_util >= self.acceptability_threshold:
+                self._push(child_util, child_key, ranks[:i] + (child_rank,) + ranks[i + 1:])
+
+    def _is_allowed(self, ranks: Tuple[int, ...]) -> bool:
+        return not any(rank in forbidden
+                       for rank, forbidden in zip(ranks, self._forbidden_ranks))
+
     #for internal use only, doest the same as the other one but never generates extra constraintes
     def _add_utilities(self, new_utils: AtomicDict) -> None:
         self.utilities = {
@@ -79,18 +183,12 @@ class ConstrainedEnumGenerator(EnumGenerator):
         :rtype: bool
         """
         if isinstance(to_check, Offer):
-            for constr in self.constraints:
-                if not constr.is_satisfied_by_offer(to_check):
-                    return False
-        elif isinstance(to_check, Strategy):
-            for constr in self.constraints:
-                if not constr.is_satisfied_by_strat(to_check):
-                    return False
-        else:
-            raise TypeError(f"""object is of type {type(to_check)} instead of
-                                Union[Offer, Strategy]. Object: {to_check}""")
-
-        return True
+            return self.constraints.is_satisfied_by_offer(to_check)
+        if isinstance(to_check, Strategy):
+            return self.constraints.is_satisfied_by_strat(to_check)
+
+        raise TypeError(f"""object is of type {type(to_check)} instead of
+                            Union[Offer, Strategy]. Object: {to_check}""")
 
     def _index_max_utilities(self):
         """
@@ -100,26 +198,21 @@ class ConstrainedEnumGenerator(EnumGenerator):
         self.max_utility_by_issue = {
             issue: 0 for issue in self.neg_space.keys()}
         for issue in self.neg_space.keys():
-            if self.sorted_utils[issue]:
-                unconstrained_values = self.get_unconstrained_values_by_issue(
-                    issue)
-                if not unconstrained_values:
-                    self.constraints_satisfiable = False
-                    return
-
-                best_val = self.sorted_utils[issue][0]
-                best_val_atom = atom_from_issue_value(
-                    issue, best_val)
-                if best_val in unconstrained_values and best_val_atom in self.utilities.keys():
-                    self.max_utility_by_issue[issue] = self.utilities[best_val_atom]
+            if not self.neg_space[issue]:
+                continue
+
+            # constrained values have already been removed from the sorted values
+            if not self.sorted_utils[issue]:
+                self.constraints_satisfiable = False
+                return
+
+            best_val_atom = atom_from_issue_value(issue, self.sorted_utils[issue][0])
+            if best_val_atom in self.utilities.keys():
+                self.max_utility_by_issue[issue] = self.utilities[best_val_atom]
         self.max_util = sum(self.max_utility_by_issue.values())
 
     def get_unconstrained_values_by_issue(self, issue):
-        issue_constrained_values = set(
-            constr.value for constr in self.constraints if constr.issue == issue)
-        issue_unconstrained_values = set(
-            self.neg_space[issue]) - issue_constrained_values
-        return issue_unconstrained_values
+        return self.constraints.get_unconstrained_values(issue, self.neg_space[issue])
 
     def add_utilities(self, new_utils: AtomicDict) -> bool:
         super().add_utilities(new_utils)
@@ -136,38 +229,29 @@ class ConstrainedEnumGenerator(EnumGenerator):
 
         return self.constraints_satisfiable
 
-    def expand_assignment(self, sorted_offer_indices):
-        """
-        see :func:`pyneg.engine.EnumGenerator._expand_assignement`
-        """
-        for issue in self.neg_space.keys():
-            copied_offer_indices = deepcopy(sorted_offer_indices)
-            if copied_offer_indices[issue] + 1 >= len(self.sorted_utils[issue]):
-                continue
-            copied_offer_indices[issue] += 1
-            offer = self._offer_from_index_dict(copied_offer_indices)
-            util = self.evaluator.calc_offer_utility(offer)
-            if self._offer_from_index_dict(copied_offer_indices) not in self.generated_offers:
-                # might seem stratge but if we hit a constraint
-                # we still need to keep searching in this direction
-                if util >= self.acceptability_threshold and self.satisfies_all_constraints(offer):
-                    self.assignement_frontier.put(
-                        (-util, str(uuid4())[-8:], copied_offer_indices))
-                    self.generated_offers.add(
-                        self._offer_from_index_dict(copied_offer_indices))
-
     def generate_offer(self) -> Offer:
-        if self.assignement_frontier.empty() or not self.constraints_satisfiable:
+        if not self.constraints_satisfiable:
             self.active = False
             raise StopIteration()
 
-        _, _, indices = self.assignement_frontier.get()
-        self.expand_assignment(indices)
-        offer = self._offer_from_index_dict(indices)
-        if self.satisfies_all_constraints(offer):
-            return offer
+        while self._frontier:
+            # only acceptable assignments are put on the frontier
+            negative_util, _, key, ranks = heappop(self._frontier)
+            if not self._is_allowed(ranks):
+                # this assignment was found before the constraint that rules it out
+                self._repair(ranks)
+                continue
+
+            self.offer_counter += 1
+            self._expand_ranks(-negative_util, key, ranks)
+            offer = self._offer_from_ranks(ranks)
+            if self.satisfies_all_constraints(offer):
+                return offer
+
+            raise ValueError("generated violating offer")
 
-        raise ValueError("generated violating offer")
+        self.active = False
+        raise StopIteration()
 
     def accepts(self, offer: Offer) -> bool:
         util = self.evaluator.calc_offer_utility(offer)
@@ -181,31 +265,11 @@ class ConstrainedEnumGenerator(EnumGenerator):
         :return: A set containing all the newly discovered constraints.
         :rtype: Set[AtomicConstraint]
         """
-        new_constraints = set()
-        for issue in self.neg_space.keys():
-            best_case = sum(
-                [bc for i, bc in self.max_utility_by_issue.items() if i != issue])
-
-            for value in self.neg_space[issue]:
-                atom = atom_from_issue_value(issue, value)
-                if atom in self.utilities.keys():
-                    value_util = self.utilities[atom]
-                else:
-                    value_util = 0
-
-                if best_case + value_util < self.acceptance_threshold:
-                    new_constraints.add(AtomicConstraint(issue, value))
-
-        return new_constraints
+        return discover_constraints(self.neg_space, self.utilities, self.constraints,
+                                    self.acceptance_threshold)
 
     def find_violated_constraint(self, offer: Offer) -> Optional[AtomicConstraint]:
-        for constr in self.constraints:
-            for issue in offer.get_issues():
-                chosen_value = offer.get_chosen_value(issue)
-                if not constr.is_satisfied_by_assignment(issue, chosen_value):
-                    return AtomicConstraint(issue, chosen_value)
-
-        return None
+        return self.constraints.find_violated_constraint(offer)
 
     def get_constraints(self):
         return self.constraints
@@ -5,7 +5,7 @@ Defines the :class:`ConstrainedLinearEvaluator` class, the contraint aware versi
 
 from typing import Dict, Set, Union
 
-from pyneg.comms import Offer, AtomicConstraint
+from pyneg.comms import AtomicConstraint, ConstraintIndex, Offer
 from pyneg.types import AtomicDict
 from pyneg.engine.linear_evaluator import LinearEvaluator, Strategy
 
@@ -23,9 +23,7 @@ class ConstrainedLinearEvaluator(LinearEvaluator):
                  initial_constraints: Set[AtomicConstraint]):
         self.constr_value = constr_value
         super().__init__(utilities, issue_weights, non_agreement_cost)
-        self.constraints: Set[AtomicConstraint] = set()
-        if initial_constraints:
-            self.constraints.update(initial_constraints)
+        self.constraints = ConstraintIndex(initial_constraints or ())
 
 
 
@@ -38,8 +36,7 @@ class ConstrainedLinearEvaluator(LinearEvaluator):
         return True
 
     def calc_assignment_util(self, issue: str, value: str) -> float:
-        if not all([constr.is_satisfied_by_assignment(issue, value)
-                    for constr in self.constraints]):
+        if not self.constraints.is_satisfied_by_assignment(issue, value):
             return self.constr_value
 
         return super().calc_assignment_util(issue, value)
@@ -67,15 +64,9 @@ class ConstrainedLinearEvaluator(LinearEvaluator):
         :rtype: bool
         """
         if isinstance(to_check, Offer):
-            for constr in self.constraints:
-                if not constr.is_satisfied_by_offer(to_check):
-                    return False
-        elif isinstance(to_check, Strategy):
-            for constr in self.constraints:
-                if not constr.is_satisfied_by_strat(to_check):
-                    return False
-        else:
-            raise TypeError(f"""object is of type {type(to_check)} instead of
-                                Union[Offer, Strategy]. Object: {to_check}""")
+            return self.constraints.is_satisfied_by_offer(to_check)
+        if isinstance(to_check, Strategy):
+            return self.constraints.is_satisfied_by_strat(to_check)
 
-        return True
+        raise TypeError(f"""object is of type {type(to_check)} instead of
+                            Union[Offer, Strategy]. Object: {to_check}""")
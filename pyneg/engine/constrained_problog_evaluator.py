@@ -4,7 +4,7 @@ Defines the :class:`ConstrainedProblogEvaluator` class, the contraint aware vers
 """
 from typing import Optional, List, Set, Iterable, Union
 
-from pyneg.comms import Offer, AtomicConstraint
+from pyneg.comms import AtomicConstraint, ConstraintIndex, Offer
 from pyneg.types import AtomicDict, NegSpace
 from pyneg.utils import atom_from_issue_value
 from .problog_evaluator import ProblogEvaluator
@@ -26,10 +26,8 @@ class ConstrainedProblogEvaluator(ProblogEvaluator):
                  initial_constraints: Optional[Set[AtomicConstraint]]):
         self.constr_value = constr_value
         super().__init__(neg_space, utilities, non_agreement_cost, knowledge_base)
-        self.constraints: Set[AtomicConstraint] = set()
+        self.constraints = ConstraintIndex(initial_constraints or ())
         self.constraints_satisfiable = True
-        if initial_constraints:
-            self.constraints.update(initial_constraints)
 
     def calc_offer_utility(self, offer: Offer) -> float:
         if not self.satisfies_all_constraints(offer):
@@ -54,18 +52,12 @@ class ConstrainedProblogEvaluator(ProblogEvaluator):
         :rtype: bool
         """
         if isinstance(to_check, Offer):
-            for constr in self.constraints:
-                if not constr.is_satisfied_by_offer(to_check):
-                    return False
-        elif isinstance(to_check, Strategy):
-            for constr in self.constraints:
-                if not constr.is_satisfied_by_strat(to_check):
-                    return False
-        else:
-            raise TypeError(f"""object is of type {type(to_check)} instead of
-                                Union[Offer, Strategy]. Object: {to_check}""")
+            return self.constraints.is_satisfied_by_offer(to_check)
+        if isinstance(to_check, Strategy):
+            return self.constraints.is_satisfied_by_strat(to_check)
 
-        return True
+        raise TypeError(f"""object is of type {type(to_check)} instead of
+                            Union[Offer, Strategy]. Object: {to_check}""")
 
     def add_constraint(self, constraint: AtomicConstraint) -> bool:
         self.constraints.add(constraint)
@@ -106,11 +98,7 @@ class ConstrainedProblogEvaluator(ProblogEvaluator):
         :return: A set containt all values of an issue that are not constrained
         :rtype: Set[AtomicConstraint]
         """
-        issue_constrained_values = set(
-            constr.value for constr in self.constraints if constr.issue == issue)
-        issue_unconstrained_values = set(
-            self.neg_space[issue]) - issue_constrained_values
-        return issue_unconstrained_values
+        return self.constraints.get_unconstrained_values(issue, self.neg_space[issue])
 
     def set_utilities(self, new_utils: AtomicDict) -> bool:
         self.utilities = new_utils
@@ -118,8 +106,7 @@ class ConstrainedProblogEvaluator(ProblogEvaluator):
         return self.constraints_satisfiable
 
     def calc_assignment_util(self, issue: str, value: str) -> float:
-        for constr in self.constraints:
-            if not constr.is_satisfied_by_assignment(issue, value):
-                return self.non_agreement_cost
+        if not self.constraints.is_satisfied_by_assignment(issue, value):
+            return self.non_agreement_cost
 
         return super().calc_assignment_util(issue, value)
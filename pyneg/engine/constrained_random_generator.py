@@ -6,10 +6,10 @@ from typing import Optional, Set, List, Union, TYPE_CHECKING
 
 from numpy import isclose
 from pyneg.engine import Strategy # pylint: disable=ungrouped-imports
-from pyneg.comms import AtomicConstraint, Offer
+from pyneg.comms import AtomicConstraint, ConstraintIndex, Offer
 from pyneg.types import NegSpace, AtomicDict
-from pyneg.utils import atom_from_issue_value
 from pyneg.engine import Evaluator, RandomGenerator
+from .constraint_discovery import discover_constraints
 
 
 class ConstrainedRandomGenerator(RandomGenerator):
@@ -31,16 +31,15 @@ class ConstrainedRandomGenerator(RandomGenerator):
                  auto_constraints=True,
                  max_generation_tries: int = 500):
         self.constr_value = constr_value
-        self.constraints: Set[AtomicConstraint] = set()
         super().__init__(neg_space, utilities, evaluator,
                          non_agreement_cost, kb, acceptability_threshold,
                          max_rounds, max_generation_tries=max_generation_tries)
+        self.constraints = ConstraintIndex(schema=self.schema)
 
         self.auto_constraints = auto_constraints
         self.constraints_satisfiable = True
         if initial_constraints:
             self.add_constraints(initial_constraints)
-        self._index_max_utilities()
         if self.auto_constraints:
             self.add_constraints(self.discover_constraints())
 
@@ -49,6 +48,7 @@ class ConstrainedRandomGenerator(RandomGenerator):
             **self.utilities,
             **new_utils
         }
+        self.clear_samples()
         self.evaluator.add_utilities(new_utils)
 
         if self.auto_constraints:
@@ -59,6 +59,7 @@ class ConstrainedRandomGenerator(RandomGenerator):
 
     def set_utilities(self, new_utils: AtomicDict) -> bool:
         self.utilities = new_utils
+        self.clear_samples()
         if self.auto_constraints:
             self.add_constraints(self.discover_constraints())
         self.evaluator.add_utilities(new_utils)
@@ -96,29 +97,11 @@ class ConstrainedRandomGenerator(RandomGenerator):
         :return: A set containing all the newly discovered constraints.
         :rtype: Set[AtomicConstraint]
         """
-        new_constraints = set()
-        for issue in self.neg_space.keys():
-            best_case = sum(
-                [bc for i, bc in self.max_utility_by_issue.items() if i != issue])
-
-            for value in self.neg_space[issue]:
-                atom = atom_from_issue_value(issue, value)
-                if atom in self.utilities.keys():
-                    value_util = self.utilities[atom]
-                else:
-                    value_util = 0
-
-                if best_case + value_util < self.acceptability_threshold:
-                    new_constraints.add(AtomicConstraint(issue, value))
-
-        return new_constraints
+        return discover_constraints(self.neg_space, self.utilities, self.constraints,
+                                    self.acceptability_threshold)
 
     def get_unconstrained_values_by_issue(self, issue):
-        issue_constrained_values = set(
-            constr.value for constr in self.constraints if constr.issue == issue)
-        issue_unconstrained_values = set(
-            self.neg_space[issue]) - issue_constrained_values
-        return issue_unconstrained_values
+        return self.constraints.get_unconstrained_values(issue, self.neg_space[issue])
 
     def satisfies_all_constraints(self, to_check: Union[Offer, Strategy]) -> bool:
         """
@@ -131,33 +114,12 @@ class ConstrainedRandomGenerator(RandomGenerator):
         :rtype: bool
         """
         if isinstance(to_check, Offer):
-            for constr in self.constraints:
-                if not constr.is_satisfied_by_offer(to_check):
-                    return False
-        elif isinstance(to_check, Strategy):
-            for constr in self.constraints:
-                if not constr.is_satisfied_by_strat(to_check):
-                    return False
-        else:
-            raise TypeError(f"""object is of type {type(to_check)} instead of
-                                Union[Offer, Strategy]. Object: {to_check}""")
-
-        return True
+            return self.constraints.is_satisfied_by_offer(to_check)
+        if isinstance(to_check, Strategy):
+            return self.constraints.is_satisfied_by_strat(to_check)
 
-    def _index_max_utilities(self):
-        """
-        Index the currently known utilities so we can use this as a heuristic during
-        the constraint discovery process. See :ref:`constraint-discovery` for more information.
-        """
-        self.max_utility_by_issue = {
-            issue: 0 for issue in self.neg_space.keys()}
-        for issue in self.neg_space.keys():
-            max_issue_util = -(2 ** 31)
-            for value in self.neg_space[issue]:
-                util = self.evaluator.calc_assignment_util(issue, value)
-                if util > max_issue_util:
-                    max_issue_util = util
-                    self.max_utility_by_issue[issue] = max_issue_util
+        raise TypeError(f"""object is of type {type(to_check)} instead of
+                            Union[Offer, Strategy]. Object: {to_check}""")
 
     def make_strat_constraint_compliant(self) -> bool:
         """
@@ -167,8 +129,8 @@ class ConstrainedRandomGenerator(RandomGenerator):
         :return: Whether the process has succeeded. If False, no sollutions are possible.
         :rtype: bool
         """
-        for constr in self.constraints:
-            issue = constr.issue
+        self.clear_samples()
+        for issue in self.constraints.get_constrained_issues():
             unconstrained_values = self.get_unconstrained_values_by_issue(
                 issue)
             if not unconstrained_values:
@@ -177,8 +139,8 @@ class ConstrainedRandomGenerator(RandomGenerator):
                 # the next message so we won't need to update the strat
                 return False
 
-            for value in self.neg_space[issue]:
-                if not constr.is_satisfied_by_assignment(issue, value):
+            for value in self.constraints.get_constrained_values(issue):
+                if value in self.strategy.get_value_dist(issue):
                     self.strategy.set_prob(issue, value, 0)
 
             # it's possible we just made the last value in the strategy 0 so
@@ -194,13 +156,7 @@ class ConstrainedRandomGenerator(RandomGenerator):
         return True
 
     def find_violated_constraint(self, offer: Offer) -> Optional[AtomicConstraint]:
-        for constr in self.constraints:
-            for issue in offer.get_issues():
-                chosen_value = offer.get_chosen_value(issue)
-                if not constr.is_satisfied_by_assignment(issue, chosen_value):
-                    return AtomicConstraint(issue, chosen_value)
-
-        return None
+        return self.constraints.find_violated_constraint(offer)
 
     def get_constraints(self):
         return self.constraints
@@ -0,0 +1,76 @@
+"""
+Defines :func:`discover_constraints`, the constraint discovery routine shared by the
+constraint aware generators. See :ref:`constraint-discovery` for more information.
+"""
+
+from typing import List, Set
+
+import numpy as np
+
+from pyneg.comms import AtomicConstraint, ConstraintIndex
+from pyneg.types import AtomicDict, NegSpace
+from pyneg.utils import atom_from_issue_value
+
+
+def discover_constraints(neg_space: NegSpace,
+                         utilities: AtomicDict,
+                         constraints: ConstraintIndex,
+                         threshold: float) -> Set[AtomicConstraint]:
+    """
+    Deduces which values can't be part of any acceptable offer. A value is ruled out if
+    even the best case for all other issues, i.e. choosing the best value that isn't
+    constrained yet for every one of them, can't make up for it's utility.
+    Values without a utility count as 0.
+
+    The utilities are put in an (issues x values) matrix so that the best case of every
+    issue is the best case of all issues minus the best value of the issue itself,
+    and all values are checked in a single comparison. Ruling out values can lower the
+    best case of their issue, so this is repeated until no more values are ruled out
+    or some issue has no values left, in which case no offer is acceptable.
+
+    >>> neg_space = {"First": ["A", "B"], "Second": ["C", "D"]}
+    >>> utilities = {"First_A": 10, "First_B": 0, "Second_C": 5, "Second_D": 1}
+    >>> sorted(map(str, discover_constraints(neg_space, utilities, ConstraintIndex(), 12)))
+    ['First!=B', 'Second!=D']
+
+    :param neg_space: The negotiation space to find constraints in
+    :type neg_space: NegSpace
+    :param utilities: The utilities of the issue value assignments
+    :type utilities: AtomicDict
+    :param constraints: The constraints that are already known
+    :type constraints: ConstraintIndex
+    :param threshold: The utility an offer needs to be acceptable
+    :type threshold: float
+    :return: A set containing all the newly discovered constraints.
+    :rtype: Set[AtomicConstraint]
+    """
+    issues = [issue for issue, values in neg_space.items() if values]
+    values: List[List[str]] = [list(map(str, neg_space[issue])) for issue in issues]
+    if not issues:
+        return set()
+
+    width = max(map(len, values))
+    value_utils = np.full((len(issues), width), -np.inf)
+    allowed = np.zeros((len(issues), width), dtype=bool)
+    for i, (issue, issue_values) in enumerate(zip(issues, values)):
+        constrained = constraints.get_constrained_values(issue)
+        for j, value in enumerate(issue_values):
+            value_utils[i, j] = utilities.get(atom_from_issue_value(issue, value), 0)
+            allowed[i, j] = value not in constrained
+
+    newly_constrained = np.zeros_like(allowed)
+    while allowed.any(axis=1).all():
+        best_values = np.where(allowed, value_utils, -np.inf).max(axis=1)
+        best_cases = best_values.sum() - best_values
+        totals = value_utils + best_cases[:, np.newaxis]
+        # an offer that reaches the threshold exactly is still acceptable,
+        # so don't let the rounding of the subtraction above rule it out
+        ruled_out = allowed & (totals < threshold) & ~np.isclose(totals, threshold)
+        if not ruled_out.any():
+            break
+
+        newly_constrained |= ruled_out
+        allowed &= ~ruled_out
+
+    return {AtomicConstraint(issues[i], values[i][j])
+            for i, j in zip(*np.nonzero(newly_constrained))}
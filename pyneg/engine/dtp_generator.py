@@ -4,25 +4,23 @@ which uses DTProbLog to generate optimal offers in
 settings that include probabalistic knowledge bases.
 """
 
-from copy import deepcopy
+from itertools import islice, product
 from re import search
-from typing import TYPE_CHECKING, Dict, List, Optional, Set
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from numpy import isclose
+from problog import get_evaluatable
+from problog.engine import DefaultEngine
+from problog.logic import Term
 from problog.program import PrologString
-from problog.tasks.dtproblog import dtproblog
+from problog.tasks.dtproblog import evaluate, num2bits
 
-from pyneg.comms import AtomicConstraint, Offer
+from pyneg.comms import AtomicConstraint, Offer, OfferSchema
 from pyneg.types import AtomicDict, NegSpace
-from pyneg.utils import (atom_dict_from_nested_dict, atom_from_issue_value,
-                         nested_dict_from_atom_dict)
+from pyneg.utils import atom_from_issue_value, nested_dict_from_atom_dict
 
 from .generator import Generator
 
-# Help out MyPy a bit
-if TYPE_CHECKING:
-    from problog.logic import Term # pylint: disable=ungrouped-imports
-
 
 class DTPGenerator(Generator):
     """
@@ -31,6 +29,17 @@ class DTPGenerator(Generator):
     both atomic and compound and also using arbitrary knowledge bases.
     It does mean that it is very slow and prone to memory leaks due to the
     python implementation of DTProbLog
+
+    The model is only compiled and solved when it changes, i.e. when the utilities
+    change or the generator is reset. At that point every possible decision is scored
+    at once, in the same way as :func:`dtproblog` does to find the best one, and the
+    decisions are ranked from best to worst. Every round simply continues down that
+    ranking, skipping the offers that were already generated, so the time a round
+    takes doesn't grow with the length of the negotiation.
+
+    Decisions that leave some issues open are completed lazily, see
+    :func:`_extend_partial_offer`. At most `max_extensions` completions of a single
+    decision are proposed before moving on to the next one, if it is given.
     """
 
     def __init__(self,
@@ -38,12 +47,15 @@ class DTPGenerator(Generator):
                  utilities: AtomicDict,
                  non_agreement_cost: float,
                  acceptability_threshold: float,
-                 knowledge_base: List[str]):
+                 knowledge_base: List[str],
+                 max_extensions: Optional[int] = None):
         super().__init__()
         self.utilities = utilities
         self.knowledge_base = knowledge_base
         self.neg_space = {issue: list(map(str, values))
                           for issue, values in neg_space.items()}
+        self.schema = OfferSchema.from_neg_space(self.neg_space)
+        self.max_extensions = max_extensions
         self.non_agreement_cost = non_agreement_cost
         self.acceptability_threshold = acceptability_threshold
         self.reset_generator()
@@ -53,25 +65,41 @@ class DTPGenerator(Generator):
         Reset the internals of the generator so we can start anew for a new negotiaton.
         """
         self.generated_offers = {}
-        self.offer_queue = []
         self.active = True
+        self.clear_compiled_model()
+
+    def clear_compiled_model(self) -> None:
+        """
+        Forgets the compiled model and the ranking of the decisions, so they will be
+        recomputed when the next offer is generated. The generator does this itself
+        whenever the model changes, but it should be called when the knowledge base or
+        utilities are modified from the outside.
+        """
+        self._ranked_decisions: Optional[List[Tuple[float, Dict[Term, int]]]] = None
+        self._next_decision = 0
+        self._extensions: Iterator[Offer] = iter(())
+        self._extensions_score = 0.0
+        self._extensions_proposed = 0
 
     def add_utilities(self, new_utils: AtomicDict) -> bool:
         self.utilities = {
             **self.utilities,
             **new_utils
         }
+        self.clear_compiled_model()
 
         return True
 
     def set_utilities(self, new_utils: AtomicDict) -> bool:
         self.utilities = new_utils
+        self.clear_compiled_model()
         return True
 
     def _compile_dtproblog_model(self) -> str:
         """
         Takes the internal knowledge of the agent and complies it into a string representing
-        a valid DTProbLog model that it can use to generate the next offer.
+        a valid DTProbLog model that it can use to generate offers. Offers that were already
+        generated are not part of the model, see :func:`_rank_decisions`.
 
         :return: A string representing a valid DTProbLog model
         :rtype: str
@@ -89,28 +117,16 @@ class DTPGenerator(Generator):
         for utility, reward in self.utilities.items():
             utility_string += "utility({},{}).\n".format(utility, reward)
 
-        # we have to make sure we offset the utility of previously generated
-        # offers so dtproblog won't generate them again
-        offer_count = 0
-        for sparse_offer, util in self.generated_offers.items():
-            config_string = ",".join(
-                list(map(
-                    lambda x: atom_from_issue_value(x[0], x[1]),
-                    sparse_offer)))  + "."
-            utility_string += "offer{} :- {}\n".format(
-                offer_count, config_string)
-            utility_string += "utility(offer{},{}).\n".format(
-                offer_count, -util + self.non_agreement_cost)
-            offer_count += 1
-
         kb_string = "\n".join(self.knowledge_base) + "\n"
         return dtp_decision_vars + kb_string + utility_string
 
-    def _extend_partial_offer(self, partial_offer: Dict[str, float]) -> Set[Offer]:
+    def _extend_partial_offer(self, partial_offer: Dict[str, float],
+                              max_offers: Optional[int] = None) -> Iterator[Offer]:
         """
         When some decision variables have no impact on the final utility DTProbLog will
         generate partial answers. This function will expand those final offers into all of their
-        full options so we can propose them. e.g.
+        full options so we can propose them. The completions are generated lazily, by going
+        through the values of the undecided issues in order. e.g.
 
         >>> gen = DTPGenerator(
             neg_space = {"boolean":["True","False"], "dummy":["1","2"]},
@@ -119,58 +135,39 @@ class DTPGenerator(Generator):
             acceptability_threshold = 10,
             knowledge_base = []
         )
-        >>> program = PrologString(gen._compile_dtproblog_model())
-        >>> query_output, score, _ = dtproblog(program)
+        >>> score, query_output = gen._rank_decisions()[0]
         >>> query_output
         {boolean_True: 1}
-        >>> cleaned_query_output = gen.clean_query_output(query_output)
-        >>> gen._extend_partial_offer(cleaned_query_output)
-        {[boolean->True, dummy->1], [boolean->True, dummy->2]}
+        >>> cleaned_query_output = gen._clean_query_output(query_output)
+        >>> list(gen._extend_partial_offer(cleaned_query_output))
+        [[boolean->True, dummy->1], [boolean->True, dummy->2]]
 
 
-        :param partial_offer:
-        :type partial_offer: [type]
-        :raises valueerror: [description]
-        :return: [description]
-        :rtype: Set[Offer]
+        :param partial_offer: The assignments DTProbLog decided on
+        :type partial_offer: Dict[str, float]
+        :param max_offers: The maximum number of completions to generate, if any
+        :type max_offers: Optional[int]
+        :return: The full offers that agree with the partial offer
+        :rtype: Iterator[Offer]
         """
-        partial_offer_queue = []
-        partial_offer_queue.append(partial_offer)
-        full_offers = set()
-        while partial_offer_queue:
-            nested_partial_offer = nested_dict_from_atom_dict(
-                partial_offer_queue.pop())
-            # make sure we cover all of the issues
-            for issue in self.neg_space.keys():
-                if issue not in nested_partial_offer.keys():
-                    nested_partial_offer[issue] = {
-                        value: 0.0 for value in self.neg_space[issue]}
-
-            # make sure the issues cover all values
-            for issue in self.neg_space.keys():
-                for value in self.neg_space[issue]:
-                    if value not in nested_partial_offer[issue].keys():
-                        nested_partial_offer[issue][value] = 0.0
+        nested_partial_offer = nested_dict_from_atom_dict(partial_offer)
+        choices: List[List[int]] = []
+        for i, issue in enumerate(self.schema.issues):
+            chosen_values = [value for value, prob in nested_partial_offer.get(issue, {}).items()
+                             if not isclose(prob, 0)]
+            if len(chosen_values) > 1:
+                # not a valid offer, so it can't be completed either
+                return iter(())
 
             # if an issue didn't have any utilities we can use that
             # to make lateral moves for free.
-            for issue in self.neg_space.keys():
-                if isclose(sum(nested_partial_offer[issue].values()), 0):
-                    for value in self.neg_space[issue]:
-                        partial_offer_copy = deepcopy(nested_partial_offer)
-                        partial_offer_copy[issue][value] = 1.0
-                        partial_atom_dict = atom_dict_from_nested_dict(
-                            partial_offer_copy)
-                        partial_offer_queue.append(partial_atom_dict)
-
-            try:
-                # is the partial offer valid? (Offer will raise valueerror if not)
-                full_offer = Offer(nested_partial_offer)
-                full_offers.add(full_offer)
-            except ValueError:
-                continue
+            if chosen_values:
+                choices.append([self.schema.value_indices[i][chosen_values[0]]])
+            else:
+                choices.append(list(range(len(self.schema.values[i]))))
 
-        return full_offers
+        offers = map(self.schema.offer_from_indices, product(*choices))
+        return islice(offers, max_offers)
 
     def _clean_query_output(self, query_output: Dict['Term', float]) -> Dict[str, float]:
         """
@@ -196,25 +193,83 @@ class DTPGenerator(Generator):
 
         return return_dict
 
+    def _rank_decisions(self) -> List[Tuple[float, Dict[Term, int]]]:
+        """
+        Compiles the model and scores all possible decisions, like :func:`dtproblog` does
+        with exhaustive search, but keeps all acceptable ones instead of only the best one.
+        Decisions below the acceptability threshold are never proposed, so they are
+        dropped as soon as they are scored.
+
+        :return: The scores and decisions with a score of at least the acceptability \
+            threshold, from best to worst. Decisions with the same score are kept in \
+            the order dtproblog considers them.
+        :rtype: List[Tuple[float, Dict[problog.logic.Term, int]]]
+        """
+        engine = DefaultEngine(label_all=True)
+        db = engine.prepare(PrologString(self._compile_dtproblog_model()))
+        utilities = dict(engine.query(db, Term("utility", None, None)))
+        ground_program = engine.ground_all(db, target=None, queries=utilities.keys())
+
+        decisions = []
+        decision_nodes = set()
+        for i, node, node_type in ground_program:
+            if node_type == "atom" and node.probability == Term("?"):
+                decisions.append((i, node.name))
+                decision_nodes.add(i)
+
+        if not decisions:
+            return [(0.0, {})]
+
+        constraints = [constraint for constraint in ground_program.constraints()
+                       if set(constraint.get_nodes()) & decision_nodes]
+        knowledge = get_evaluatable().create_from(ground_program)
+
+        decision_ids, decision_names = zip(*decisions)
+        ranked_decisions = []
+        for i in range(1 << len(decisions)):
+            choices = list(map(int, num2bits(i, len(decisions))))
+            assignment = dict(zip(decision_ids, choices))
+            if not all(constraint.check(assignment) for constraint in constraints):
+                continue
+
+            evidence = dict(zip(decision_names, choices))
+            score = evaluate(knowledge, evidence, utilities)
+            if score >= self.acceptability_threshold:
+                ranked_decisions.append((score, evidence))
+
+        # sorting is stable, so ties are still broken like dtproblog would
+        ranked_decisions.sort(key=lambda decision: -decision[0])
+        return ranked_decisions
+
     def generate_offer(self) -> Offer:
-        if not self.offer_queue:
-            program = PrologString(self._compile_dtproblog_model())
-            query_output, score, _ = dtproblog(program)
+        if self._ranked_decisions is None:
+            self._ranked_decisions = self._rank_decisions()
+            self._next_decision = 0
+
+        while True:
+            for offer in self._extensions:
+                if offer.get_sparse_repr() in self.generated_offers:
+                    continue
+
+                self.generated_offers[offer.get_sparse_repr()] = self._extensions_score
+                # only completions that are actually proposed count towards the cap
+                self._extensions_proposed += 1
+                if self.max_extensions is not None and \
+                        self._extensions_proposed >= self.max_extensions:
+                    self._extensions = iter(())
+                return offer
 
             # score of offers are now below acceptability threshold
             # so we should terminate
-            if score < self.acceptability_threshold:
+            if self._next_decision >= len(self._ranked_decisions) or \
+                    self._ranked_decisions[self._next_decision][0] < \
+                    self.acceptability_threshold:
                 self.active = False
                 raise StopIteration()
-            cleaned_query_output = self._clean_query_output(query_output)
-            extended_offers = self._extend_partial_offer(cleaned_query_output)
-
-            for offer in extended_offers:
-                if offer not in self.generated_offers:
-                    self.generated_offers[offer.get_sparse_repr()] = score
-                    self.offer_queue.append(offer)
 
-        if not self.offer_queue:
-            raise RuntimeError()
-
-        return self.offer_queue.pop()
+            score, query_output = self._ranked_decisions[self._next_decision]
+            self._next_decision += 1
+            cleaned_query_output = self._clean_query_output(query_output)
+            self._extensions = self._extend_partial_offer(cleaned_query_output)
+            self._extensions_score = score
+            self._extensions_proposed = 0
@@ -9,6 +9,7 @@ from typing import Optional, Set
 from pyneg.comms import AtomicConstraint, Offer
 from pyneg.engine.evaluator import Evaluator
 from pyneg.engine.generator import Generator
+from pyneg.engine.profiler import ENGINE_CATEGORIES, EVALUATOR_CATEGORIES, Profiler
 from pyneg.types import AtomicDict
 
 
@@ -175,6 +176,19 @@ class AbstractEngine:
         """
         raise NotImplementedError()
 
+    def enable_profiling(self, profiler: Optional[Profiler] = None) -> Profiler:
+        """
+        Starts recording the time spent in the methods of the engine.
+        See :class:`Profiler` for more information.
+
+        :param profiler: The profiler to record to, defaults to a new one
+        :type profiler: Optional[Profiler]
+        :raises NotImplementedError:
+        :return: The profiler the engine records to
+        :rtype: Profiler
+        """
+        raise NotImplementedError()
+
 
 class Engine(AbstractEngine):
     """
@@ -338,3 +352,21 @@ class Engine(AbstractEngine):
         :rtype: bool
         """
         return self.generator.active
+
+    def enable_profiling(self, profiler: Optional[Profiler] = None) -> Profiler:
+        """
+        Starts recording the time spent generating offers, evaluating them, deciding
+        whether to accept them and handling constraints. The methods are replaced on
+        this engine and its evaluator only, so engines that aren't profiled
+        don't pay for it. Use :func:`Profiler.remove` to stop profiling.
+
+        :param profiler: The profiler to record to, defaults to a new one
+        :type profiler: Optional[Profiler]
+        :return: The profiler the engine records to
+        :rtype: Profiler
+        """
+        if profiler is None:
+            profiler = Profiler()
+        profiler.time_methods(self, ENGINE_CATEGORIES)
+        profiler.time_methods(self.evaluator, EVALUATOR_CATEGORIES)
+        return profiler
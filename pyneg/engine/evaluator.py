@@ -21,6 +21,17 @@ class Evaluator():
     def __init__(self):
         pass
 
+    def unwrap(self) -> 'Evaluator':
+        """
+        Evaluators that wrap another evaluator, such as the :class:`CachedEvaluator`,
+        return the evaluator that actually does the reasoning, so callers can check
+        what kind of utility function it implements.
+
+        :return: The innermost evaluator, which is this evaluator itself by default
+        :rtype: Evaluator
+        """
+        return self
+
     def calc_offer_utility(self, offer: Offer) -> float:
         """
         Calculates the utility of an offer in whatever way is appropriate.
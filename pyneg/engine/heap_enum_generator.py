@@ -0,0 +1,151 @@
+"""
+Defines the :class:`HeapEnumGenerator` class, a faster implementation of
+:class:`EnumGenerator` that works on integer index tuples instead of dictionaries.
+"""
+
+from heapq import heappop, heappush
+from typing import List, Set, Tuple
+
+from pyneg.comms import CompactOffer, Offer, OfferSchema
+from pyneg.types import AtomicDict, NegSpace
+
+from .enum_generator import EnumGenerator
+from .evaluator import Evaluator
+
+# (-utility, tie breaker, packed key, ranks)
+FrontierEntry = Tuple[float, int, int, Tuple[int, ...]]
+
+
+class HeapEnumGenerator(EnumGenerator):
+    """
+    Generates offers in order of preference, exactly like :class:`EnumGenerator`,
+    but with a search core that is built for large negotiation spaces:
+
+    - Assignments are tuples of ranks, where rank r of an issue refers to the r-th best
+      value of that issue.
+    - The frontier is a plain `heapq` heap instead of a `queue.PriorityQueue`, and ties are
+      broken by insertion order so the order in which offers are generated is deterministic.
+    - The utility of a successor is the utility of it's parent plus the change in score of
+      the one issue that changed, so the evaluator is only consulted during setup.
+    - Visited assignments are remembered as integers by packing the ranks in mixed radix.
+    - Offers are only materialised (as :class:`CompactOffer`) when they are generated.
+
+    Because of the incremental utilities this generator requires the evaluator
+    to be linear additive. see :ref:`linear-additivity`
+    """
+    def __init__(self, neg_space: NegSpace,
+                 utilities: AtomicDict,
+                 evaluator: Evaluator,
+                 acceptability_threshold: float) -> None:
+        self.schema: OfferSchema = OfferSchema.from_neg_space(neg_space)
+        self._frontier: List[FrontierEntry] = []
+        self._visited: Set[int] = set()
+        self._push_counter = 0
+        self._ranked_indices: List[List[int]] = []
+        self._sorted_scores: List[List[float]] = []
+        self._rank_deltas: List[List[float]] = []
+        self._strides: List[int] = []
+        super().__init__(neg_space, utilities, evaluator, acceptability_threshold)
+
+    def init_generator(self) -> None:
+        """
+        Setup for the search. Every issue gets a list of the indices of it's values
+        sorted by decreasing utility according to the evaluator, after which the best
+        possible offer is put on the frontier if it is acceptable.
+        """
+        self.schema = OfferSchema.from_neg_space(self.neg_space)
+        self._frontier = []
+        self._visited = set()
+        self._push_counter = 0
+        self.offer_counter = 0
+        self._ranked_indices = []
+        self._sorted_scores = []
+        self._rank_deltas = []
+        self._strides = []
+        self.sorted_utils = {}
+
+        stride = 1
+        for issue, values in zip(self.schema.issues, self.schema.values):
+            scores = [self.evaluator.calc_assignment_util(issue, value) for value in values]
+            # sorted is stable so values with equal utility keep the order of the neg space
+            ranked = sorted(range(len(values)), key=lambda j: scores[j], reverse=True)
+            sorted_scores = [scores[j] for j in ranked]
+
+            self._ranked_indices.append(ranked)
+            self._sorted_scores.append(sorted_scores)
+            self._rank_deltas.append([sorted_scores[r + 1] - sorted_scores[r]
+                                      for r in range(len(ranked) - 1)])
+            self._strides.append(stride)
+            stride *= len(values)
+            self.sorted_utils[issue] = [values[j] for j in ranked]
+
+        best_ranks = tuple(0 for _ in self.schema.issues)
+        best_util = sum(scores[0] for scores in self._sorted_scores if scores)
+        if best_util >= self.acceptability_threshold:
+            self._push(best_util, 0, best_ranks)
+            self.active = True
+
+    def _push(self, util: float, key: int, ranks: Tuple[int, ...]) -> None:
+        self._visited.add(key)
+        heappush(self._frontier, (-util, self._push_counter, key, ranks))
+        self._push_counter += 1
+
+    def _expand_ranks(self, util: float, key: int, ranks: Tuple[int, ...]) -> None:
+        """
+        Puts all acceptable successors of the given assignment on the frontier,
+        a successor being the same assignment with one of the issues set to it's next
+        best value. see :func:`EnumGenerator._expand_assignment`
+
+        :param util: The utility of the assignment that is being expanded
+        :type util: float
+        :param key: The packed representation of the assignment
+        :type key: int
+        :param ranks: The ranks of the assignment
+        :type ranks: Tuple[int, ...]
+        """
+        for i, rank in enumerate(ranks):
+            deltas = self._rank_deltas[i]
+            if rank >= len(deltas):
+                continue
+
+            child_key = key + self._strides[i]
+            if child_key in self._visited:
+                continue
+
+            child_util = util + deltas[rank]
+            if child_util >= self.acceptability_threshold:
+                self._push(child_util, child_key, ranks[:i] + (rank + 1,) + ranks[i + 1:])
+
+    def generate_offer(self) -> Offer:
+        """
+        Generates the next best offer. see :func:`EnumGenerator.generate_offer`
+
+        :raises StopIteration: Raised when no acceptable offers can be found.
+        :return: The next best offer with the current knowledge base.
+        :rtype: Offer
+        """
+        if not self._frontier:
+            self.active = False
+            raise StopIteration()
+
+        self.offer_counter += 1
+
+        negative_util, _, key, ranks = heappop(self._frontier)
+        if -negative_util <= self.acceptability_threshold:
+            self.active = False
+            raise StopIteration()
+
+        self._expand_ranks(-negative_util, key, ranks)
+        return self._offer_from_ranks(ranks)
+
+    def _offer_from_ranks(self, ranks: Tuple[int, ...]) -> CompactOffer:
+        """
+        converts a tuple of ranks into the offer it represents.
+
+        :param ranks: For every issue, the rank of the chosen value
+        :type ranks: Tuple[int, ...]
+        :return: The offer with the values corresponding to the ranks
+        :rtype: CompactOffer
+        """
+        return CompactOffer(self.schema, tuple(
+            ranked[rank] for ranked, rank in zip(self._ranked_indices, ranks)))
@@ -1,9 +1,10 @@
 """
 This module defines the :class:`ProblogEvaluator` class.
 """
-from typing import Dict, List, Set
+from typing import Dict, FrozenSet, List, Optional, Set
 
 from problog import get_evaluatable
+from problog.evaluator import Evaluatable
 from problog.program import PrologString
 
 from pyneg.comms import Offer, AtomicConstraint
@@ -22,6 +23,12 @@ class ProblogEvaluator(Evaluator):
     This is however, much slower than the other classes. The knowledge base
     should be represented as valid ProbLog statements see
     https://dtai.cs.kuleuven.be/problog/ for more information.
+
+    To keep this managable the knowledge base and queries are only compiled once into
+    a circuit in which every value of the negotiation space is an independent fact.
+    Offers are then evaluated by setting the weights of those facts to 1.0 or 0.0,
+    so nothing has to be parsed or compiled per offer. The circuit is recompiled
+    when the knowledge base or the set of utility atoms changes.
     """
     def __init__(self,
                  neg_space: NegSpace,
@@ -29,11 +36,44 @@ class ProblogEvaluator(Evaluator):
                  non_agreement_cost: float,
                  knowledge_base: List[str]):
         super().__init__()
+        self._circuit: Optional[Evaluatable] = None
+        self._circuit_queries: FrozenSet[str] = frozenset()
+        self._circuit_weights: Dict[int, float] = {}
+        self._decision_keys: Dict[str, Dict[str, Optional[int]]] = {}
+        self._knowledge_base: List[str] = []
+        self._utilities: AtomicDict = {}
         self.utilities = utilities
         self.knowledge_base = knowledge_base
         self.neg_space = neg_space
         self.non_agreement_cost = non_agreement_cost
 
+    @property
+    def utilities(self) -> AtomicDict:
+        """
+        The known utilities. Assigning new utilities only invalidates the compiled
+        circuit if the set of atoms changes since the values are not part of it.
+        """
+        return self._utilities
+
+    @utilities.setter
+    def utilities(self, new_utils: AtomicDict) -> None:
+        self._utilities = new_utils
+        if self._circuit is not None and frozenset(new_utils.keys()) != self._circuit_queries:
+            self._circuit = None
+
+    @property
+    def knowledge_base(self) -> List[str]:
+        """
+        The rules known to the evaluator. Assigning a new knowledge base invalidates
+        the compiled circuit.
+        """
+        return self._knowledge_base
+
+    @knowledge_base.setter
+    def knowledge_base(self, new_knowledge_base: List[str]) -> None:
+        self._knowledge_base = new_knowledge_base
+        self._circuit = None
+
     def calc_probabilities_of_utilities(self, offer: Offer) -> Dict[str, float]:
         """
         Uses ProbLog and the known knowledge_base to calculate the probability
@@ -46,6 +86,11 @@ class ProblogEvaluator(Evaluator):
             they will be fufilled as values.
         :rtype: Dict[str, float]
         """
+        weights = self._get_offer_weights(offer)
+        if weights is not None:
+            return {str(atom): prob for atom, prob in
+                    self._circuit.evaluate(weights=weights).items()}
+
         model = self.compile_problog_model(offer)
         probability_of_facts = {str(atom): util for atom, util in
                                 get_evaluatable("sdd").create_from(
@@ -65,6 +110,9 @@ class ProblogEvaluator(Evaluator):
         """
         decision_facts_string = offer.get_problog_dists()
 
+        return decision_facts_string + self._get_kb_and_query_string()
+
+    def _get_kb_and_query_string(self) -> str:
         query_string = ""
         for util_atom in self.utilities.keys():
             # we shouldn't ask problog for facts that we currently have no rules for
@@ -75,7 +123,67 @@ class ProblogEvaluator(Evaluator):
 
         kb_string = "\n".join(self.knowledge_base) + "\n"
 
-        return decision_facts_string + kb_string + query_string
+        return kb_string + query_string
+
+    def compile_circuit(self) -> None:
+        """
+        Compiles the knowledge base and the queries for the known utilities into a
+        circuit that can be reused for every offer in the negotiation space. Every
+        value of the negotiation space is declared as an independent fact, the
+        weights of which are set per offer by :func:`calc_probabilities_of_utilities`.
+        """
+        decision_atoms = {issue: {str(value): atom_from_issue_value(issue, str(value))
+                                  for value in values}
+                          for issue, values in self.neg_space.items()}
+        decision_facts_string = "".join(f"0.5::{atom}.\n"
+                                        for atoms in decision_atoms.values()
+                                        for atom in atoms.values())
+
+        circuit = get_evaluatable("sdd").create_from(
+            PrologString(decision_facts_string + self._get_kb_and_query_string()))
+        self._circuit_weights = dict(circuit.get_weights())
+        # names can also refer to the rules of an atom, so look up the facts themselves
+        fact_keys_by_name = {str(circuit.get_node(key).name): key
+                             for key in self._circuit_weights}
+
+        # facts that are irrelevant to all queries are removed during grounding,
+        # those don't need a weight.
+        self._decision_keys = {
+            issue: {value: fact_keys_by_name.get(atom) for value, atom in atoms.items()}
+            for issue, atoms in decision_atoms.items()}
+        for keys in self._decision_keys.values():
+            for key in keys.values():
+                if key is not None:
+                    self._circuit_weights[key] = 0.0
+
+        self._circuit_queries = frozenset(self.utilities.keys())
+        self._circuit = circuit
+
+    def _get_offer_weights(self, offer: Offer) -> Optional[Dict[int, float]]:
+        """
+        Returns the weights of the compiled circuit that represent the given offer,
+        compiling the circuit first if necessary.
+
+        :return: The weights, or None if the offer contains issues or values \
+            outside of the negotiation space and cannot use the compiled circuit.
+        :rtype: Optional[Dict[int, float]]
+        """
+        if self._circuit is None:
+            self.compile_circuit()
+
+        weights = dict(self._circuit_weights)
+        for issue in offer.get_issues():
+            keys = self._decision_keys.get(issue)
+            if keys is None:
+                return None
+            chosen_value = offer.get_chosen_value(issue)
+            if chosen_value not in keys:
+                return None
+            key = keys[chosen_value]
+            if key is not None:
+                weights[key] = 1.0
+
+        return weights
 
     def calc_offer_utility(self, offer: Offer) -> float:
         probability_of_utilities = self.calc_probabilities_of_utilities(offer)
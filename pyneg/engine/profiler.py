@@ -0,0 +1,203 @@
+"""
+Defines the :class:`Profiler` and :class:`NegotiationStats` classes, which record where
+an agent spends its time during a negotiation. Profiling works by replacing the
+methods of individual engines and agents with timed versions, so agents that aren't
+being profiled run exactly the same code as before.
+"""
+
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple
+
+# maps the engine methods to the category their time is recorded in
+ENGINE_CATEGORIES = {
+    "generate_offer": "generation",
+    "accepts": "acceptance",
+    "add_constraint": "constraints",
+    "add_constraints": "constraints",
+    "find_violated_constraint": "constraints",
+    "satisfies_all_constraints": "constraints",
+}
+EVALUATOR_CATEGORIES = {
+    "calc_offer_utility": "evaluation",
+}
+CATEGORIES = ("generation", "evaluation", "acceptance", "constraints")
+
+_MISSING = object()
+
+
+class CallStats:
+    """
+    The number of calls made in a category and the time spent in them, in seconds.
+    """
+    def __init__(self, calls: int = 0, time: float = 0.0):
+        self.calls = calls
+        self.time = time
+
+    def add(self, other: 'CallStats') -> None:
+        self.calls += other.calls
+        self.time += other.time
+
+    def __repr__(self) -> str:
+        return f"CallStats({self.calls} calls, {self.time:.3g}s)"
+
+
+class NegotiationStats:
+    """
+    The time an agent spent generating offers, evaluating offers, deciding whether to
+    accept offers and handling constraints, for every round of a negotiation.
+    A round starts whenever the agent receives a message, so it contains the handling
+    of that message and the generation of the agent's response. For the agent that
+    started the negotiation, the first round only contains its opening offer.
+
+    Times are exclusive: when an offer is evaluated while generating an offer, that time
+    is counted as evaluation and not as generation.
+
+    >>> agent.enable_profiling()
+    >>> agent.negotiate(opponent)
+    >>> agent.negotiation_stats.totals()["generation"]
+    CallStats(12 calls, 0.00215s)
+    """
+    def __init__(self) -> None:
+        self.rounds: List[Dict[str, CallStats]] = []
+
+    def start_round(self) -> None:
+        self.rounds.append({category: CallStats() for category in CATEGORIES})
+
+    def record(self, category: str, elapsed: float) -> None:
+        """
+        Records a single call in the current round, starting one if there is none yet.
+
+        :param category: The category of the call
+        :type category: str
+        :param elapsed: The time the call took in seconds
+        :type elapsed: float
+        """
+        if not self.rounds:
+            self.start_round()
+        stats = self.rounds[-1][category]
+        stats.calls += 1
+        stats.time += elapsed
+
+    def totals(self) -> Dict[str, CallStats]:
+        """
+        :return: The calls and time of every category summed over all rounds.
+        :rtype: Dict[str, CallStats]
+        """
+        totals = {category: CallStats() for category in CATEGORIES}
+        for round_stats in self.rounds:
+            for category, stats in round_stats.items():
+                totals[category].add(stats)
+        return totals
+
+    @property
+    def total_time(self) -> float:
+        return sum(stats.time for stats in self.totals().values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the stats as plain dictionaries that can be written as JSON.
+
+        :return: The totals and the stats of every round
+        :rtype: Dict[str, Any]
+        """
+        def as_dict(stats: Dict[str, CallStats]) -> Dict[str, Dict[str, float]]:
+            return {category: {"calls": call_stats.calls, "time": call_stats.time}
+                    for category, call_stats in stats.items()}
+
+        return {"totals": as_dict(self.totals()),
+                "rounds": [as_dict(round_stats) for round_stats in self.rounds]}
+
+    def __repr__(self) -> str:
+        totals = ", ".join(f"{category}: {stats.calls} calls {stats.time:.3g}s"
+                           for category, stats in self.totals().items())
+        return f"NegotiationStats({len(self.rounds)} rounds, {totals})"
+
+
+class Profiler:
+    """
+    Times the methods of engines, evaluators and agents by replacing them on the
+    instance with a timed version that records to :attr:`stats`.
+    :func:`remove` restores the original methods.
+    """
+    def __init__(self) -> None:
+        self.stats = NegotiationStats()
+        self._wrapped: List[Tuple[Any, str, Any]] = []
+        # time spent in nested timed calls, for every timed call that is running
+        self._nested_times: List[float] = []
+
+    def time_methods(self, obj: Any, categories: Dict[str, str]) -> None:
+        """
+        Records the calls to the given methods of `obj`, if it has them.
+
+        :param obj: The object to time
+        :type obj: Any
+        :param categories: The category to record every method in, by method name
+        :type categories: Dict[str, str]
+        """
+        for name, category in categories.items():
+            if hasattr(obj, name):
+                self._wrap(obj, name, self._timed(getattr(obj, name), category))
+
+    def call_before(self, obj: Any, name: str, hook: Callable[[], None]) -> None:
+        """
+        Calls `hook` before every call to the method `name` of `obj`.
+
+        :param obj: The object to add the hook to
+        :type obj: Any
+        :param name: The name of the method
+        :type name: str
+        :param hook: The function to call
+        :type hook: Callable[[], None]
+        """
+        method = getattr(obj, name)
+
+        @wraps(method)
+        def hooked(*args, **kwargs):
+            hook()
+            return method(*args, **kwargs)
+
+        self._wrap(obj, name, hooked)
+
+    def new_negotiation(self) -> None:
+        """
+        Starts recording to new stats, leaving the stats of the previous negotiation as
+        they were.
+        """
+        self.stats = NegotiationStats()
+
+    def new_round(self) -> None:
+        self.stats.start_round()
+
+    def remove(self) -> None:
+        """
+        Restores all methods this profiler replaced.
+        """
+        for obj, name, original in reversed(self._wrapped):
+            if original is _MISSING:
+                delattr(obj, name)
+            else:
+                setattr(obj, name, original)
+        self._wrapped.clear()
+
+    def _wrap(self, obj: Any, name: str, wrapper: Callable) -> None:
+        self._wrapped.append((obj, name, vars(obj).get(name, _MISSING)))
+        setattr(obj, name, wrapper)
+
+    def _timed(self, method: Callable, category: str) -> Callable:
+        nested_times = self._nested_times
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            nested_times.append(0.0)
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                nested = nested_times.pop()
+                if nested_times:
+                    nested_times[-1] += elapsed
+                self.stats.record(category, elapsed - nested)
+
+        return timed
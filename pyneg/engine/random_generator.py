@@ -2,15 +2,19 @@
 Defines the :class:`RandomGenerator` class.
 """
 
-from typing import Dict, List, Optional, Set
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
 
+import numpy as np
 from numpy.random import choice
 
-from pyneg.comms import AtomicConstraint, Offer
+from pyneg.comms import AtomicConstraint, Offer, OfferSchema
 from pyneg.types import AtomicDict, NegSpace
 
+from .acceptance_region_sampler import AcceptanceRegionSampler
 from .evaluator import Evaluator
 from .generator import Generator
+from .linear_evaluator import LinearEvaluator
 from .strategy import Strategy
 
 
@@ -19,6 +23,19 @@ class RandomGenerator(Generator):
     This generator generates random offers without any reasoning.
     By default it uses uniform distriutions across all issues and values.
 
+    Candidates are sampled in blocks of `batch_size` at once, as a matrix of value indices
+    with one column per issue. If the evaluator can score such a matrix in one go
+    (see :func:`CompiledLinearEvaluator.calc_offer_utilities`) it is used to do so, otherwise
+    the candidates are evaluated one by one. Acceptable candidates that weren't needed are
+    kept and proposed in later rounds, until the utilities or the strategy change.
+
+    If the evaluator is linear additive (see :ref:`linear-additivity`) offers are instead
+    sampled from the acceptable ones only, using an :class:`AcceptanceRegionSampler`.
+    This gives the same distribution without rejecting any candidates, so it keeps working
+    when only a tiny fraction of the negotiation space is acceptable. If the acceptable
+    region is too complex to count within `max_sampler_nodes` steps the generator falls
+    back to sampling candidates and rejecting the unacceptable ones.
+
     :raises StopIteration: when maximum number of samples for one offer or \
         maximum total number offers generated is exceded
     """
@@ -30,12 +47,20 @@ class RandomGenerator(Generator):
                  knowledge_base: List[str],
                  acceptability_threshold: float,
                  max_rounds: int,
-                 max_generation_tries: int = 1000):
+                 max_generation_tries: int = 1000,
+                 batch_size: int = 64,
+                 max_sampler_nodes: int = 100000):
         super().__init__()
         self.utilities = utilities
         self.knowledge_base = knowledge_base
         self.neg_space = {issue: list(map(str, values))
                           for issue, values in neg_space.items()}
+        self.schema = OfferSchema.from_neg_space(self.neg_space)
+        self.batch_size = max(1, batch_size)
+        self._acceptable_samples: Deque[Tuple[int, ...]] = deque()
+        self.max_sampler_nodes = max_sampler_nodes
+        self._sampler: Optional[AcceptanceRegionSampler] = None
+        self._sampler_initialised = False
         self.non_agreement_cost = non_agreement_cost
         self.evaluator = evaluator
         self.init_uniform_strategy(neg_space)
@@ -60,6 +85,7 @@ class RandomGenerator(Generator):
                 strat_dict[issue][str(val)] = 1 / len(neg_space[issue])
 
         self.strategy = Strategy(strat_dict)
+        self.clear_samples()
 
     def generate_offer(self) -> Offer:
         """
@@ -77,43 +103,126 @@ class RandomGenerator(Generator):
             self.active = False
             raise StopIteration()
 
-        return_offer = None
-        for _ in range(self.max_generation_tries):
-            offer: Dict[str, Dict[str, float]] = {}
-            for issue in self.neg_space.keys():
-                # convert to two lists so we can use numpy's choice
-                values, probs = zip(
-                    *self.strategy.get_value_dist(issue).items())
-                chosen_value = choice(values, p=probs)
-
-                offer[issue] = {
-                    key: 0 for key in self.strategy.get_value_dist(issue).keys()}
-                offer[issue][chosen_value] = 1
-            possible_offer = Offer(offer)
-            util = self.evaluator.calc_offer_utility(possible_offer)
-            if util >= self.acceptability_threshold:
-                return_offer = possible_offer
-                break
-
-        if not return_offer:
+        if not self._acceptable_samples:
+            self._sample_acceptable_offers()
+
+        if not self._acceptable_samples:
             self.active = False
             raise StopIteration()
 
+        return_offer = self.schema.offer_from_indices(self._acceptable_samples.popleft())
+
         self.round_counter += 1
         if self.round_counter >= self.max_rounds:
             self.active = False
         return return_offer
 
+    def _sample_acceptable_offers(self) -> None:
+        """
+        Samples blocks of candidates until at least one of them is acceptable or
+        `max_generation_tries` candidates have been drawn. All acceptable
+        candidates of the last block are stored in the order they were sampled.
+        If possible they are sampled from the acceptable region directly instead.
+        """
+        sampler = self._get_sampler()
+        if sampler is not None:
+            if not sampler.acceptable_mass():
+                return
+
+            candidates = sampler.sample(self.batch_size)
+            # the evaluator has the final say, in case it sums the utilities
+            # in a different order and ends up just below the threshold
+            utils = self._calc_candidate_utilities(candidates)
+            acceptable = candidates[utils >= self.acceptability_threshold]
+            self._acceptable_samples.extend(map(tuple, acceptable.tolist()))
+            if self._acceptable_samples:
+                return
+
+        tries_left = self.max_generation_tries
+        while tries_left > 0 and not self._acceptable_samples:
+            num_samples = min(self.batch_size, tries_left)
+            tries_left -= num_samples
+            candidates = self._sample_candidates(num_samples)
+            utils = self._calc_candidate_utilities(candidates)
+            acceptable = candidates[utils >= self.acceptability_threshold]
+            self._acceptable_samples.extend(map(tuple, acceptable.tolist()))
+
+    def _sample_candidates(self, num_samples: int) -> np.ndarray:
+        """
+        Samples offers from the current strategy.
+
+        :param num_samples: The number of offers to sample
+        :type num_samples: int
+        :return: an (num_samples x issues) array of value indices in the order of `schema`
+        :rtype: np.ndarray
+        """
+        candidates = np.empty((num_samples, len(self.schema)), dtype=np.intp)
+        for i, (issue, values) in enumerate(zip(self.schema.issues, self.schema.values)):
+            value_dist = self.strategy.get_value_dist(issue)
+            probs = np.array([value_dist[value] for value in values])
+            candidates[:, i] = choice(len(values), size=num_samples, p=probs / probs.sum())
+        return candidates
+
+    def _get_sampler(self) -> Optional[AcceptanceRegionSampler]:
+        """
+        Returns a sampler for the acceptable region of the current strategy, or None if
+        the evaluator is not linear additive or the region is too complex to count.
+        """
+        if self._sampler_initialised:
+            return self._sampler
+
+        self._sampler_initialised = True
+        evaluator = self.evaluator.unwrap()
+        if not isinstance(evaluator, LinearEvaluator) or self.max_sampler_nodes <= 0:
+            return None
+
+        utilities = []
+        probabilities = []
+        for issue, values in zip(self.schema.issues, self.schema.values):
+            value_dist = self.strategy.get_value_dist(issue)
+            utilities.append([evaluator.calc_assignment_util(issue, value)
+                              for value in values])
+            probabilities.append([value_dist[value] for value in values])
+
+        sampler = AcceptanceRegionSampler(utilities, probabilities,
+                                          self.acceptability_threshold,
+                                          self.max_sampler_nodes)
+        if sampler.acceptable_mass() is not None:
+            self._sampler = sampler
+        return self._sampler
+
+    def _calc_candidate_utilities(self, candidates: np.ndarray) -> np.ndarray:
+        # evaluators compiled against the same schema can score all candidates at once
+        if getattr(self.evaluator, "schema", None) is self.schema \
+                and hasattr(self.evaluator, "calc_offer_utilities"):
+            return self.evaluator.calc_offer_utilities(candidates)
+
+        return np.array([self.evaluator.calc_offer_utility(
+            self.schema.offer_from_indices(row)) for row in candidates.tolist()])
+
+    def clear_samples(self) -> None:
+        """
+        Forgets the acceptable offers that were sampled but not yet proposed. This has to
+        happen whenever the utilities or the strategy change, since they might not be
+        acceptable anymore. The generator does this itself, but it should be called when
+        either is modified from the outside.
+        """
+        self._acceptable_samples = deque()
+        self._sampler = None
+        self._sampler_initialised = False
+
     def add_utilities(self, new_utils: AtomicDict) -> bool:
         self.utilities = {
             **self.utilities,
             **new_utils
         }
+        self.clear_samples()
 
         return True
 
     def set_utilities(self, new_utils: AtomicDict) -> bool:
         self.utilities = new_utils
+        self.clear_samples()
         return True
 
     def add_constraint(self, constraint: AtomicConstraint) -> bool:
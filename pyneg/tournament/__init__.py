@@ -0,0 +1,9 @@
+"""
+This submodule contains the tools for running many negotiations at once,
+such as round robin tournaments between different kinds of agents in
+many scenarios, spread out over multiple processes.
+"""
+
+from pyneg.tournament.tournament import (AgentSpec, NegotiationResult, Scenario,
+                                         round_robin_pairings, run_negotiation,
+                                         run_tournament)
@@ -0,0 +1,319 @@
+"""
+This module defines everything needed to run many negotiations at once.
+A tournament plays every agent specification against every other specification
+in every scenario, spread out over multiple processes.
+"""
+# pylint: disable=protected-access
+# the results are read from the agents after the negotiation is finished
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import permutations, product
+from math import ceil
+from os import cpu_count
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pyneg.agent import Agent
+from pyneg.comms import Offer
+from pyneg.types import AtomicDict, NegSpace
+from pyneg.utils import neg_scenario_from_util_matrices
+
+# (negotiation id, index of agent a, index of agent b, index of scenario)
+Pairing = Tuple[int, int, int, int]
+
+
+class AgentSpec:
+    """
+    A description of how to create an agent, so that agents can be created in
+    the process that will run the negotiation. The factory will be called as
+    `factory(name, neg_space, utilities, **factory_kwargs)` which matches the factories in
+    :mod:`pyneg.agent.agent_factory`. Because the specification is sent to other
+    processes the factory should be a module level function.
+
+    >>> AgentSpec("concession", make_linear_concession_agent,
+    ...           reservation_value=0.5, non_agreement_cost=-1000)
+    """
+    def __init__(self, name: str, factory: Callable[..., Agent], **factory_kwargs: Any):
+        self.name = name
+        self.factory = factory
+        self.factory_kwargs = factory_kwargs
+
+    def make_agent(self, neg_space: NegSpace, utilities: AtomicDict) -> Agent:
+        """
+        Create the agent described by this specification.
+
+        :param neg_space: The negotiation space the agent will negotiate in
+        :type neg_space: NegSpace
+        :param utilities: The utility function of the agent
+        :type utilities: AtomicDict
+        :return: The newly created agent
+        :rtype: Agent
+        """
+        return self.factory(self.name, neg_space, utilities, **self.factory_kwargs)
+
+    def __repr__(self) -> str:
+        return f"AgentSpec({self.name}, {self.factory.__name__})"
+
+
+class Scenario:
+    """
+    A negotiation space together with the utility function of both sides.
+    The agent that starts the negotiation gets `utilities_a`, the other gets `utilities_b`.
+    """
+    def __init__(self, neg_space: NegSpace,
+                 utilities_a: AtomicDict,
+                 utilities_b: AtomicDict,
+                 name: str = ""):
+        self.neg_space = neg_space
+        self.utilities_a = utilities_a
+        self.utilities_b = utilities_b
+        self.name = name
+
+    @classmethod
+    def from_util_matrices(cls, utils_a: np.ndarray, utils_b: np.ndarray,
+                           name: str = "") -> 'Scenario':
+        """
+        Create a scenario from two utility matrices.
+        see :func:`pyneg.utils.neg_scenario_from_util_matrices`
+
+        :param utils_a: The utility matrix of the first agent
+        :type utils_a: np.ndarray
+        :param utils_b: The utility matrix of the second agent
+        :type utils_b: np.ndarray
+        :param name: The name of the scenario, defaults to ""
+        :type name: str, optional
+        :return: The scenario described by the matrices
+        :rtype: Scenario
+        """
+        neg_space, utilities_a, utilities_b = neg_scenario_from_util_matrices(utils_a, utils_b)
+        return cls(neg_space, utilities_a, utilities_b, name)
+
+    def __repr__(self) -> str:
+        return f"Scenario({self.name})"
+
+
+class NegotiationResult:
+    """
+    The outcome of a single negotiation in a tournament. The utilities are the
+    utilities of the agreement according to each of the agents and are None
+    if no agreement was reached.
+    """
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    def __init__(self, negotiation_id: int,
+                 scenario: int,
+                 agent_a: str,
+                 agent_b: str,
+                 successful: bool,
+                 agreement: Optional[Offer],
+                 utility_a: Optional[float],
+                 utility_b: Optional[float],
+                 rounds: int,
+                 duration: float):
+        self.negotiation_id = negotiation_id
+        self.scenario = scenario
+        self.agent_a = agent_a
+        self.agent_b = agent_b
+        self.successful = successful
+        self.agreement = agreement
+        self.utility_a = utility_a
+        self.utility_b = utility_b
+        self.rounds = rounds
+        self.duration = duration
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the result as a flat dictionary, with the agreement
+        in it's sparse string representation, e.g. for writing to csv.
+
+        :return: The result as a dictionary
+        :rtype: Dict[str, Any]
+        """
+        return {
+            "negotiation_id": self.negotiation_id,
+            "scenario": self.scenario,
+            "agent_a": self.agent_a,
+            "agent_b": self.agent_b,
+            "successful": self.successful,
+            "agreement": self.agreement.get_sparse_str_repr() if self.agreement else None,
+            "utility_a": self.utility_a,
+            "utility_b": self.utility_b,
+            "rounds": self.rounds,
+            "duration": self.duration
+        }
+
+    def __repr__(self) -> str:
+        return f"NegotiationResult({self.negotiation_id}: {self.agent_a} vs {self.agent_b} " \
+            f"in scenario {self.scenario}, successful={self.successful})"
+
+
+def round_robin_pairings(num_agents: int, num_scenarios: int,
+                         self_play: bool = False) -> List[Pairing]:
+    """
+    Lists all negotiations in a round robin tournament. Every agent negotiates
+    against every other agent in every scenario, once as the agent that starts the
+    negotiation and once as the agent that responds.
+
+    :param num_agents: The number of agent specifications
+    :type num_agents: int
+    :param num_scenarios: The number of scenarios
+    :type num_scenarios: int
+    :param self_play: Whether agents should also negotiate against themselves, \
+        defaults to False
+    :type self_play: bool, optional
+    :return: A list of (negotiation id, agent a, agent b, scenario) tuples
+    :rtype: List[Pairing]
+    """
+    if self_play:
+        agent_pairs = list(product(range(num_agents), repeat=2))
+    else:
+        agent_pairs = list(permutations(range(num_agents), 2))
+
+    return [(negotiation_id, agent_a, agent_b, scenario)
+            for negotiation_id, (scenario, (agent_a, agent_b))
+            in enumerate(product(range(num_scenarios), agent_pairs))]
+
+
+def run_negotiation(spec_a: AgentSpec, spec_b: AgentSpec, scenario: Scenario,
+                    negotiation_id: int = 0, scenario_index: int = 0) -> NegotiationResult:
+    """
+    Creates the agents and runs a single negotiation between them in the current process.
+
+    :param spec_a: The agent that starts the negotiation
+    :type spec_a: AgentSpec
+    :param spec_b: The agent that responds
+    :type spec_b: AgentSpec
+    :param scenario: The scenario to negotiate in
+    :type scenario: Scenario
+    :param negotiation_id: The id to record in the result, defaults to 0
+    :type negotiation_id: int, optional
+    :param scenario_index: The index of the scenario to record in the result, defaults to 0
+    :type scenario_index: int, optional
+    :return: The outcome of the negotiation
+    :rtype: NegotiationResult
+    """
+    agent_a = spec_a.make_agent(scenario.neg_space, scenario.utilities_a)
+    agent_b = spec_b.make_agent(scenario.neg_space, scenario.utilities_b)
+
+    start = perf_counter()
+    successful = agent_a.negotiate(agent_b)
+    duration = perf_counter() - start
+
+    agreement = None
+    utility_a = None
+    utility_b = None
+    if successful:
+        agreement = agent_a._transcript.last.offer
+        utility_a = agent_a._engine.calc_offer_utility(agreement)
+        utility_b = agent_b._engine.calc_offer_utility(agreement)
+
+    return NegotiationResult(negotiation_id, scenario_index, spec_a.name, spec_b.name,
+                             successful, agreement, utility_a, utility_b,
+                             len(agent_a._transcript), duration)
+
+
+# set in every worker process by _init_worker so the specifications and scenarios
+# only have to be sent once per process instead of once per negotiation
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_worker(specs: Sequence[AgentSpec], scenarios: Sequence[Scenario]) -> None:
+    _WORKER_STATE["specs"] = specs
+    _WORKER_STATE["scenarios"] = scenarios
+
+
+def _run_chunk(chunk: Sequence[Pairing], seed: int) -> List[NegotiationResult]:
+    return _run_pairings(_WORKER_STATE["specs"], _WORKER_STATE["scenarios"], chunk, seed)
+
+
+def _run_pairings(specs: Sequence[AgentSpec], scenarios: Sequence[Scenario],
+                  chunk: Sequence[Pairing], seed: int) -> List[NegotiationResult]:
+    results = []
+    for negotiation_id, agent_a, agent_b, scenario in chunk:
+        # seeding per negotiation keeps results independent of how the work is divided
+        np.random.seed((seed + negotiation_id) % 2**32)
+        results.append(run_negotiation(specs[agent_a], specs[agent_b], scenarios[scenario],
+                                       negotiation_id, scenario))
+    return results
+
+
+def run_tournament(specs: Sequence[AgentSpec],
+                   scenarios: Sequence[Scenario],
+                   max_workers: Optional[int] = None,
+                   chunk_size: Optional[int] = None,
+                   self_play: bool = False,
+                   seed: Optional[int] = None) -> Iterator[NegotiationResult]:
+    """
+    Runs a round robin tournament (see :func:`round_robin_pairings`) between the given
+    agents in all of the scenarios, spread out over a pool of processes. The negotiations
+    are sent to the workers in chunks, and results are yielded as soon as a chunk is
+    finished so they are not necessarily in order of their negotiation id.
+
+    >>> for result in run_tournament(specs, scenarios, max_workers=4):
+    ...     print(result.to_dict())
+
+    :param specs: The agents that take part in the tournament
+    :type specs: Sequence[AgentSpec]
+    :param scenarios: The scenarios the agents negotiate in
+    :type scenarios: Sequence[Scenario]
+    :param max_workers: The number of processes to use. If it is 1 all negotiations are \
+        run in the calling process. Defaults to the number of cpus.
+    :type max_workers: Optional[int], optional
+    :param chunk_size: The number of negotiations that are sent to a worker at once. \
+        Defaults to a size that gives every worker about four chunks.
+    :type chunk_size: Optional[int], optional
+    :param self_play: Whether agents also negotiate against themselves, defaults to False
+    :type self_play: bool, optional
+    :param seed: Seed for the random number generator of every negotiation. The same seed \
+        gives the same results regardless of the number of workers. Defaults to a \
+        random seed.
+    :type seed: Optional[int], optional
+    :return: An iterator over the results of all negotiations
+    :rtype: Iterator[NegotiationResult]
+    """
+    pairings = round_robin_pairings(len(specs), len(scenarios), self_play)
+    if not pairings:
+        return
+
+    if seed is None:
+        seed = int(np.random.randint(2**31))
+
+    if not max_workers:
+        max_workers = cpu_count() or 1
+    max_workers = min(max_workers, len(pairings))
+
+    if not chunk_size:
+        chunk_size = max(1, ceil(len(pairings) / (4 * max_workers)))
+    chunks = [pairings[i:i + chunk_size] for i in range(0, len(pairings), chunk_size)]
+
+    if max_workers == 1:
+        for chunk in chunks:
+            # the negotiations reseed the global random number generator,
+            # so restore the caller's state before handing back the results
+            state = np.random.get_state()
+            try:
+                results = _run_pairings(specs, scenarios, chunk, seed)
+            finally:
+                np.random.set_state(state)
+            yield from results
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             initializer=_init_worker,
+                             initargs=(specs, scenarios)) as executor:
+        # keep a bounded number of chunks in flight so results stream back
+        # without submitting (and storing) the whole tournament up front
+        remaining = iter(chunks)
+        pending = set()
+        for chunk in remaining:
+            pending.add(executor.submit(_run_chunk, chunk, seed))
+            if len(pending) >= 2 * max_workers:
+                break
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+                next_chunk = next(remaining, None)
+                if next_chunk is not None:
+                    pending.add(executor.submit(_run_chunk, next_chunk, seed))
@@ -0,0 +1,187 @@
+"""
+This module defines the :class:`ScenarioArchive`, which stores many random scenarios in
+a single file, and :func:`setup_random_scenarios` which creates one.
+
+The archive is a single ``.npy`` file holding one contiguous array of records. Every
+record has the id of the scenario, the number of constraints that were inserted and
+the utility matrices of both agents, so the file doubles as the index. The file is
+opened with `numpy.memmap`, so scenarios are only read from disk when they are used
+and processes that open the same archive share the pages of the operating system's
+file cache instead of each holding a copy.
+
+>>> archive_path = setup_random_scenarios("scenarios", (5, 10), 10000, 3)
+>>> archive = ScenarioArchive(archive_path)
+>>> for neg_space, utils_a, utils_b in archive.iter_neg_scenarios(numb_constraints=2):
+...     negotiate(neg_space, utils_a, utils_b)
+"""
+
+from os import path
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from pyneg.types import AtomicDict, NegSpace
+
+from .utils import SeedLike, generate_random_scenarios, neg_scenario_from_util_matrices
+
+ARCHIVE_FILE_NAME = "scenarios.npy"
+
+
+def _record_dtype(shape: Tuple[int, int], dtype=np.int64) -> np.dtype:
+    return np.dtype([("scenario_id", np.int64),
+                     ("numb_constraints", np.int64),
+                     ("a", dtype, shape),
+                     ("b", dtype, shape)])
+
+
+class ScenarioArchive:
+    """
+    A read only, memory mapped collection of scenarios. See :mod:`pyneg.utils.scenario_archive`.
+    When an archive is pickled, e.g. to send it to a worker process, only it's path is
+    sent and the worker maps the same file.
+    """
+    def __init__(self, file_name: str):
+        """
+        :param file_name: The archive to open
+        :type file_name: str
+        """
+        self.file_name = file_name
+        self.records: np.ndarray = np.load(file_name, mmap_mode="r")
+
+    @staticmethod
+    def create(file_name: str, shape: Tuple[int, int], numb_of_records: int,
+               dtype=np.int64) -> np.ndarray:
+        """
+        Creates an empty archive file with room for `numb_of_records` records and returns
+        them as a writable memory map, so it can be filled without holding all the
+        scenarios in memory. The records should be flushed when they are filled in.
+
+        :param file_name: The file to create
+        :type file_name: str
+        :param shape: The shape of the utility matrices
+        :type shape: Tuple[int, int]
+        :param numb_of_records: The number of records the archive holds
+        :type numb_of_records: int
+        :param dtype: The type of the utilities, defaults to np.int64
+        :return: The records of the new archive
+        :rtype: np.ndarray
+        """
+        return open_memmap(file_name, mode="w+", dtype=_record_dtype(shape, dtype),
+                           shape=(numb_of_records,))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """
+        The shape of the utility matrices in the archive.
+        """
+        return self.records.dtype["a"].shape
+
+    @property
+    def scenario_ids(self) -> np.ndarray:
+        return self.records["scenario_id"]
+
+    @property
+    def constraint_counts(self) -> np.ndarray:
+        return self.records["numb_constraints"]
+
+    def select(self, scenario_ids: Optional[Iterable[int]] = None,
+               numb_constraints: Optional[int] = None) -> np.ndarray:
+        """
+        Finds the records of the given scenarios with the given number of constraints.
+
+        :param scenario_ids: The scenarios to select, defaults to all
+        :type scenario_ids: Optional[Iterable[int]]
+        :param numb_constraints: The number of constraints to select, defaults to all
+        :type numb_constraints: Optional[int]
+        :return: The positions of the selected records in the archive, in order
+        :rtype: np.ndarray
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if scenario_ids is not None:
+            mask &= np.isin(self.scenario_ids, np.fromiter(scenario_ids, dtype=np.int64))
+        if numb_constraints is not None:
+            mask &= self.constraint_counts == numb_constraints
+        return np.flatnonzero(mask)
+
+    def iter_util_matrices(self, scenario_ids: Optional[Iterable[int]] = None,
+                           numb_constraints: Optional[int] = None
+                           ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Yields the utility matrices of the selected records one at a time, as read only
+        views of the archive. see :func:`select`
+
+        :return: The utility matrices of A and B for every selected record
+        :rtype: Iterator[Tuple[np.ndarray, np.ndarray]]
+        """
+        for index in self.select(scenario_ids, numb_constraints):
+            record = self.records[index]
+            yield record["a"], record["b"]
+
+    def iter_neg_scenarios(self, scenario_ids: Optional[Iterable[int]] = None,
+                           numb_constraints: Optional[int] = None
+                           ) -> Iterator[Tuple[NegSpace, AtomicDict, AtomicDict]]:
+        """
+        Lazily constructs the selected scenarios with
+        :func:`neg_scenario_from_util_matrices`. see :func:`select`
+
+        :return: The negotiation space and the utilities of both agents for every \
+            selected record
+        :rtype: Iterator[Tuple[NegSpace, AtomicDict, AtomicDict]]
+        """
+        for utils_a, utils_b in self.iter_util_matrices(scenario_ids, numb_constraints):
+            yield neg_scenario_from_util_matrices(utils_a, utils_b)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __reduce__(self):
+        return (ScenarioArchive, (self.file_name,))
+
+
+def setup_random_scenarios(root_dir, shape, numb_of_scenarios, numb_constraints,
+                           seed: SeedLike = None,
+                           max_workers: Optional[int] = None,
+                           batch_size: int = 1024):
+    """
+    Generates `numb_of_scenarios` utility matrices with uniform random integers as entries.
+    Afterwards a number of constraints is injected into the scenarios and they are all saved
+    in a single :class:`ScenarioArchive` in `root_dir`, with a record for every scenario
+    and every number of constraints below `numb_constraints`. This is useful for setting
+    up larger scale simulations or benchmarks for statistical analysis.
+    The scenarios are generated by :func:`generate_random_scenarios`, so the archive
+    is the same for a given seed no matter how many workers are used.
+
+    :param root_dir: The path to the directory where the archive will be saved.
+    :type root_dir: str
+    :param shape: shape of the utility matrcies that should be generated.
+    :type shape: Tuple[int, int]
+    :param numb_of_scenarios: The number of scenarios to generate
+    :type numb_of_scenarios: int
+    :param numb_constraints: The number of constraints inject into each scenario.
+    :type numb_constraints: int
+    :param seed: see :func:`generate_random_scenarios`
+    :type seed: Union[None, int, SeedSequence]
+    :param max_workers: see :func:`generate_random_scenarios`
+    :type max_workers: Optional[int]
+    :param batch_size: see :func:`generate_random_scenarios`
+    :type batch_size: int
+    :return: The path of the archive
+    :rtype: str
+    """
+    file_name = path.join(root_dir, ARCHIVE_FILE_NAME)
+    records = ScenarioArchive.create(file_name, shape, numb_of_scenarios * numb_constraints)
+    records["scenario_id"] = np.repeat(np.arange(numb_of_scenarios), numb_constraints)
+    records["numb_constraints"] = np.tile(np.arange(numb_constraints), numb_of_scenarios)
+
+    start = 0
+    for batch_a, batch_b in generate_random_scenarios(shape, numb_of_scenarios,
+                                                      numb_constraints, seed,
+                                                      max_workers, batch_size):
+        end = start + batch_a.shape[0] * numb_constraints
+        records["a"][start:end] = batch_a.reshape(-1, *shape)
+        records["b"][start:end] = batch_b.reshape(-1, *shape)
+        start = end
+
+    records.flush()
+    return file_name
@@ -14,22 +14,25 @@ Functions:
     - generate_lex_utility_matrices
     - count_acceptable_offers
     - neg_scenario_from_util_matrices
-    - setup_random_scenarios
     - generate_random_scenario
+    - generate_random_scenarios
     - insert_difficult_constraints
+    - insert_difficult_constraint_levels
 """
 
-from itertools import product
-from os import mkdir, path
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from re import search, sub
-from typing import Dict, List, Tuple
-from uuid import uuid4
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
-from numpy.random import randint
+from numpy.random import Generator, SeedSequence, default_rng, randint
 
 from pyneg.types import NestedDict
 
+SeedLike = Union[None, int, SeedSequence]
+
+
 def issue_value_tuple_from_atom(atom: str) -> Tuple[str, str]:
     """
     takes an atomic representation of an issue value asignement and converts it into a tuple.
@@ -265,11 +268,16 @@ def count_acceptable_offers(
         rho_a_percentile: float,
         rho_b_percentile: float,
         w_a=None,
-        w_b=None) -> Tuple[int, int, int]:
+        w_b=None,
+        block_size: int = 2 ** 16,
+        max_workers: Optional[int] = None) -> Tuple[int, int, int]:
     """
     Counts the number of acceptable offers for each agent as well as the number of offers that is
     acceptable to both. Uses vecor arithmetic to speed up the calculation
     and therefore can only be used in linear additive situations.
+    The offers are enumerated in blocks of `block_size` offers at a time, so the memory
+    needed does not depend on the size of the negotiation space, only the time does.
+    For spaces that are too large to enumerate see :func:`count_acceptable_offers_by_convolution`.
 
     :param u_a: utility matrix for A
     :type u_a: Array[float]
@@ -283,31 +291,216 @@ def count_acceptable_offers(
     :type w_a: Optional[Array[float]]
     :param w_b: distribution of issue importance, defaults to uniform
     :type w_b: Optional[Array[float]]
+    :param block_size: The number of offers that are evaluated at once, defaults to 2**16
+    :type block_size: int
+    :param max_workers: If given, the blocks are divided over this many processes.
+    :type max_workers: Optional[int]
     :return: A tuple with entries representing the number of offers that \
         are acceptable to A, B and both resp.
     :rtype: Tuple[int,int,int]
     """
     n, m = u_a.shape
-    if not w_a:
-        w_a = 1 / n * np.ones((1, n))
-    if not w_b:
-        w_b = 1 / n * np.ones((1, n))
+    if w_a is None:
+        w_a = 1 / n * np.ones(n)
+    if w_b is None:
+        w_b = 1 / n * np.ones(n)
+
+    weighted_a = u_a * np.ravel(w_a)[:, np.newaxis]
+    weighted_b = u_b * np.ravel(w_b)[:, np.newaxis]
+
+    # the best offer picks the best value of every issue. Summing the maxima in the same
+    # order as the utilities of the blocks are summed gives exactly the same float.
+    max_util_a = 0.0
+    max_util_b = 0.0
+    for i in range(n):
+        max_util_a += weighted_a[i].max()
+        max_util_b += weighted_b[i].max()
+
+    rho_a_absolute = rho_a_percentile * max_util_a
+    rho_b_absolute = rho_b_percentile * max_util_b
+
+    total = m ** n
+    blocks = [(start, min(start + block_size, total))
+              for start in range(0, total, block_size)]
+    if not max_workers or max_workers == 1 or len(blocks) == 1:
+        counts = [_count_acceptable_offers_in_blocks(
+            weighted_a, weighted_b, rho_a_absolute, rho_b_absolute, blocks)]
+    else:
+        block_chunks = [blocks[i::max_workers] for i in range(max_workers)]
+        with ProcessPoolExecutor(max_workers) as executor:
+            counts = list(executor.map(
+                _count_acceptable_offers_in_blocks,
+                *zip(*[(weighted_a, weighted_b, rho_a_absolute, rho_b_absolute, chunk)
+                       for chunk in block_chunks if chunk])))
+
+    a_count, b_count, both_count = (sum(count) for count in zip(*counts))
+    return a_count, b_count, both_count
+
+
+def _count_acceptable_offers_in_blocks(weighted_a, weighted_b, rho_a_absolute, rho_b_absolute,
+                                       blocks: List[Tuple[int, int]]) -> Tuple[int, int, int]:
+    """
+    Counts the acceptable offers with indices in the given ranges. An index is decoded
+    into an offer as a mixed radix number, with the last issue changing fastest which is
+    the same order as :func:`itertools.product`.
+    """
+    n, m = weighted_a.shape
+    issue_range = np.arange(n)
+    place_values = m ** np.arange(n - 1, -1, -1, dtype=np.int64)
+    a_count = b_count = both_count = 0
+    for start, stop in blocks:
+        offer_indices = np.arange(start, stop, dtype=np.int64)
+        value_indices = (offer_indices[:, np.newaxis] // place_values) % m
+
+        utils_a = np.zeros(stop - start)
+        utils_b = np.zeros(stop - start)
+        for i in issue_range:
+            utils_a += weighted_a[i, value_indices[:, i]]
+            utils_b += weighted_b[i, value_indices[:, i]]
+
+        a_accepts = utils_a >= rho_a_absolute
+        b_accepts = utils_b >= rho_b_absolute
+        a_count += int(a_accepts.sum())
+        b_count += int(b_accepts.sum())
+        both_count += int(np.logical_and(a_accepts, b_accepts).sum())
+
+    return a_count, b_count, both_count
+
+
+def count_acceptable_offers_by_convolution(
+        u_a,
+        u_b,
+        rho_a_percentile: float,
+        rho_b_percentile: float,
+        w_a=None,
+        w_b=None,
+        num_bins: int = 1000,
+        bounds: bool = False):
+    """
+    Counts the same things as :func:`count_acceptable_offers` but without enumerating the
+    negotiation space. Instead the distribution of utilities is built up one issue at
+    a time by convolving it with the distribution of utilities of the next issue
+    (a 2 dimensional one for the offers acceptable to both). This takes time polynomial in
+    the number of issues and values, so it can be used for spaces with dozens of issues.
+
+    The utilities have to be discretised for this. When the utility matrices only contain
+    integers, the weights are uniform and the integers span at most `num_bins` levels this
+    is done exactly, and so are the counts.
+    Otherwise the utilities of each agent are rounded to about `num_bins` levels, which
+    means offers very close to the reservation value can be counted wrongly. Use `bounds`
+    to get counts that are guaranteed to be below and above the exact ones.
+
+    :param u_a: utility matrix for A
+    :type u_a: Array[float]
+    :param u_b: Utility matrix for B
+    :type u_b: Array[float]
+    :param rho_a_percentile: Percentage of maximum utility that A considders to be acceptable.
+    :type rho_a_percentile: float
+    :param rho_b_percentile: Percentage of maximum utility that B considders to be acceptable.
+    :type rho_b_percentile: float
+    :param w_a: distribution of issue importance, defaults to uniform
+    :type w_a: Optional[Array[float]]
+    :param w_b: distribution of issue importance, defaults to uniform
+    :type w_b: Optional[Array[float]]
+    :param num_bins: The number of levels the utilities are rounded to if they can't be \
+        counted exactly, defaults to 1000
+    :type num_bins: int
+    :param bounds: If True, return a lower and an upper bound for the counts instead
+    :type bounds: bool
+    :return: A tuple with entries representing the number of offers that \
+        are acceptable to A, B and both resp. or if bounds is True a tuple containing \
+        two such tuples with lower and upper bounds.
+    :rtype: Union[Tuple[int,int,int], Tuple[Tuple[int,int,int], Tuple[int,int,int]]]
+    """
+    n, m = u_a.shape
+    deficits_a, budget_a, error_a = _discretise_deficits(u_a, w_a, rho_a_percentile, num_bins)
+    deficits_b, budget_b, error_b = _discretise_deficits(u_b, w_b, rho_b_percentile, num_bins)
+    # counts can exceed what fits in an int64 in large spaces,
+    # so fall back to python integers in that case
+    dtype = object if m ** n >= 2 ** 62 else np.int64
 
-    issue_indices = np.tile(np.arange(n), (m ** n, 1))
-    value_indices = np.array(list(product(*[range(m) for _ in range(n)])))
+    # a sum of deficits can't exceed the sum of the largest deficits of every issue,
+    # so larger limits only add empty bins to the histograms
+    max_deficit_a = int(deficits_a.max(axis=1).sum())
+    max_deficit_b = int(deficits_b.max(axis=1).sum())
 
-    utils_a = np.dot(u_a[issue_indices, value_indices], w_a.T)
-    utils_b = np.dot(u_b[issue_indices, value_indices], w_b.T)
+    def count(slack_a: float, slack_b: float) -> Tuple[int, int, int]:
+        limit_a = min(_integer_budget(budget_a + slack_a), max_deficit_a)
+        limit_b = min(_integer_budget(budget_b + slack_b), max_deficit_b)
+        return (_count_by_convolution([deficits_a], [limit_a], dtype),
+                _count_by_convolution([deficits_b], [limit_b], dtype),
+                _count_by_convolution([deficits_a, deficits_b], [limit_a, limit_b], dtype))
 
-    rho_a_absolute = rho_a_percentile * max(utils_a)
-    rho_b_absolute = rho_b_percentile * max(utils_b)
+    if not bounds:
+        return count(0, 0)
 
-    a_accepts = utils_a >= rho_a_absolute
-    b_accepts = utils_b >= rho_b_absolute
+    return count(-error_a, -error_b), count(error_a, error_b)
 
-    both_accept = np.logical_and(a_accepts, b_accepts)
 
-    return a_accepts.sum(), b_accepts.sum(), both_accept.sum()
+def _discretise_deficits(utils, weights, rho_percentile: float,
+                         num_bins: int) -> Tuple[np.ndarray, float, float]:
+    """
+    Expresses every utility as the (rounded, non negative) amount it is below the best
+    value of it's issue. An offer is then acceptable if the sum of it's deficits is at most
+    the budget that is returned. Also returns the maximum rounding error in the sum
+    of deficits of an offer. The best value of every issue has a deficit of exactly 0 so
+    the best offer is never rounded.
+    """
+    n, _ = utils.shape
+    if weights is None and np.all(utils == np.round(utils)):
+        # uniform weights don't change which offers are acceptable,
+        # so we can use the integers themselves, as long as that doesn't
+        # make the histograms larger than rounding would
+        max_utils = utils.max(axis=1)
+        deficits = (max_utils[:, np.newaxis] - utils).astype(np.int64)
+        budget = (1 - rho_percentile) * float(max_utils.sum())
+        if min(_integer_budget(budget), int(deficits.max(axis=1).sum())) <= num_bins:
+            return deficits, budget, 0.0
+
+    if weights is None:
+        weights = 1 / n * np.ones(n)
+
+    weighted = utils * np.ravel(weights)[:, np.newaxis]
+    max_utils = weighted.max(axis=1)
+    min_utils = weighted.min(axis=1)
+    utility_range = (max_utils - min_utils).sum()
+    resolution = utility_range / num_bins if utility_range > 0 else 1.0
+    deficits = np.round((max_utils[:, np.newaxis] - weighted) / resolution).astype(np.int64)
+    # issues where every value is equally good can't introduce rounding errors
+    rounded_issues = int(np.count_nonzero(max_utils != min_utils))
+    return deficits, (1 - rho_percentile) * max_utils.sum() / resolution, rounded_issues / 2
+
+
+def _integer_budget(budget: float) -> int:
+    return int(np.floor(budget + 1e-9 * max(1.0, abs(budget))))
+
+
+def _count_by_convolution(all_deficits: List[np.ndarray], limits: List[int], dtype) -> int:
+    """
+    Counts the offers whose sum of deficits is within the limit for every one of the given
+    utility functions. The histogram of these sums is built up issue by issue. Since
+    deficits are never negative, partial sums that are already over a limit are dropped.
+    """
+    if any(limit < 0 for limit in limits):
+        return 0
+
+    histogram = np.zeros([limit + 1 for limit in limits], dtype=dtype)
+    histogram[(0,) * len(limits)] = 1
+    num_issues, num_values = all_deficits[0].shape
+
+    for i in range(num_issues):
+        new_histogram = np.zeros_like(histogram)
+        for j in range(num_values):
+            target = []
+            source = []
+            for deficits, limit in zip(all_deficits, limits):
+                shift = min(int(deficits[i, j]), limit + 1)
+                target.append(slice(shift, limit + 1))
+                source.append(slice(0, limit + 1 - shift))
+            new_histogram[tuple(target)] += histogram[tuple(source)]
+        histogram = new_histogram
+
+    return int(histogram.sum())
 
 
 def neg_scenario_from_util_matrices(u_a, u_b):
@@ -337,45 +530,28 @@ def neg_scenario_from_util_matrices(u_a, u_b):
 
     return issues, utils_a, utils_b
 
-def setup_random_scenarios(root_dir, shape, numb_of_scenarios, numb_constraints):
+def _seed_sequence(seed: SeedLike) -> SeedSequence:
     """
-    Generates `numb_of_scenarios` utility matrices with uniform random integers as entries.
-    Afterwards a number of constraints is injected into the scenarios and they are all saved
-    in sepereate directories under `root_dir`. This is useful for setting up larger scale
-    simulations or benchmarks for statistical analysis.
-
-    :param root_dir: The path to the directory where all the scenarios will be saved.
-    :type root_dir: str
-    :param shape: shape of the utility matrcies that should be generated.
-    :type shape: Tuple[int, int]
-    :param numb_of_scenarios: The number of scenarios to generate
-    :type numb_of_scenarios: int
-    :param numb_constraints: The number of constraints inject into each scenario.
-    :type numb_constraints: int
+    Turns the given seed into a seed sequence. Without a seed the entropy is drawn from
+    numpy's global random state, so seeding that still makes the results reproducible.
     """
+    if isinstance(seed, SeedSequence):
+        return seed
+    if seed is None:
+        return SeedSequence(randint(0, 2 ** 31, 4).tolist())
+    return SeedSequence(seed)
+
 
+def _random_base_matrices(shape, rng: Generator) -> Tuple[np.ndarray, np.ndarray]:
     lower = 0
     upper = 100
 
-    base_a = randint(lower, upper, shape[0]*shape[1]).reshape(shape)
-    base_b = randint(lower, upper, shape[0]*shape[1]).reshape(shape)
+    base_a = rng.integers(lower, upper, shape)
+    base_b = rng.integers(lower, upper, shape)
+    return base_a, base_b
 
-    for _ in range(numb_of_scenarios):
-        uuid = uuid4()
 
-        scenario_dir = path.join(root_dir, str(uuid))
-        mkdir(scenario_dir)
-
-        for cntr in range(numb_constraints):
-            instance_dir = path.join(scenario_dir, str(cntr))
-            mkdir(instance_dir)
-            constr_a, constr_b = insert_difficult_constraints(
-                base_a, base_b, cntr)
-            np.save(path.join(instance_dir, "a.npy"), constr_a)
-            np.save(path.join(instance_dir, "b.npy"), constr_b)
-
-
-def generate_random_scenario(shape, numb_constraints):
+def generate_random_scenario(shape, numb_constraints, seed: SeedLike = None):
     """
     Generates a negotiation space and utility functions with random integers between 0 and 100.
     and returns them as a tuple. Useful for testing.
@@ -384,17 +560,71 @@ def generate_random_scenario(shape, numb_constraints):
     :type shape: Tuple[int,int]
     :param numb_constraints: The number of constraints that should be injected.
     :type numb_constraints: int
+    :param seed: The seed of the random number generator, defaults to a seed drawn \
+        from numpy's global random state
+    :type seed: Union[None, int, SeedSequence]
     :return: A tuple of the negotiation space and utility functions.
     :rtype: Tuple[NegSpace,NestedDict,NestedDict]
     """
+    base_a, base_b = _random_base_matrices(shape, default_rng(_seed_sequence(seed)))
+    return insert_difficult_constraints(base_a, base_b, numb_constraints)
 
-    lower = 0
-    upper = 100
 
-    base_a = randint(lower, upper, shape[0]*shape[1]).reshape(shape)
-    base_b = randint(lower, upper, shape[0]*shape[1]).reshape(shape)
+def generate_random_scenarios(shape, numb_of_scenarios, numb_constraints,
+                              seed: SeedLike = None,
+                              max_workers: Optional[int] = None,
+                              batch_size: int = 1024
+                              ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Generates `numb_of_scenarios` independent pairs of utility matrices with random
+    integers between 0 and 100, with every number of constraints below `numb_constraints`
+    injected into each of them (see :func:`insert_difficult_constraints`).
+
+    Every scenario gets it's own seed, spawned from `seed`, so scenario `i` is the same
+    as :func:`generate_random_scenario` with the `i`-th seed of
+    ``SeedSequence(seed).spawn(numb_of_scenarios)``. The scenarios are generated in
+    batches of `batch_size`, which can be divided over multiple processes. Because the
+    seeds don't depend on how the work is divided, the result is exactly the same for
+    any number of workers and any batch size.
+
+    :param shape: The shape of the utility matrices
+    :type shape: Tuple[int,int]
+    :param numb_of_scenarios: The number of scenarios to generate
+    :type numb_of_scenarios: int
+    :param numb_constraints: The number of constraint levels of every scenario
+    :type numb_constraints: int
+    :param seed: The seed to derive the seeds of the scenarios from, defaults to a seed \
+        drawn from numpy's global random state
+    :type seed: Union[None, int, SeedSequence]
+    :param max_workers: If given, the batches are divided over this many processes.
+    :type max_workers: Optional[int]
+    :param batch_size: The number of scenarios generated at once, defaults to 1024
+    :type batch_size: int
+    :return: For every batch, in order, the matrices of A and B with shape \
+        (scenarios, numb_constraints, issues, values)
+    :rtype: Iterator[Tuple[np.ndarray, np.ndarray]]
+    """
+    seeds = _seed_sequence(seed).spawn(numb_of_scenarios)
+    batches = [seeds[start:start + batch_size]
+               for start in range(0, numb_of_scenarios, batch_size)]
+    if not max_workers or max_workers == 1 or len(batches) <= 1:
+        for batch in batches:
+            yield _generate_scenario_batch(shape, batch, numb_constraints)
+        return
 
-    return insert_difficult_constraints(base_a, base_b, numb_constraints)
+    with ProcessPoolExecutor(max_workers) as executor:
+        yield from executor.map(_generate_scenario_batch, repeat(shape), batches,
+                                repeat(numb_constraints))
+
+
+def _generate_scenario_batch(shape, seeds: List[SeedSequence],
+                             numb_constraints: int) -> Tuple[np.ndarray, np.ndarray]:
+    base_a = np.empty((len(seeds), *shape), dtype=np.int64)
+    base_b = np.empty((len(seeds), *shape), dtype=np.int64)
+    for i, scenario_seed in enumerate(seeds):
+        base_a[i], base_b[i] = _random_base_matrices(shape, default_rng(scenario_seed))
+
+    return insert_difficult_constraint_levels(base_a, base_b, numb_constraints)
 
 
 def insert_difficult_constraints(a, b, numb):
@@ -402,7 +632,11 @@ def insert_difficult_constraints(a, b, numb):
     This function wil inject values into utility matrices such that a constraint will
     be created there. `numb` constraints will be created into _each_ of the utility matrices
     for a total of `2*numb` constraints. The constraints will be created at assignments
-    that the opponent has the higest utility to make them extra difficult.
+    that the opponent has the higest utility to make them extra difficult. When the
+    opponent has the same utility for several assignments, the last ones in row major
+    order are picked first.
+    The matrices can have leading dimensions, e.g. (scenarios, issues, values),
+    in which case the constraints are inserted into every matrix at once.
 
     :param a: utility matrix for A
     :type a: array
@@ -414,14 +648,81 @@ def insert_difficult_constraints(a, b, numb):
     :rtype: Tuple[Array, Array]
     """
     constr = -1000
-    a_ret = a.copy()
-    b_ret = b.copy()
-    for ind in map(lambda x: np.unravel_index(x, a.shape), b.flatten().argsort()[::-1][:numb]):
-        i, j = ind
-        a_ret[i, j] = constr
+    a_ret = np.array(a)
+    b_ret = np.array(b)
+    if numb <= 0:
+        return a_ret, b_ret
 
-    for ind in map(lambda x: np.unravel_index(x, a.shape), a.flatten().argsort()[::-1][:numb]):
-        i, j = ind
-        b_ret[i, j] = constr
+    flat_shape = a_ret.shape[:-2] + (-1,)
+    np.put_along_axis(a_ret.reshape(flat_shape),
+                      _top_positions(np.reshape(b, flat_shape), numb), constr, axis=-1)
+    np.put_along_axis(b_ret.reshape(flat_shape),
+                      _top_positions(np.reshape(a, flat_shape), numb), constr, axis=-1)
 
     return a_ret, b_ret
+
+
+def insert_difficult_constraint_levels(a, b, numb_levels):
+    """
+    Like :func:`insert_difficult_constraints`, but for every number of constraints below
+    `numb_levels` at once. The positions of the constraints are only determined once, for
+    the highest level, and every level adds one constraint to the previous one.
+
+    >>> stack_a, stack_b = insert_difficult_constraint_levels(a, b, 3)
+    >>> np.array_equal(stack_a[..., 2, :, :], insert_difficult_constraints(a, b, 2)[0])
+    True
+
+    :param a: utility matrix for A, optionally with leading dimensions
+    :type a: array
+    :param b: utility matrix for B, with the same shape as `a`
+    :type b: array
+    :param numb_levels: The number of levels, level `i` has `i` constraints.
+    :type numb_levels: int
+    :return: The constrained matrices of every level with shape \
+        (..., numb_levels, issues, values)
+    :rtype: Tuple[Array, Array]
+    """
+    constr = -1000
+    a = np.asarray(a)
+    b = np.asarray(b)
+    leading, shape = a.shape[:-2], a.shape[-2:]
+    flat_a = a.reshape(leading + (1, -1))
+    flat_b = b.reshape(leading + (1, -1))
+    stack_a = np.repeat(flat_a, numb_levels, axis=-2)
+    stack_b = np.repeat(flat_b, numb_levels, axis=-2)
+
+    if numb_levels > 1:
+        top_a = _top_positions(flat_b, numb_levels - 1)
+        top_b = _top_positions(flat_a, numb_levels - 1)
+        # the i-th highest position is constrained in every level above i
+        for i in range(top_a.shape[-1]):
+            np.put_along_axis(stack_a[..., i + 1:, :], top_a[..., i:i + 1], constr, axis=-1)
+            np.put_along_axis(stack_b[..., i + 1:, :], top_b[..., i:i + 1], constr, axis=-1)
+
+    return (stack_a.reshape(leading + (numb_levels,) + shape),
+            stack_b.reshape(leading + (numb_levels,) + shape))
+
+
+def _top_positions(flat: np.ndarray, numb: int) -> np.ndarray:
+    """
+    Finds the positions of the `numb` highest values along the last axis, from high to
+    low. Equal values are ordered from the last position to the first. The candidates are
+    found with argpartition so only the selected positions have to be sorted.
+    """
+    size = flat.shape[-1]
+    numb = min(numb, size)
+    candidates = np.argpartition(flat, size - numb, axis=-1)[..., size - numb:]
+    threshold = np.take_along_axis(flat, candidates, axis=-1).min(axis=-1, keepdims=True)
+
+    # everything above the threshold is selected, the remaining positions go to the
+    # last of the values that equal it
+    above = flat > threshold
+    equal = flat == threshold
+    remaining = numb - above.sum(axis=-1, keepdims=True)
+    equal_from_end = np.cumsum(equal[..., ::-1], axis=-1)[..., ::-1]
+    selected = above | (equal & (equal_from_end <= remaining))
+
+    positions = np.nonzero(selected)[-1].reshape(flat.shape[:-1] + (numb,))
+    values = np.take_along_axis(flat, positions, axis=-1)
+    order = np.lexsort((positions, values), axis=-1)[..., ::-1]
+    return np.take_along_axis(positions, order, axis=-1)
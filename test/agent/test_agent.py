@@ -286,4 +286,33 @@ class TestAgent(TestCase):
 
         self.agent.send_message(self.opponent, self.agent.generate_next_message())
         self.agent._wait_for_response(self.opponent)
-        self.assertTrue(self.agent._should_exit())
\ No newline at end of file
+        self.assertTrue(self.agent._should_exit())
+
+    def test_records_negotiation_stats_when_profiling(self):
+        self.assertIsNone(self.agent.negotiation_stats)
+        self.agent = make_linear_concession_agent(
+            "agent", self.neg_space, self.utilities, 0.95, self.non_agreement_cost)
+        self.opponent = make_linear_concession_agent(
+            "opponent", self.neg_space, {"integer_5": 100}, 0.95, self.non_agreement_cost)
+        self.agent.enable_profiling()
+
+        self.assertFalse(self.agent.negotiate(self.opponent))
+        stats = self.agent.negotiation_stats
+        self.assertEqual(len(stats.rounds), len(self.agent._transcript) // 2 + 1)
+        totals = stats.totals()
+        offers_sent = [msg for msg in self.agent._transcript
+                       if msg.is_offer() and msg.sender_name == "agent"]
+        offers_received = [msg for msg in self.agent._transcript
+                           if msg.is_offer() and msg.sender_name == "opponent"]
+        self.assertGreaterEqual(totals["generation"].calls, len(offers_sent))
+        self.assertEqual(totals["acceptance"].calls, len(offers_received))
+        self.assertEqual(totals["constraints"].calls, len(offers_received))
+        self.assertGreater(stats.total_time, 0)
+
+        self.agent.negotiate(self.opponent)
+        self.assertIsNot(self.agent.negotiation_stats, stats)
+
+        self.agent.disable_profiling()
+        self.assertIsNone(self.agent.negotiation_stats)
+        self.assertNotIn("_parse_response", vars(self.agent))
+        self.assertNotIn("generate_offer", vars(self.agent._engine))
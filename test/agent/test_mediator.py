@@ -0,0 +1,109 @@
+# pylint: disable=protected-access
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import Mock
+
+import numpy as np
+
+from pyneg.agent import Mediator, make_linear_concession_agent, run_negotiations_async
+from pyneg.utils import neg_scenario_from_util_matrices
+
+
+class TestMediator(TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.neg_space, self.utilities, self.opponent_utilities = \
+            neg_scenario_from_util_matrices(np.random.randint(0, 100, (4, 10)),
+                                            np.random.randint(0, 100, (4, 10)))
+        self.non_agreement_cost = -1000
+        self.agent = make_linear_concession_agent(
+            "agent", self.neg_space, self.utilities, 0.9, self.non_agreement_cost)
+        self.opponent = make_linear_concession_agent(
+            "opponent", self.neg_space, self.opponent_utilities, 0.9, self.non_agreement_cost)
+
+    def test_messages_are_recorded_once_in_shared_transcript(self):
+        mediator = Mediator(self.agent, self.opponent)
+        mediator.run()
+        self.assertIs(self.agent._transcript, self.opponent._transcript)
+        self.assertEqual(len(mediator.transcript), mediator.rounds)
+        self.assertEqual(len(set(map(id, mediator.transcript))), mediator.rounds)
+
+    def test_negotiation_ends_without_agreement_after_max_rounds(self):
+        successful = self.agent.negotiate(self.opponent, max_rounds=3)
+        self.assertFalse(successful)
+        self.assertFalse(self.agent.negotiation_active)
+        self.assertFalse(self.opponent.negotiation_active)
+        # three offers and the termination message
+        self.assertEqual(len(self.agent._transcript), 4)
+        self.assertTrue(self.agent._transcript[-1].is_termination())
+
+    def test_negotiation_ends_without_agreement_after_deadline(self):
+        self.assertFalse(self.agent.negotiate(self.opponent, deadline=0))
+        self.assertEqual(len(self.agent._transcript), 1)
+        self.assertTrue(self.opponent._transcript[-1].is_termination())
+
+    def test_long_negotiation_does_not_grow_call_stack(self):
+        neg_space, utilities, opponent_utilities = neg_scenario_from_util_matrices(
+            np.arange(40).reshape((2, 20)), 39 - np.arange(40).reshape((2, 20)))
+        agent = make_linear_concession_agent(
+            "agent", neg_space, utilities, 0.5, self.non_agreement_cost)
+        opponent = make_linear_concession_agent(
+            "opponent", neg_space, opponent_utilities, 0.5, self.non_agreement_cost)
+        depths = []
+        for negotiator in (agent, opponent):
+            parse_response = negotiator._parse_response
+
+            def record_depth(message, parse_response=parse_response):
+                depths.append(len(inspect.stack(context=0)))
+                return parse_response(message)
+
+            negotiator._parse_response = record_depth
+
+        self.assertTrue(agent.negotiate(opponent))
+        self.assertGreater(len(agent._transcript), 50)
+        self.assertEqual(len(depths), len(agent._transcript))
+        self.assertEqual(len(set(depths)), 1)
+
+    def test_agreement_is_last_offer_received(self):
+        self.agent = make_linear_concession_agent(
+            "agent", self.neg_space, self.utilities, 0.7, self.non_agreement_cost)
+        self.opponent = make_linear_concession_agent(
+            "opponent", self.neg_space, self.opponent_utilities, 0.7, self.non_agreement_cost)
+        self.assertTrue(self.agent.negotiate(self.opponent))
+        self.assertEqual(self.agent._transcript[-1].offer, self.agent._transcript[-2].offer)
+
+    def test_async_negotiation_equals_sync_negotiation(self):
+        sync_agent = make_linear_concession_agent(
+            "agent", self.neg_space, self.utilities, 0.7, self.non_agreement_cost)
+        sync_opponent = make_linear_concession_agent(
+            "opponent", self.neg_space, self.opponent_utilities, 0.7, self.non_agreement_cost)
+        self.agent = make_linear_concession_agent(
+            "agent", self.neg_space, self.utilities, 0.7, self.non_agreement_cost)
+        self.opponent = make_linear_concession_agent(
+            "opponent", self.neg_space, self.opponent_utilities, 0.7, self.non_agreement_cost)
+
+        self.assertEqual(sync_agent.negotiate(sync_opponent),
+                         asyncio.run(self.agent.negotiate_async(self.opponent)))
+        self.assertEqual(sync_agent._transcript, self.agent._transcript)
+
+    def test_runs_many_negotiations_concurrently(self):
+        pairs = [(make_linear_concession_agent(f"agent{i}", self.neg_space, self.utilities,
+                                               0.7, self.non_agreement_cost),
+                  make_linear_concession_agent(f"opponent{i}", self.neg_space,
+                                               self.opponent_utilities, 0.7,
+                                               self.non_agreement_cost))
+                 for i in range(50)]
+        with ThreadPoolExecutor(4) as executor:
+            results = asyncio.run(run_negotiations_async(
+                pairs, max_concurrent=20, executor=executor))
+        self.assertEqual(results, [True] * 50)
+        self.assertEqual(len({len(agent._transcript) for agent, _ in pairs}), 1)
+
+    def test_async_message_generation_terminates_instead_of_raising(self):
+        self.agent._call_for_negotiation(self.opponent, self.neg_space)
+        self.agent._engine.generate_offer = Mock(side_effect=StopIteration())
+        message = asyncio.run(self.agent.generate_next_message_async())
+        self.assertTrue(message.is_termination())
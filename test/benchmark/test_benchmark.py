@@ -0,0 +1,78 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from pyneg.benchmark import (BenchmarkResult, benchmark_import, compare_results,
+                             default_agent_specs, make_benchmark_scenarios, read_results,
+                             run_benchmarks, write_results)
+from pyneg.benchmark.__main__ import main
+
+
+class TestBenchmark(TestCase):
+
+    def setUp(self):
+        self.scenarios = make_benchmark_scenarios([(2, 3)])
+        self.specs = [spec for spec in default_agent_specs()
+                      if spec.name in ("linear concession", "constrained linear concession")]
+
+    def test_makes_scenarios_for_every_shape(self):
+        self.assertEqual([scenario.name for scenario in make_benchmark_scenarios([(2, 3), (3, 4)])],
+                         ["lex 2x3", "gradient 2x3", "random 2x3",
+                          "lex 3x4", "gradient 3x4", "random 3x4"])
+
+    def test_runs_every_benchmark(self):
+        results = run_benchmarks(self.specs, self.scenarios[:1], repeat=2, number=2)
+        keys = {result.key for result in results}
+        for spec in self.specs:
+            self.assertIn(("negotiate", "lex 2x3", spec.name), keys)
+            self.assertIn(("generate_offer", "lex 2x3", spec.name), keys)
+            self.assertIn(("calc_offer_utility", "lex 2x3", spec.name), keys)
+        self.assertIn(("add_constraint", "lex 2x3", "constrained linear concession"), keys)
+        self.assertNotIn(("add_constraint", "lex 2x3", "linear concession"), keys)
+        self.assertIn(("Offer.__hash__", "lex 2x3", ""), keys)
+        self.assertTrue(all(len(result.times) == 2 for result in results))
+
+    def test_writes_and_reads_results(self):
+        results = run_benchmarks(self.specs[:1], self.scenarios[:1], repeat=1, number=1)
+        with TemporaryDirectory() as tmp_dir:
+            file_name = path.join(tmp_dir, "results.json")
+            write_results(results, file_name)
+            read = read_results(file_name)
+
+        self.assertEqual(set(read.keys()), {result.key for result in results})
+        for result in results:
+            self.assertEqual(read[result.key], result.to_dict())
+
+    def test_importing_pyneg_doesnt_import_problog(self):
+        result = benchmark_import("pyneg", repeat=1)
+        self.assertEqual(result.key, ("import", "pyneg", ""))
+        self.assertEqual(len(result.times), 1)
+        self.assertFalse(result.info["imports_problog"])
+
+        self.assertTrue(benchmark_import("pyneg.engine.dtp_generator",
+                                         repeat=1).info["imports_problog"])
+
+    def test_flags_regressions(self):
+        baseline = {result.key: result.to_dict() for result in [
+            BenchmarkResult("negotiate", "lex 2x3", "a", [1.0], 1),
+            BenchmarkResult("negotiate", "lex 2x3", "b", [1.0], 1),
+            BenchmarkResult("negotiate", "lex 2x3", "c", [1.0], 1)]}
+        current = {result.key: result.to_dict() for result in [
+            BenchmarkResult("negotiate", "lex 2x3", "a", [1.1], 1),
+            BenchmarkResult("negotiate", "lex 2x3", "b", [2.0], 1),
+            BenchmarkResult("negotiate", "lex 2x3", "d", [1.0], 1)]}
+
+        comparisons = compare_results(baseline, current, tolerance=0.2)
+        self.assertEqual([comparison.key[2] for comparison in comparisons], ["b", "a"])
+        self.assertEqual([comparison.regression for comparison in comparisons], [True, False])
+
+    def test_command_line(self):
+        with TemporaryDirectory() as tmp_dir, redirect_stdout(StringIO()) as out:
+            file_name = path.join(tmp_dir, "results.json")
+            self.assertEqual(main(["run", file_name, "--shapes", "2x3",
+                                   "--agents", "linear concession",
+                                   "--repeat", "1", "--number", "1"]), 0)
+            self.assertEqual(main(["compare", file_name, file_name, "--tolerance", "0"]), 0)
+        self.assertIn("0 of", out.getvalue())
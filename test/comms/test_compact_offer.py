@@ -0,0 +1,91 @@
+import gc
+import pickle
+from unittest import TestCase
+
+from pyneg.comms import CompactOffer, Offer, OfferSchema
+
+
+class TestCompactOffer(TestCase):
+
+    def setUp(self):
+        self.neg_space = {
+            "boolean": [True, False],
+            "integer": list(range(10)),
+            "float": [float("{0:.2f}".format(0.1 * i)) for i in range(10)]
+        }
+        self.schema = OfferSchema.from_neg_space(self.neg_space)
+
+        self.nested_test_offer = {
+            "boolean": {"True": 1, "False": 0},
+            "integer": {str(i): 0 for i in range(10)},
+            "float": {"{0:.1f}".format(i * 0.1): 0 for i in range(10)}
+        }
+        self.nested_test_offer["integer"]["3"] = 1
+        self.nested_test_offer['float']["0.6"] = 1
+        self.nested_test_offer = Offer(self.nested_test_offer)
+
+        self.compact_test_offer = self.schema.offer_from_indices((0, 3, 6))
+
+    def test_schemas_are_interned(self):
+        other_schema = OfferSchema.from_neg_space(
+            {issue: list(map(str, values)) for issue, values in self.neg_space.items()})
+        self.assertIs(self.schema, other_schema)
+        self.assertIs(OfferSchema.get(self.schema.schema_id), self.schema)
+
+    def test_unused_schemas_are_dropped(self):
+        schema = OfferSchema.from_neg_space({"unused": ["A", "B"]})
+        schema_id = schema.schema_id
+        offer = schema.offer_from_indices((1,))
+        del schema
+        gc.collect()
+        self.assertIs(OfferSchema.get(schema_id), offer.schema)
+
+        del offer
+        gc.collect()
+        with self.assertRaises(KeyError):
+            OfferSchema.get(schema_id)
+
+    def test_different_neg_spaces_get_different_schemas(self):
+        other_schema = OfferSchema.from_neg_space({"boolean": [True, False]})
+        self.assertIsNot(self.schema, other_schema)
+        self.assertNotEqual(self.schema.schema_id, other_schema.schema_id)
+
+    def test_get_chosen_value(self):
+        self.assertEqual(self.compact_test_offer.get_chosen_value("boolean"), "True")
+        self.assertEqual(self.compact_test_offer.get_chosen_value("integer"), "3")
+        self.assertEqual(self.compact_test_offer.get_chosen_value("float"), "0.6")
+
+    def test_equal_to_and_hashes_like_regular_offer(self):
+        self.assertEqual(self.compact_test_offer, self.nested_test_offer)
+        self.assertEqual(self.nested_test_offer, self.compact_test_offer)
+        self.assertEqual(hash(self.compact_test_offer), hash(self.nested_test_offer))
+        self.assertIn(self.nested_test_offer, {self.compact_test_offer})
+
+    def test_compact_round_trip(self):
+        compact = self.schema.compact(self.nested_test_offer)
+        self.assertEqual(compact.indices, (0, 3, 6))
+        self.assertEqual(compact.to_offer(), self.nested_test_offer)
+        self.assertEqual(compact.values_by_issue, self.nested_test_offer.values_by_issue)
+
+    def test_representations_match_regular_offer(self):
+        self.assertEqual(self.compact_test_offer.get_sparse_repr(),
+                         self.nested_test_offer.get_sparse_repr())
+        self.assertEqual(self.compact_test_offer.get_sparse_str_repr(),
+                         self.nested_test_offer.get_sparse_str_repr())
+        self.assertEqual(self.compact_test_offer.get_problog_dists(),
+                         self.nested_test_offer.get_problog_dists())
+
+    def test_invalid_indices_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.schema.offer_from_indices((0, 3))
+        with self.assertRaises(ValueError):
+            self.schema.offer_from_indices((2, 3, 6))
+
+    def test_has_no_instance_dict(self):
+        with self.assertRaises(AttributeError):
+            self.compact_test_offer.some_attribute = 1
+
+    def test_pickle_keeps_schema_interned(self):
+        copy = pickle.loads(pickle.dumps(self.compact_test_offer))
+        self.assertEqual(copy, self.compact_test_offer)
+        self.assertIs(copy.schema, self.schema)
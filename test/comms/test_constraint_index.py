@@ -0,0 +1,68 @@
+from unittest import TestCase
+
+from pyneg.comms import AtomicConstraint, ConstraintIndex, Offer, OfferSchema
+from pyneg.engine import Strategy
+
+
+class TestConstraintIndex(TestCase):
+
+    def setUp(self):
+        self.neg_space = {
+            "boolean": ["True", "False"],
+            "integer": list(map(str, range(10))),
+        }
+        self.schema = OfferSchema.from_neg_space(self.neg_space)
+        self.constraints = {AtomicConstraint("integer", "3"), AtomicConstraint("integer", "5")}
+        self.index = ConstraintIndex(self.constraints, self.schema)
+
+        self.violating_offer = Offer({
+            "boolean": {"True": 1.0, "False": 0.0},
+            "integer": {str(i): 1.0 if i == 5 else 0.0 for i in range(10)}
+        })
+        self.valid_offer = Offer({
+            "boolean": {"True": 1.0, "False": 0.0},
+            "integer": {str(i): 1.0 if i == 4 else 0.0 for i in range(10)}
+        })
+
+    def test_behaves_like_a_set(self):
+        self.assertEqual(self.index, self.constraints)
+        self.assertEqual(len(self.index), 2)
+        self.index.add(AtomicConstraint("integer", "3"))
+        self.assertEqual(len(self.index), 2)
+        self.index.discard(AtomicConstraint("integer", "3"))
+        self.assertEqual(self.index, {AtomicConstraint("integer", "5")})
+        self.assertEqual(self.index.get_constrained_values("integer"), {"5"})
+
+    def test_checks_assignments(self):
+        self.assertFalse(self.index.is_satisfied_by_assignment("integer", "3"))
+        self.assertTrue(self.index.is_satisfied_by_assignment("integer", "4"))
+        self.assertTrue(self.index.is_satisfied_by_assignment("boolean", "True"))
+
+    def test_finds_violated_constraint(self):
+        self.assertEqual(self.index.find_violated_constraint(self.violating_offer),
+                         AtomicConstraint("integer", "5"))
+        self.assertIsNone(self.index.find_violated_constraint(self.valid_offer))
+        self.assertFalse(self.index.is_satisfied_by_offer(self.violating_offer))
+        self.assertTrue(self.index.is_satisfied_by_offer(self.valid_offer))
+
+    def test_checks_compact_offers_with_bitmasks(self):
+        self.assertEqual(self.index.get_mask("integer"), (1 << 3) | (1 << 5))
+        self.assertEqual(self.index.find_violated_constraint(self.schema.compact(
+            self.violating_offer)), AtomicConstraint("integer", "5"))
+        self.assertTrue(self.index.is_satisfied_by_offer(self.schema.compact(self.valid_offer)))
+        self.index.discard(AtomicConstraint("integer", "5"))
+        self.assertTrue(self.index.is_satisfied_by_offer(self.schema.compact(
+            self.violating_offer)))
+
+    def test_unconstrained_values(self):
+        self.assertEqual(self.index.get_unconstrained_values("integer", self.neg_space["integer"]),
+                         set(self.neg_space["integer"]) - {"3", "5"})
+
+    def test_checks_strategies(self):
+        strat = Strategy({
+            "boolean": {"True": 0.5, "False": 0.5},
+            "integer": {str(i): 0.0 if i in (3, 5) else 1 / 8 for i in range(10)}
+        })
+        self.assertTrue(self.index.is_satisfied_by_strat(strat))
+        self.index.add(AtomicConstraint("boolean", "True"))
+        self.assertFalse(self.index.is_satisfied_by_strat(strat))
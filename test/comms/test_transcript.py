@@ -0,0 +1,110 @@
+# pylint: disable=protected-access
+from io import StringIO
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+
+from pyneg.agent import make_constrained_linear_concession_agent
+from pyneg.comms import (AtomicConstraint, FileSink, InMemoryTranscript, Message, NullSink,
+                         Offer, iter_transcript_file, read_transcript_file)
+from pyneg.types import MessageType
+from pyneg.utils import neg_scenario_from_util_matrices
+
+
+class TestTranscript(TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.neg_space, self.utilities, self.opponent_utilities = \
+            neg_scenario_from_util_matrices(np.random.randint(0, 100, (3, 5)),
+                                            np.random.randint(0, 100, (3, 5)))
+        self.agent = make_constrained_linear_concession_agent(
+            "agent", self.neg_space, self.utilities, 0.8, -1000)
+        self.opponent = make_constrained_linear_concession_agent(
+            "opponent", self.neg_space, self.opponent_utilities, 0.8, -1000)
+
+    def negotiate_in_memory(self):
+        agent = make_constrained_linear_concession_agent(
+            "agent", self.neg_space, self.utilities, 0.8, -1000)
+        opponent = make_constrained_linear_concession_agent(
+            "opponent", self.neg_space, self.opponent_utilities, 0.8, -1000)
+        agent.negotiate(opponent)
+        return agent._transcript
+
+    def test_in_memory_by_default(self):
+        self.agent.negotiate(self.opponent)
+        self.assertIsInstance(self.agent._transcript, InMemoryTranscript)
+        self.assertEqual(self.agent._transcript.last, self.agent._transcript[-1])
+        self.assertEqual(list(self.agent._transcript), self.agent._transcript.messages)
+
+    def test_null_sink_only_keeps_outcome(self):
+        expected = self.negotiate_in_memory()
+        self.agent.set_transcript_sink(NullSink())
+        self.agent.negotiate(self.opponent)
+        self.assertNotIsInstance(self.agent._transcript, InMemoryTranscript)
+        self.assertEqual(len(self.agent._transcript), len(expected))
+        self.assertEqual(self.agent._transcript.last, expected.last)
+
+    def test_file_sink_round_trip(self):
+        expected = self.negotiate_in_memory()
+        with TemporaryDirectory() as tmp_dir:
+            file_name = path.join(tmp_dir, "transcripts.jsonl")
+            with FileSink(file_name, first_id=3) as sink:
+                self.agent.set_transcript_sink(sink)
+                self.agent.negotiate(self.opponent)
+            transcripts = read_transcript_file(file_name)
+
+        self.assertEqual(list(transcripts.keys()), [3])
+        read = transcripts[3]
+        self.assertEqual(read, expected)
+        self.assertEqual([msg.sender_name for msg in read],
+                         [msg.sender_name for msg in expected])
+        self.assertEqual([msg.constraint for msg in read],
+                         [msg.constraint for msg in expected])
+
+    def test_refused_negotiation_writes_nothing(self):
+        other_neg_space, other_utilities, _ = neg_scenario_from_util_matrices(
+            np.random.randint(0, 100, (2, 4)), np.random.randint(0, 100, (2, 4)))
+        opponent = make_constrained_linear_concession_agent(
+            "opponent", other_neg_space, other_utilities, 0.8, -1000)
+        file = StringIO()
+        sink = FileSink(file)
+        self.agent.set_transcript_sink(sink)
+        self.assertFalse(self.agent.negotiate(opponent))
+        sink.close()
+
+        self.assertEqual(file.getvalue(), "")
+        self.assertEqual(sink.next_id, 0)
+
+    def test_file_format_is_compact(self):
+        file = StringIO()
+        sink = FileSink(file)
+        transcript = sink.new_transcript({"first": ["a", "b"], "second": ["c", "d"]})
+        offer = Offer({"first": {"a": 0.0, "b": 1.0}, "second": {"c": 1.0, "d": 0.0}})
+        transcript.append(Message("A", "B", MessageType.OFFER, offer,
+                                  AtomicConstraint("first", "a")))
+        transcript.append(Message("B", "A", MessageType.EXIT, None))
+        sink.close()
+
+        self.assertEqual(file.getvalue().splitlines(), [
+            '["N",0,["first","second"],[["a","b"],["c","d"]]]',
+            '["M",0,"A","B","OFFER",[1,0],["first","a"]]',
+            '["M",0,"B","A","EXIT",null,null]'])
+        self.assertEqual(len(transcript), 2)
+        self.assertTrue(transcript.last.is_termination())
+
+    def test_reads_interleaved_negotiations(self):
+        with TemporaryDirectory() as tmp_dir:
+            file_name = path.join(tmp_dir, "transcripts.jsonl")
+            with FileSink(file_name) as sink:
+                first = sink.new_transcript({"first": ["a", "b"]})
+                second = sink.new_transcript({"other": ["c", "d", "e"]})
+                first.append(Message("A", "B", MessageType.EXIT, None))
+                second.append(Message("C", "D", MessageType.OFFER, Offer(
+                    {"other": {"c": 0.0, "d": 0.0, "e": 1.0}})))
+            messages = list(iter_transcript_file(file_name))
+
+        self.assertEqual([negotiation_id for negotiation_id, _ in messages], [0, 1])
+        self.assertEqual(messages[1][1].offer.get_chosen_value("other"), "e")
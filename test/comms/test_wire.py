@@ -0,0 +1,85 @@
+from unittest import TestCase
+
+from pyneg.comms import (AtomicConstraint, Message, Offer, OfferSchema, iter_messages,
+                         pack_message, pack_messages, unpack_message)
+from pyneg.types import MessageType
+
+
+class TestWire(TestCase):
+
+    def setUp(self):
+        self.neg_space = {
+            "boolean": ["True", "False"],
+            "integer": list(map(str, range(10))),
+        }
+        self.schema = OfferSchema.from_neg_space(self.neg_space)
+        self.offer = Offer({
+            "boolean": {"True": 0.0, "False": 1.0},
+            "integer": {str(i): 1.0 if i == 7 else 0.0 for i in range(10)}
+        })
+        self.messages = [
+            Message("agent", "opponent", MessageType.OFFER, self.schema.compact(self.offer)),
+            Message("opponent", "agent", MessageType.OFFER, self.schema.offer_from_indices(
+                (0, 2)), AtomicConstraint("integer", "7")),
+            Message("agent", "opponent", MessageType.ACCEPT, self.schema.offer_from_indices(
+                (0, 2))),
+            Message("agent", "opponent", MessageType.EXIT, None),
+        ]
+
+    def assert_same_message(self, decoded, message):
+        self.assertEqual(decoded, message)
+        self.assertEqual(decoded.sender_name, message.sender_name)
+        self.assertEqual(decoded.recipient_name, message.recipient_name)
+
+    def test_round_trip(self):
+        for message in self.messages:
+            data = pack_message(message)
+            decoded, end = unpack_message(data)
+            self.assertEqual(end, len(data))
+            self.assert_same_message(decoded, message)
+
+    def test_offers_are_decoded_as_value_indices(self):
+        decoded, _ = unpack_message(pack_message(self.messages[1]))
+        self.assertIs(decoded.offer.schema, self.schema)
+        self.assertEqual(decoded.offer.indices, (0, 2))
+        self.assertEqual(decoded.constraint, AtomicConstraint("integer", "7"))
+
+    def test_iterates_over_concatenated_records(self):
+        buffer = bytearray(pack_messages(self.messages))
+        decoded = list(iter_messages(memoryview(buffer)))
+        self.assertEqual(len(decoded), len(self.messages))
+        for decoded_message, message in zip(decoded, self.messages):
+            self.assert_same_message(decoded_message, message)
+
+    def test_offers_that_arent_compact_need_a_schema(self):
+        message = Message("agent", "opponent", MessageType.OFFER, self.offer)
+        with self.assertRaises(ValueError):
+            pack_message(message)
+        decoded, _ = unpack_message(pack_message(message, self.schema))
+        self.assertEqual(decoded.offer, self.offer)
+
+    def test_rejects_invalid_records(self):
+        data = pack_message(self.messages[1])
+        with self.assertRaises(ValueError):
+            unpack_message(data[:-1])
+        # sizes that end the record in it's names or right before it's offer
+        for size in (12, 10 + len("opponent") + len("agent")):
+            truncated = bytearray(data[:size])
+            truncated[:4] = size.to_bytes(4, "little")
+            with self.assertRaises(ValueError):
+                unpack_message(truncated)
+        # a size that ends the record in it's constraint, followed by another record
+        short = bytearray(data)
+        short[:4] = (len(data) - 2).to_bytes(4, "little")
+        with self.assertRaises(ValueError):
+            unpack_message(short + data)
+
+        with self.assertRaises(ValueError):
+            pack_message(Message("a" * 70000, "opponent", MessageType.EXIT, None))
+        many_values = OfferSchema.from_neg_space({"issue": list(range(70000))})
+        with self.assertRaises(ValueError):
+            pack_message(Message("agent", "opponent", MessageType.OFFER,
+                                 many_values.offer_from_indices((69999,))))
+        with self.assertRaises(ValueError):
+            pack_message(Message("agent", "opponent", MessageType.OFFER, self.offer,
+                                 AtomicConstraint("integer", "11")), self.schema)
@@ -0,0 +1,60 @@
+from collections import Counter
+from itertools import product
+from unittest import TestCase
+
+import numpy as np
+
+from pyneg.engine import AcceptanceRegionSampler
+
+
+class TestAcceptanceRegionSampler(TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.utilities = np.random.randint(-5, 10, (4, 5))
+        self.probabilities = np.random.rand(4, 5)
+        self.probabilities[1, 2] = 0
+
+    def brute_force_mass(self, threshold):
+        probs = self.probabilities / self.probabilities.sum(axis=1, keepdims=True)
+        mass = 0.0
+        for offer in product(range(5), repeat=4):
+            if sum(self.utilities[i, j] for i, j in enumerate(offer)) >= threshold:
+                mass += np.prod([probs[i, j] for i, j in enumerate(offer)])
+        return mass
+
+    def test_acceptable_mass_matches_brute_force(self):
+        for threshold in [-100, 0, 10, 15, 20, 100]:
+            sampler = AcceptanceRegionSampler(self.utilities.tolist(),
+                                              self.probabilities.tolist(), threshold)
+            self.assertAlmostEqual(sampler.acceptable_mass(), self.brute_force_mass(threshold))
+
+    def test_samples_are_acceptable_and_possible(self):
+        threshold = self.utilities.max(axis=1).sum() - 5
+        sampler = AcceptanceRegionSampler(self.utilities.tolist(),
+                                          self.probabilities.tolist(), threshold)
+        for offer in sampler.sample(200):
+            self.assertGreaterEqual(self.utilities[np.arange(4), offer].sum(), threshold)
+            self.assertNotEqual(offer[1], 2)
+
+    def test_samples_uniformly_from_acceptable_region(self):
+        sampler = AcceptanceRegionSampler([[3, 2, 1, 0], [3, 2, 1, 0]],
+                                          [[1, 1, 1, 1], [1, 1, 1, 1]], 4)
+        counts = Counter(map(tuple, sampler.sample(6000).tolist()))
+        self.assertEqual(set(counts.keys()),
+                         {(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (2, 0)})
+        for count in counts.values():
+            self.assertAlmostEqual(count / 6000, 1 / 6, delta=0.03)
+
+    def test_no_acceptable_offers(self):
+        sampler = AcceptanceRegionSampler(self.utilities.tolist(),
+                                          self.probabilities.tolist(), 1000)
+        self.assertEqual(sampler.acceptable_mass(), 0)
+        with self.assertRaises(ValueError):
+            sampler.sample(1)
+
+    def test_gives_up_when_node_budget_is_exceeded(self):
+        utilities = np.random.rand(12, 10).tolist()
+        sampler = AcceptanceRegionSampler(utilities, np.ones((12, 10)).tolist(),
+                                          6, max_nodes=100)
+        self.assertIsNone(sampler.acceptable_mass())
@@ -0,0 +1,94 @@
+from unittest import TestCase
+
+from pyneg.comms import AtomicConstraint, Offer
+from pyneg.engine import (CachedEvaluator, ConstrainedLinearEvaluator,
+                          LinearEvaluator, ProblogEvaluator)
+
+
+class CountingEvaluator(LinearEvaluator):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.calls = 0
+
+    def calc_offer_utility(self, offer):
+        self.calls += 1
+        return super().calc_offer_utility(offer)
+
+
+class TestCachedEvaluator(TestCase):
+
+    def setUp(self):
+        self.neg_space = {
+            "boolean": ["True", "False"],
+            "integer": [str(i) for i in range(10)],
+        }
+        self.utilities = {
+            "boolean_True": 100,
+            "boolean_False": 10,
+            "integer_9": 100,
+            "integer_3": 10,
+        }
+        self.weights = {"boolean": 0.5, "integer": 0.5}
+        self.non_agreement_cost = -1000
+
+        self.offers = [Offer({
+            "boolean": {"True": 1.0, "False": 0.0},
+            "integer": {str(i): 1.0 if i == chosen else 0.0 for i in range(10)}
+        }) for chosen in range(10)]
+
+        self.inner = CountingEvaluator(self.utilities, self.weights, self.non_agreement_cost)
+        self.evaluator = CachedEvaluator(self.inner, 4)
+
+    def test_repeated_offers_are_only_evaluated_once(self):
+        first = self.evaluator.calc_offer_utility(self.offers[9])
+        second = self.evaluator.calc_offer_utility(Offer({
+            "integer": {str(i): 1.0 if i == 9 else 0.0 for i in range(10)},
+            "boolean": {"True": 1.0, "False": 0.0}
+        }))
+        self.assertAlmostEqual(first, 100)
+        self.assertEqual(first, second)
+        self.assertEqual(self.inner.calls, 1)
+        self.assertEqual((self.evaluator.hits, self.evaluator.misses), (1, 1))
+
+    def test_least_recently_used_offer_is_evicted(self):
+        for offer in self.offers[:4]:
+            self.evaluator.calc_offer_utility(offer)
+        self.evaluator.calc_offer_utility(self.offers[0])
+        self.evaluator.calc_offer_utility(self.offers[4])
+        self.assertEqual(len(self.evaluator), 4)
+
+        self.evaluator.calc_offer_utility(self.offers[0])
+        self.assertEqual(self.inner.calls, 5)
+        self.evaluator.calc_offer_utility(self.offers[1])
+        self.assertEqual(self.inner.calls, 6)
+
+    def test_cache_is_invalidated_by_new_utilities(self):
+        self.evaluator.calc_offer_utility(self.offers[9])
+        self.evaluator.add_utilities({"integer_9": 0})
+        self.assertAlmostEqual(self.evaluator.calc_offer_utility(self.offers[9]), 50)
+        self.evaluator.set_utilities({"boolean_True": 2})
+        self.assertAlmostEqual(self.evaluator.calc_offer_utility(self.offers[9]), 1)
+        self.assertEqual(self.inner.calls, 3)
+
+    def test_cache_is_invalidated_by_new_constraints(self):
+        evaluator = CachedEvaluator(ConstrainedLinearEvaluator(
+            self.utilities, self.weights, self.non_agreement_cost, -200, set()))
+        self.assertAlmostEqual(evaluator.calc_offer_utility(self.offers[9]), 100)
+        evaluator.add_constraint(AtomicConstraint("integer", "9"))
+        self.assertAlmostEqual(evaluator.calc_offer_utility(self.offers[9]), -200)
+
+    def test_other_attributes_are_taken_from_wrapped_evaluator(self):
+        self.assertIs(self.evaluator.utilities, self.inner.utilities)
+        self.assertAlmostEqual(self.evaluator.calc_assignment_util("integer", "9"), 50)
+
+    def test_unwraps_to_innermost_evaluator(self):
+        self.assertIs(self.evaluator.unwrap(), self.inner)
+        self.assertIs(CachedEvaluator(self.evaluator).unwrap(), self.inner)
+        self.assertIs(self.inner.unwrap(), self.inner)
+
+    def test_wraps_problog_evaluator(self):
+        evaluator = CachedEvaluator(ProblogEvaluator(
+            self.neg_space, self.utilities, self.non_agreement_cost, []))
+        for _ in range(3):
+            self.assertAlmostEqual(evaluator.calc_offer_utility(self.offers[3]), 110)
+        self.assertEqual(evaluator.misses, 1)
@@ -0,0 +1,87 @@
+from unittest import TestCase
+
+import numpy as np
+
+from pyneg.comms import Offer
+from pyneg.engine import CompiledLinearEvaluator, LinearEvaluator
+
+
+class TestCompiledLinearEvaluator(TestCase):
+
+    def setUp(self):
+        self.neg_space = {
+            "boolean": [True, False],
+            "integer": list(range(10)),
+            "float": [float("{0:.2f}".format(0.1 * i)) for i in range(10)]
+        }
+        self.utilities = {
+            "boolean_True": 100,
+            "boolean_False": 10,
+            "integer_9": 100,
+            "integer_3": 10,
+            "integer_1": 0.1,
+            "integer_4": -10,
+            "integer_5": -100,
+            "'float_0.1'": 1
+        }
+        self.non_agreement_cost = -1000
+
+        self.optimal_offer = {
+            "boolean": {"True": 1.0, "False": 0.0},
+            "integer": {str(i): 0.0 for i in range(10)},
+            "float": {"{0:.1f}".format(i * 0.1): 0.0 for i in range(10)}
+        }
+        self.optimal_offer["integer"]["9"] = 1.0
+        self.optimal_offer['float']["0.1"] = 1.0
+        self.optimal_offer = Offer(self.optimal_offer)
+
+        self.nested_test_offer = {
+            "boolean": {"True": 0.0, "False": 1.0},
+            "integer": {str(i): 0.0 for i in range(10)},
+            "float": {"{0:.1f}".format(i * 0.1): 0.0 for i in range(10)}
+        }
+        self.nested_test_offer["integer"]["5"] = 1.0
+        self.nested_test_offer['float']["0.6"] = 1.0
+        self.nested_test_offer = Offer(self.nested_test_offer)
+
+        self.weights = {"boolean": 0.5, "integer": 0.3, "float": 0.2}
+
+        self.evaluator = CompiledLinearEvaluator(
+            self.neg_space, self.utilities, self.weights, self.non_agreement_cost)
+        self.reference = LinearEvaluator(
+            self.utilities, self.weights, self.non_agreement_cost)
+
+    def test_offer_utility_equals_linear_evaluator(self):
+        for offer in [self.optimal_offer, self.nested_test_offer]:
+            self.assertAlmostEqual(self.evaluator.calc_offer_utility(offer),
+                                   self.reference.calc_offer_utility(offer))
+
+    def test_batch_utilities_equal_single_utilities(self):
+        batch = self.evaluator.index_offers([self.optimal_offer, self.nested_test_offer])
+        utils = self.evaluator.calc_offer_utilities(batch)
+        self.assertEqual(utils.shape, (2,))
+        self.assertAlmostEqual(utils[0], self.reference.calc_offer_utility(self.optimal_offer))
+        self.assertAlmostEqual(utils[1], self.reference.calc_offer_utility(self.nested_test_offer))
+
+    def test_index_offer_uses_neg_space_order(self):
+        indices = self.evaluator.index_offer(self.optimal_offer)
+        self.assertEqual(list(indices), [0, 9, 1])
+
+    def test_single_index_vector_is_treated_as_batch_of_one(self):
+        utils = self.evaluator.calc_offer_utilities([0, 9, 1])
+        self.assertEqual(utils.shape, (1,))
+
+    def test_matrix_is_recompiled_after_set_utilities(self):
+        self.evaluator.set_utilities({"boolean_False": 10})
+        utils = self.evaluator.calc_offer_utilities(np.array([[0, 0, 0], [1, 0, 0]]))
+        self.assertAlmostEqual(utils[0], 0)
+        self.assertAlmostEqual(utils[1], 5)
+
+    def test_matrix_is_recompiled_after_add_utilities(self):
+        self.evaluator.add_utilities({"integer_0": 10})
+        self.assertAlmostEqual(self.evaluator.calc_offer_utilities([0, 0, 0])[0], 50 + 3)
+
+    def test_compact_offers_are_scored_directly(self):
+        compact = self.evaluator.schema.compact(self.optimal_offer)
+        self.assertAlmostEqual(self.evaluator.calc_offer_utility(compact),
+                               self.reference.calc_offer_utility(self.optimal_offer))
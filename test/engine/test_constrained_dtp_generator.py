@@ -1,4 +1,5 @@
 from unittest import TestCase
+from unittest.mock import patch
 
 from pyneg.comms import Offer, AtomicConstraint
 from pyneg.engine import ConstrainedDTPGenerator, ConstrainedProblogEvaluator
@@ -93,6 +94,95 @@ class TestConstrainedDTPGenerator(TestCase):
              'integer_4': 0.0,
              'integer_5': 0.0, 'integer_9': 1.0}).get_sparse_repr() in self.generator.generated_offers.keys())
 
+    def test_only_compiles_model_when_it_changes(self):
+        with patch.object(self.generator, "_rank_decisions",
+                          wraps=self.generator._rank_decisions) as rank_decisions:
+            for _ in range(5):
+                self.generator.generate_offer()
+            self.assertEqual(rank_decisions.call_count, 1)
+
+            self.generator.add_constraint(AtomicConstraint("boolean", "False"))
+            offer = self.generator.generate_offer()
+            self.assertEqual(rank_decisions.call_count, 2)
+            self.assertTrue(self.generator.satisfies_all_constraints(offer))
+
+    def test_generates_offers_in_order_without_repeating_them(self):
+        temp_issues = {
+            "first": ["0", "1", "2"],
+            "second": ["0", "1", "2"]
+        }
+        temp_utils = {"first_0": 5, "first_1": 3, "first_2": 0,
+                      "second_0": 2, "second_1": -1, "second_2": 1}
+        self.generator = ConstrainedDTPGenerator(temp_issues, temp_utils,
+                                                 self.non_agreement_cost, 1,
+                                                 [], self.constr_value, set(), False)
+        utils = []
+        offers = set()
+        try:
+            while True:
+                offer = self.generator.generate_offer()
+                offers.add(offer.get_sparse_repr())
+                utils.append(sum(temp_utils["{}_{}".format(issue, value)]
+                                 for issue, value in offer.get_sparse_repr()))
+        except StopIteration:
+            pass
+
+        self.assertEqual(utils, [7, 6, 5, 4, 4, 2, 2, 1])
+        self.assertEqual(len(offers), len(utils))
+
+    def test_only_ranks_acceptable_decisions(self):
+        temp_issues = {"first": ["0", "1", "2"], "second": ["0", "1", "2"]}
+        temp_utils = {"first_0": 5, "first_1": 3, "first_2": 0,
+                      "second_0": 2, "second_1": -1, "second_2": 1}
+        self.generator = ConstrainedDTPGenerator(temp_issues, temp_utils,
+                                                 self.non_agreement_cost, 4,
+                                                 [], self.constr_value, set(), False)
+        scores = [score for score, _ in self.generator._rank_decisions()]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(min(scores), 4)
+
+    def test_extends_partial_offers_lazily(self):
+        temp_issues = {"issue{}".format(i): list(map(str, range(10))) for i in range(8)}
+        self.generator = ConstrainedDTPGenerator(temp_issues, {"issue0_1": 10},
+                                                 self.non_agreement_cost, 1,
+                                                 [], self.constr_value, set(), False)
+        extensions = self.generator._extend_partial_offer({"issue0_1": 1.0})
+        offer = next(extensions)
+        self.assertEqual(offer.get_chosen_value("issue0"), "1")
+        self.assertEqual(len(list(self.generator._extend_partial_offer(
+            {"issue0_1": 1.0}, 5))), 5)
+
+    def test_caps_extensions_of_one_decision(self):
+        temp_issues = {"boolean": ["True", "False"], "dummy": ["1", "2", "3"]}
+        self.generator = ConstrainedDTPGenerator(temp_issues, {"boolean_True": 10},
+                                                 self.non_agreement_cost, 1,
+                                                 [], self.constr_value, set(), False,
+                                                 max_extensions=2)
+        self.assertEqual(self.generator.generate_offer().get_chosen_value("dummy"), "1")
+        self.assertEqual(self.generator.generate_offer().get_chosen_value("dummy"), "2")
+        with self.assertRaises(StopIteration):
+            self.generator.generate_offer()
+
+    def test_caps_proposed_extensions_of_overlapping_decisions(self):
+        temp_issues = {"boolean": ["True", "False"], "dummy": ["1", "2", "3"]}
+        # the second best decision leaves dummy open, so it's first completion
+        # is the offer the best decision already proposed
+        self.generator = ConstrainedDTPGenerator(temp_issues,
+                                                 {"boolean_True": 10, "dummy_1": 1},
+                                                 self.non_agreement_cost, 1,
+                                                 [], self.constr_value, set(), False,
+                                                 max_extensions=1)
+        offers = []
+        try:
+            while True:
+                offers.append(self.generator.generate_offer().get_sparse_str_repr())
+        except StopIteration:
+            pass
+
+        self.assertEqual(offers, [self.generator.schema.offer_from_indices(indices)
+                                  .get_sparse_str_repr()
+                                  for indices in [(0, 0), (0, 1), (1, 0)]])
+
     def test_generates_valid_offers_when_constraints_are_present(self):
         arbitrary_utilities = {
             "boolean_True": 100,
@@ -150,13 +240,11 @@ class TestConstrainedDTPGenerator(TestCase):
     def test_all_values_can_get_constrained(self):
         low_util_dict = {"integer_{i}".format(
             i=i): -100000 for i in range(len(self.neg_space['integer']))}
-        self.generator.add_utilities(low_util_dict)
+        self.assertFalse(self.generator.add_utilities(low_util_dict))
         constraints = self.generator.constraints
-        self.assertTrue(
-            all([constr.issue == "integer" for constr in constraints]))
-        self.assertEqual(
-            len([constr.issue == "integer" for constr in constraints]),
-            len(self.neg_space['integer']))
+        self.assertEqual(constraints.get_constrained_values("integer"),
+                         set(map(str, self.neg_space['integer'])), constraints)
+        self.assertFalse(self.generator.constraints_satisfiable)
 
     def test_multiple_issues_can_get_constrained(self):
         low_util_dict = {"integer_4": -100000, "'float_0.9'": -100000}
@@ -123,14 +123,11 @@ class TestConstrainedEnumGenerator(TestCase):
     def test_all_values_can_get_constrained(self):
         low_util_dict = {"issue2_{i}".format(
             i=i): -100000 for i in range(len(self.neg_space['issue2']))}
-        self.generator.add_utilities(low_util_dict)
+        self.assertFalse(self.generator.add_utilities(low_util_dict))
         constraints = self.generator.constraints
-        snd_issue_constraints = set([constr for constr in constraints if constr.issue ==
-                                     "issue2"])
-        self.assertEqual(constraints, snd_issue_constraints, constraints)
-        self.assertEqual(
-            len(snd_issue_constraints),
-            len(self.neg_space['issue2']), constraints)
+        self.assertEqual(constraints.get_constrained_values("issue2"),
+                         set(map(str, self.neg_space['issue2'])), constraints)
+        self.assertFalse(self.generator.constraints_satisfiable)
 
     def test_multiple_issues_can_get_constrained(self):
         low_util_dict = {"issue2_0": -1000, "issue0_1": -1000}
@@ -257,4 +254,29 @@ class TestConstrainedEnumGenerator(TestCase):
             self.constr_value,
             {AtomicConstraint("issue0", "2")})
 
-        self.generator.generate_offer()
\ No newline at end of file
+        self.generator.generate_offer()
+
+    def test_constraints_during_negotiation_dont_repeat_offers(self):
+        first = self.generator.generate_offer()
+        second = self.generator.generate_offer()
+        self.generator.add_constraint(AtomicConstraint("issue1", "1"))
+        offers = [first, second]
+        while True:
+            try:
+                offers.append(self.generator.generate_offer())
+            except StopIteration:
+                break
+
+        self.assertEqual(len(offers), len(set(offers)))
+        self.assertTrue(all(self.generator.satisfies_all_constraints(offer)
+                            for offer in offers[2:]))
+        # 3 * 2 * 2 offers satisfy both constraints, two of which were already generated
+        self.assertEqual(len(offers), 2 + 3 * 2 * 2 - 2)
+
+    def test_offers_stay_in_dec_order_of_util_when_constraints_arrive(self):
+        utils = [self.evaluator.calc_offer_utility(self.generator.generate_offer())]
+        for value in ["0", "1"]:
+            self.generator.add_constraint(AtomicConstraint("issue0", value))
+            utils.append(self.evaluator.calc_offer_utility(self.generator.generate_offer()))
+            utils.append(self.evaluator.calc_offer_utility(self.generator.generate_offer()))
+        self.assertEqual(utils, sorted(utils, reverse=True))
@@ -95,14 +95,11 @@ class TestConstrainedRandomGenerator(TestCase):
     def test_all_values_can_get_constrained(self):
         low_util_dict = {"integer_{i}".format(
             i=i): -100000 for i in range(len(self.neg_space['integer']))}
-        self.generator.add_utilities(low_util_dict)
+        self.assertFalse(self.generator.add_utilities(low_util_dict))
         constraints = self.generator.constraints
-        integer_constraints = set([constr for constr in constraints if constr.issue ==
-                                   "integer"])
-        self.assertEqual(constraints, integer_constraints, constraints)
-        self.assertEqual(
-            len(integer_constraints),
-            len(self.neg_space['integer']), constraints)
+        self.assertEqual(constraints.get_constrained_values("integer"),
+                         set(map(str, self.neg_space['integer'])), constraints)
+        self.assertFalse(self.generator.constraints_satisfiable)
 
     def test_multiple_issues_can_get_constrained(self):
         low_util_dict = {"integer_4": -100000, "'float_0.9'": -100000}
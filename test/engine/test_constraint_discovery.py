@@ -0,0 +1,69 @@
+from itertools import product
+from unittest import TestCase
+
+import numpy as np
+
+from pyneg.comms import AtomicConstraint, ConstraintIndex
+from pyneg.engine import discover_constraints
+from pyneg.utils import atom_from_issue_value
+
+
+class TestConstraintDiscovery(TestCase):
+
+    def setUp(self):
+        self.neg_space = {
+            "first": list(map(str, range(4))),
+            "second": list(map(str, range(5))),
+            "third": list(map(str, range(3)))
+        }
+        self.utilities = {
+            "first_0": 10, "first_1": 4, "first_2": -20,
+            "second_0": 5, "second_1": 0, "second_2": -3, "second_3": -50, "second_4": 1,
+            "third_0": 2, "third_2": -8
+        }
+
+    def brute_force(self, constraints, threshold):
+        # for linear utilities these are exactly the values that can be ruled out
+        possible = {issue: set() for issue in self.neg_space}
+        for offer in product(*self.neg_space.values()):
+            assignments = list(zip(self.neg_space.keys(), offer))
+            if any(AtomicConstraint(issue, value) in constraints
+                   for issue, value in assignments):
+                continue
+            util = sum(self.utilities.get(atom_from_issue_value(issue, value), 0)
+                       for issue, value in assignments)
+            if util >= threshold:
+                for issue, value in assignments:
+                    possible[issue].add(value)
+
+        return {AtomicConstraint(issue, value)
+                for issue, values in self.neg_space.items()
+                for value in values
+                if value not in possible[issue]
+                and AtomicConstraint(issue, value) not in constraints}
+
+    def test_matches_brute_force(self):
+        for threshold in [-100, -20, 0, 5, 10, 17]:
+            self.assertEqual(discover_constraints(self.neg_space, self.utilities,
+                                                  ConstraintIndex(), threshold),
+                             self.brute_force(set(), threshold), threshold)
+
+    def test_takes_known_constraints_into_account(self):
+        constraints = ConstraintIndex({AtomicConstraint("first", "0")})
+        new_constraints = discover_constraints(self.neg_space, self.utilities,
+                                               constraints, 5)
+        self.assertEqual(new_constraints, self.brute_force(constraints, 5))
+        self.assertNotIn(AtomicConstraint("first", "0"), new_constraints)
+        self.assertIn(AtomicConstraint("second", "2"), new_constraints)
+
+    def test_offer_exactly_at_threshold_is_acceptable(self):
+        neg_space = {"first": ["a", "b"], "second": ["c", "d"]}
+        utilities = {"first_a": 0.1, "first_b": 0.0, "second_c": 0.2, "second_d": 0.0}
+        self.assertEqual(discover_constraints(neg_space, utilities, ConstraintIndex(), 0.3),
+                         {AtomicConstraint("first", "b"), AtomicConstraint("second", "d")})
+
+    def test_rules_out_everything_if_nothing_is_acceptable(self):
+        new_constraints = discover_constraints(self.neg_space, self.utilities,
+                                               ConstraintIndex(), 100)
+        self.assertEqual(len(new_constraints), int(np.sum(
+            [len(values) for values in self.neg_space.values()])))
@@ -0,0 +1,82 @@
+from unittest import TestCase
+from functools import reduce
+
+import numpy as np
+from numpy import arange
+
+from pyneg.comms import Offer
+from pyneg.engine import CompiledLinearEvaluator, EnumGenerator, HeapEnumGenerator, LinearEvaluator
+from pyneg.utils import neg_scenario_from_util_matrices, nested_dict_from_atom_dict
+
+
+class TestHeapEnumGenerator(TestCase):
+
+    def setUp(self):
+        self.issues, self.utilities, _ = neg_scenario_from_util_matrices(
+            arange(9).reshape((3, 3)) ** 2, arange(9).reshape((3, 3)))
+        self.arbitrary_reservation_value = 0
+        self.max_util = 93
+        self.arbitrary_non_agreement_cost = -1000
+        self.uniform_weights = {
+            issue: 1 / len(self.issues.keys()) for issue in self.issues.keys()}
+        self.evaluator = LinearEvaluator(
+            self.utilities, self.uniform_weights, self.arbitrary_non_agreement_cost)
+
+        self.generator = HeapEnumGenerator(
+            self.issues, self.utilities, self.evaluator, self.arbitrary_reservation_value)
+
+    def test_generates_best_offer_first_time(self):
+        best_offer = Offer(nested_dict_from_atom_dict({'issue0_0': 0.0, 'issue0_1': 0.0, 'issue0_2': 1.0,
+                                                       'issue1_0': 0.0, 'issue1_1': 0.0, 'issue1_2': 1.0,
+                                                       'issue2_0': 0.0, 'issue2_1': 0.0, 'issue2_2': 1.0}))
+        self.assertEqual(best_offer, self.generator.generate_offer())
+
+    def test_terminates_first_time_if_no_options_are_acceptable(self):
+        self.generator = HeapEnumGenerator(
+            self.issues, self.utilities, self.evaluator, self.max_util + 1)
+
+        with self.assertRaises(StopIteration):
+            self.generator.generate_offer()
+
+    def test_generates_every_offer_once_then_terminates(self):
+        neg_space_size = reduce(
+            lambda x, y: x * y,
+            [len(self.issues[issue]) for issue in self.issues])
+
+        offers = [self.generator.generate_offer() for _ in range(neg_space_size)]
+        self.assertEqual(len(set(offers)), neg_space_size)
+        with self.assertRaises(StopIteration):
+            self.generator.generate_offer()
+
+    def test_generates_same_order_as_enum_generator(self):
+        np.random.seed(0)
+        neg_space, utilities, _ = neg_scenario_from_util_matrices(
+            np.random.random((4, 5)), np.random.random((4, 5)))
+        weights = {issue: 1 / len(neg_space) for issue in neg_space}
+        evaluator = LinearEvaluator(utilities, weights, self.arbitrary_non_agreement_cost)
+        reference = EnumGenerator(neg_space, utilities, evaluator, 0.5)
+        generator = HeapEnumGenerator(neg_space, utilities, evaluator, 0.5)
+
+        while True:
+            try:
+                expected = reference.generate_offer()
+            except StopIteration:
+                break
+            self.assertEqual(expected, generator.generate_offer())
+
+        with self.assertRaises(StopIteration):
+            generator.generate_offer()
+
+    def test_offers_in_large_space_are_in_dec_order_of_util(self):
+        np.random.seed(1)
+        neg_space, utilities, _ = neg_scenario_from_util_matrices(
+            np.random.randint(0, 100, (20, 50)), np.zeros((20, 50)))
+        weights = {issue: 1 / len(neg_space) for issue in neg_space}
+        evaluator = CompiledLinearEvaluator(neg_space, utilities, weights, -1000)
+        generator = HeapEnumGenerator(neg_space, utilities, evaluator, 0)
+
+        previous_util = float("inf")
+        for _ in range(500):
+            util = evaluator.calc_offer_utility(generator.generate_offer())
+            self.assertLessEqual(util, previous_util + 1e-9)
+            previous_util = util
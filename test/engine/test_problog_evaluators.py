@@ -1,5 +1,8 @@
 from unittest import TestCase
 
+from problog import get_evaluatable
+from problog.program import PrologString
+
 from pyneg.comms import Offer
 from pyneg.engine import ProblogEvaluator
 from pyneg.engine import Strategy
@@ -110,3 +113,38 @@ class TestProblogEvaluator(TestCase):
         })
         util = self.evaluator.calc_offer_utility(offer)
         self.assertAlmostEqual(util, 43)
+
+    def test_compiled_circuit_equals_compiling_per_offer(self):
+        offer = Offer({
+            "boolean": {"True": 0.0, "False": 1.0},
+            "integer": {str(i): 1.0 if i == 2 else 0.0 for i in range(10)},
+            "float": {"{0:.1f}".format(i * 0.1): 1.0 if i == 1 else 0.0 for i in range(10)}
+        })
+        for test_offer in [offer, self.nested_test_offer, self.optimal_offer]:
+            model = self.evaluator.compile_problog_model(test_offer)
+            expected = {str(atom): prob for atom, prob in
+                        get_evaluatable("sdd").create_from(PrologString(model)).evaluate().items()}
+            self.assertEqual(expected.keys(),
+                             self.evaluator.calc_probabilities_of_utilities(test_offer).keys())
+            for atom, prob in self.evaluator.calc_probabilities_of_utilities(test_offer).items():
+                self.assertAlmostEqual(prob, expected[atom])
+
+    def test_circuit_is_reused_between_offers(self):
+        self.evaluator.calc_offer_utility(self.nested_test_offer)
+        circuit = self.evaluator._circuit
+        self.evaluator.calc_offer_utility(self.optimal_offer)
+        self.evaluator.set_utilities({**self.utilities, "integer_9": 50})
+        self.assertIs(circuit, self.evaluator._circuit)
+        self.assertAlmostEqual(self.evaluator.calc_offer_utility(self.optimal_offer), 150)
+
+    def test_circuit_is_invalidated_by_new_knowledge_base(self):
+        self.evaluator.calc_offer_utility(self.nested_test_offer)
+        self.evaluator.knowledge_base = []
+        self.assertAlmostEqual(self.evaluator.calc_offer_utility(self.nested_test_offer), 100)
+        self.evaluator.knowledge_base = ["boolean_False :- integer_2."]
+        self.assertAlmostEqual(self.evaluator.calc_offer_utility(self.nested_test_offer), 110)
+
+    def test_circuit_is_invalidated_by_new_utility_atoms(self):
+        self.evaluator.calc_offer_utility(self.nested_test_offer)
+        self.evaluator.set_utilities({**self.utilities, "integer_2": 7})
+        self.assertAlmostEqual(self.evaluator.calc_offer_utility(self.nested_test_offer), 107)
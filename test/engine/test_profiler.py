@@ -0,0 +1,65 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from pyneg.engine import CompiledLinearEvaluator, Engine, HeapEnumGenerator, Profiler
+from pyneg.comms import Offer
+
+
+class TestProfiler(TestCase):
+
+    def setUp(self):
+        self.neg_space = {"first": ["a", "b"], "second": ["c", "d", "e"]}
+        self.utilities = {"first_a": 10, "first_b": 2, "second_c": 4, "second_d": -1}
+        self.evaluator = CompiledLinearEvaluator(self.neg_space, self.utilities,
+                                                 {"first": 1, "second": 1}, -1000)
+        self.generator = HeapEnumGenerator(self.neg_space, self.utilities, self.evaluator, 0.5)
+        self.engine = Engine(self.generator, self.evaluator)
+        self.offer = Offer({"first": {"a": 1.0, "b": 0.0},
+                            "second": {"c": 0.0, "d": 1.0, "e": 0.0}})
+
+    def test_counts_calls_per_round(self):
+        profiler = self.engine.enable_profiling()
+        self.engine.generate_offer()
+        profiler.new_round()
+        self.engine.calc_offer_utility(self.offer)
+        self.engine.accepts(self.offer)
+        self.engine.accepts(self.offer)
+
+        first, second = profiler.stats.rounds
+        self.assertEqual(first["generation"].calls, 1)
+        self.assertEqual(second["generation"].calls, 0)
+        self.assertEqual(second["acceptance"].calls, 2)
+        # the utility is calculated once directly and once for every acceptance check
+        self.assertEqual(second["evaluation"].calls, 3)
+        self.assertEqual(profiler.stats.totals()["acceptance"].calls, 2)
+
+    def test_times_are_exclusive(self):
+        class Nested:
+            def inner(self):
+                pass
+
+            def outer(self):
+                self.inner()
+
+        profiler = Profiler()
+        nested = Nested()
+        profiler.time_methods(nested, {"inner": "evaluation", "outer": "generation"})
+        # outer starts at 0, inner runs from 1 to 3 and outer ends at 10
+        with patch("pyneg.engine.profiler.perf_counter", side_effect=[0.0, 1.0, 3.0, 10.0]):
+            nested.outer()
+
+        totals = profiler.stats.totals()
+        self.assertEqual(totals["evaluation"].calls, 1)
+        self.assertEqual(totals["evaluation"].time, 2.0)
+        self.assertEqual(totals["generation"].calls, 1)
+        self.assertEqual(totals["generation"].time, 8.0)
+        self.assertEqual(profiler.stats.total_time, 10.0)
+
+    def test_remove_restores_methods(self):
+        profiler = self.engine.enable_profiling()
+        self.assertIn("generate_offer", vars(self.engine))
+        profiler.remove()
+        self.assertNotIn("generate_offer", vars(self.engine))
+        self.assertNotIn("calc_offer_utility", vars(self.evaluator))
+        self.engine.generate_offer()
+        self.assertEqual(profiler.stats.rounds, [])
@@ -1,7 +1,8 @@
 from unittest import TestCase
+from unittest.mock import patch
 
 from pyneg.comms import Offer
-from pyneg.engine import RandomGenerator, ProblogEvaluator
+from pyneg.engine import CompiledLinearEvaluator, RandomGenerator, ProblogEvaluator
 
 
 class TestRandomGenerator(TestCase):
@@ -61,3 +62,59 @@ class TestRandomGenerator(TestCase):
         for _ in range(20):
             offer_list.append(self.generator.generate_offer())
         self.assertFalse(all([offer_list[i] == offer_list[i + 1] for i in range(len(offer_list)-1)]))
+
+    def test_generated_offers_are_acceptable(self):
+        for _ in range(self.max_rounds):
+            offer = self.generator.generate_offer()
+            self.assertGreaterEqual(self.evaluator.calc_offer_utility(offer),
+                                    self.reservation_value)
+
+    def test_scores_candidates_in_bulk_with_compiled_evaluator(self):
+        weights = {issue: 1 for issue in self.neg_space}
+        evaluator = CompiledLinearEvaluator(
+            self.neg_space, self.utilities, weights, self.non_agreement_cost)
+        generator = RandomGenerator(self.neg_space, self.utilities, evaluator,
+                                    self.non_agreement_cost, [], 150, self.max_rounds,
+                                    batch_size=256)
+        with patch.object(evaluator, "calc_offer_utility") as calc_offer_utility:
+            offers = [generator.generate_offer() for _ in range(5)]
+        calc_offer_utility.assert_not_called()
+        for offer in offers:
+            self.assertGreaterEqual(evaluator.calc_offer_utility(offer), 150)
+
+    def test_changing_utilities_discards_sampled_offers(self):
+        self.generator.generate_offer()
+        self.generator.set_utilities({"boolean_True": 100})
+        self.assertEqual(len(self.generator._acceptable_samples), 0)
+
+    def test_raises_stop_iteration_if_nothing_acceptable_is_sampled(self):
+        generator = RandomGenerator(self.neg_space, self.utilities, self.evaluator,
+                                    self.non_agreement_cost, self.kb, 1000, self.max_rounds,
+                                    max_generation_tries=10)
+        with self.assertRaises(StopIteration):
+            generator.generate_offer()
+        self.assertFalse(generator.active)
+
+    def test_finds_offers_in_tiny_acceptable_region(self):
+        neg_space = {f"issue{i}": list(range(10)) for i in range(8)}
+        utilities = {f"issue{i}_{j}": j for i in range(8) for j in range(10)}
+        weights = {issue: 1 for issue in neg_space}
+        evaluator = CompiledLinearEvaluator(
+            neg_space, utilities, weights, self.non_agreement_cost)
+        # only 45 of the 10^8 offers are acceptable
+        generator = RandomGenerator(neg_space, utilities, evaluator,
+                                    self.non_agreement_cost, [], 70, self.max_rounds,
+                                    max_generation_tries=10)
+        for _ in range(self.max_rounds):
+            self.assertGreaterEqual(evaluator.calc_offer_utility(generator.generate_offer()), 70)
+
+    def test_stops_immediately_if_linear_utilities_make_nothing_acceptable(self):
+        weights = {issue: 1 for issue in self.neg_space}
+        evaluator = CompiledLinearEvaluator(
+            self.neg_space, self.utilities, weights, self.non_agreement_cost)
+        generator = RandomGenerator(self.neg_space, self.utilities, evaluator,
+                                    self.non_agreement_cost, [], 201, self.max_rounds)
+        with patch.object(generator, "_sample_candidates") as sample_candidates:
+            with self.assertRaises(StopIteration):
+                generator.generate_offer()
+        sample_candidates.assert_not_called()
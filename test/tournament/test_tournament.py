@@ -0,0 +1,73 @@
+from unittest import TestCase
+
+import numpy as np
+
+from pyneg.agent import (make_constrained_linear_random_agent,
+                         make_linear_concession_agent, make_linear_random_agent)
+from pyneg.tournament import (AgentSpec, Scenario, round_robin_pairings,
+                              run_negotiation, run_tournament)
+from pyneg.tournament.tournament import _WORKER_STATE
+
+
+class TestTournament(TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.scenarios = [
+            Scenario.from_util_matrices(np.random.randint(0, 10, (3, 4)),
+                                        np.random.randint(0, 10, (3, 4)),
+                                        f"scenario {i}")
+            for i in range(2)]
+        self.specs = [
+            AgentSpec("concession", make_linear_concession_agent,
+                      reservation_value=0.5, non_agreement_cost=-1000),
+            AgentSpec("random", make_linear_random_agent,
+                      reservation_value=0.5, non_agreement_cost=-1000),
+            AgentSpec("constrained random", make_constrained_linear_random_agent,
+                      reservation_value=0.5, non_agreement_cost=-1000,
+                      knowledge_base=[], auto_constraints=False),
+        ]
+
+    def test_round_robin_pairings(self):
+        pairings = round_robin_pairings(3, 2)
+        self.assertEqual(len(pairings), 3 * 2 * 2)
+        self.assertEqual([pairing[0] for pairing in pairings], list(range(12)))
+        self.assertNotIn((0, 0, 0), [pairing[1:] for pairing in pairings])
+        self.assertIn((0, 0, 0), [pairing[1:] for pairing in round_robin_pairings(3, 2, True)])
+
+    def test_run_negotiation_reports_agreement_utilities(self):
+        result = run_negotiation(self.specs[0], self.specs[0], self.scenarios[0])
+        self.assertTrue(result.successful)
+        self.assertIsNotNone(result.agreement)
+        self.assertGreater(result.rounds, 0)
+        self.assertEqual(result.to_dict()["agreement"], result.agreement.get_sparse_str_repr())
+
+    def test_inline_tournament_runs_every_pairing_once(self):
+        results = list(run_tournament(self.specs, self.scenarios, max_workers=1, seed=1))
+        self.assertEqual(sorted(result.negotiation_id for result in results), list(range(12)))
+        for result in results:
+            self.assertNotEqual(result.agent_a, result.agent_b)
+            if result.successful:
+                self.assertIsNotNone(result.utility_a)
+            else:
+                self.assertIsNone(result.agreement)
+
+    def test_inline_tournament_leaves_callers_state_alone(self):
+        np.random.seed(5)
+        expected = np.random.rand()
+        np.random.seed(5)
+        list(run_tournament(self.specs, self.scenarios, max_workers=1, seed=1))
+        self.assertEqual(np.random.rand(), expected)
+        self.assertEqual(_WORKER_STATE, {})
+
+    def test_results_do_not_depend_on_number_of_workers(self):
+        inline = {result.negotiation_id: result for result in
+                  run_tournament(self.specs, self.scenarios, max_workers=1, seed=1)}
+        parallel = {result.negotiation_id: result for result in
+                    run_tournament(self.specs, self.scenarios, max_workers=2,
+                                   chunk_size=5, seed=1)}
+        self.assertEqual(inline.keys(), parallel.keys())
+        for negotiation_id, result in inline.items():
+            self.assertEqual(result.successful, parallel[negotiation_id].successful)
+            self.assertEqual(result.agreement, parallel[negotiation_id].agreement)
+            self.assertEqual(result.rounds, parallel[negotiation_id].rounds)
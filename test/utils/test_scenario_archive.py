@@ -0,0 +1,98 @@
+import pickle
+from os import listdir
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+
+from pyneg.utils import (ScenarioArchive, generate_random_scenario, generate_random_scenarios,
+                         neg_scenario_from_util_matrices, setup_random_scenarios)
+from pyneg.utils.utils import insert_difficult_constraints
+
+
+class TestScenarioArchive(TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.tmp_dir = TemporaryDirectory()
+        self.shape = (3, 4)
+        self.archive_path = setup_random_scenarios(self.tmp_dir.name, self.shape, 5, 3)
+        self.archive = ScenarioArchive(self.archive_path)
+
+    def tearDown(self):
+        del self.archive
+        self.tmp_dir.cleanup()
+
+    def test_single_file_with_a_record_per_constraint_level(self):
+        self.assertEqual(listdir(self.tmp_dir.name), ["scenarios.npy"])
+        self.assertEqual(len(self.archive), 15)
+        self.assertEqual(self.archive.shape, self.shape)
+        self.assertIsInstance(self.archive.records, np.memmap)
+        self.assertEqual(list(self.archive.scenario_ids[:4]), [0, 0, 0, 1])
+        self.assertEqual(list(self.archive.constraint_counts[:4]), [0, 1, 2, 0])
+
+    def test_records_contain_the_constraints(self):
+        (base_a, base_b), = self.archive.iter_util_matrices([2], 0)
+        (constr_a, constr_b), = self.archive.iter_util_matrices([2], 2)
+        expected_a, expected_b = insert_difficult_constraints(base_a, base_b, 2)
+        np.testing.assert_array_equal(constr_a, expected_a)
+        np.testing.assert_array_equal(constr_b, expected_b)
+        self.assertEqual(np.sum(constr_a == -1000), 2)
+
+    def test_yields_negotiation_scenarios_lazily(self):
+        scenarios = self.archive.iter_neg_scenarios(numb_constraints=1)
+        neg_space, utils_a, utils_b = next(scenarios)
+        a, b = next(self.archive.iter_util_matrices(numb_constraints=1))
+        self.assertEqual((neg_space, utils_a, utils_b), neg_scenario_from_util_matrices(a, b))
+        self.assertEqual(len(list(scenarios)), 4)
+
+    def test_pickles_by_path(self):
+        data = pickle.dumps(self.archive)
+        self.assertLess(len(data), self.archive.records.nbytes)
+        unpickled = pickle.loads(data)
+        self.assertIsInstance(unpickled.records, np.memmap)
+        np.testing.assert_array_equal(unpickled.records, self.archive.records)
+        del unpickled
+
+
+class TestRandomScenarioGeneration(TestCase):
+
+    def generate(self, **kwargs):
+        batches = list(generate_random_scenarios((3, 4), 10, 3, seed=42, **kwargs))
+        return (np.concatenate([batch_a for batch_a, _ in batches]),
+                np.concatenate([batch_b for _, batch_b in batches]))
+
+    def test_independent_of_batches_and_workers(self):
+        a, b = self.generate()
+        self.assertEqual(a.shape, (10, 3, 3, 4))
+        for kwargs in [{"batch_size": 3}, {"batch_size": 4, "max_workers": 2}]:
+            other_a, other_b = self.generate(**kwargs)
+            np.testing.assert_array_equal(a, other_a)
+            np.testing.assert_array_equal(b, other_b)
+
+    def test_scenarios_have_their_own_seeds(self):
+        a, b = self.generate()
+        self.assertGreater(len({matrix.tobytes() for matrix in a[:, 0]}), 1)
+        seeds = np.random.SeedSequence(42).spawn(10)
+        for i in [0, 7]:
+            for cntr in range(3):
+                expected_a, expected_b = generate_random_scenario((3, 4), cntr, seeds[i])
+                np.testing.assert_array_equal(a[i, cntr], expected_a)
+                np.testing.assert_array_equal(b[i, cntr], expected_b)
+
+    def test_global_seed_still_makes_scenarios_reproducible(self):
+        np.random.seed(3)
+        first = generate_random_scenario((3, 4), 1)
+        np.random.seed(3)
+        np.testing.assert_array_equal(first, generate_random_scenario((3, 4), 1))
+
+    def test_inserts_constraints_into_batches(self):
+        rng = np.random.default_rng(0)
+        a = rng.integers(0, 10, (5, 3, 4))
+        b = rng.integers(0, 10, (5, 3, 4))
+        batch_a, batch_b = insert_difficult_constraints(a, b, 2)
+        for i in range(5):
+            expected_a, expected_b = insert_difficult_constraints(a[i], b[i], 2)
+            np.testing.assert_array_equal(batch_a[i], expected_a)
+            np.testing.assert_array_equal(batch_b[i], expected_b)
+        self.assertTrue(np.all(np.sum(batch_a == -1000, axis=(1, 2)) == 2))
@@ -1,10 +1,14 @@
 import unittest
+from itertools import product
 
 import numpy as np
 
 
 
 from pyneg.utils import generate_binary_utility_matrices, count_acceptable_offers, neg_scenario_from_util_matrices
+from pyneg.utils import generate_gradient_utility_matrices, count_acceptable_offers_by_convolution
+from pyneg.utils import insert_difficult_constraint_levels
+from pyneg.utils.utils import insert_difficult_constraints
 
 
 class TestUtils(unittest.TestCase):
@@ -80,6 +84,74 @@ class TestUtils(unittest.TestCase):
             u_a, u_b, self.standard_n / 2, self.standard_n / 2 + 1)
         self.assertTrue(both == 0)
 
+    def test_counts_match_brute_force_for_any_block_size(self):
+        np.random.seed(0)
+        u_a = np.random.random((4, 5))
+        u_b = np.random.random((4, 5))
+        w_a = np.array([0.1, 0.2, 0.3, 0.4])
+        offers = np.array(list(product(range(5), repeat=4)))
+        utils_a = (u_a[np.arange(4), offers] * w_a).sum(axis=1)
+        utils_b = u_b[np.arange(4), offers].sum(axis=1) / 4
+        a_accepts = utils_a >= 0.6 * utils_a.max()
+        b_accepts = utils_b >= 0.7 * utils_b.max()
+        expected = (a_accepts.sum(), b_accepts.sum(), (a_accepts & b_accepts).sum())
+
+        for block_size in [1, 7, 625, 1000]:
+            self.assertEqual(count_acceptable_offers(
+                u_a, u_b, 0.6, 0.7, w_a=w_a, block_size=block_size), expected)
+        self.assertEqual(count_acceptable_offers(
+            u_a, u_b, 0.6, 0.7, w_a=w_a, block_size=100, max_workers=2), expected)
+
+    def test_rho_1_counts_best_offer(self):
+        u_a, u_b = generate_gradient_utility_matrices((6, 7), 3)
+        a, b, _ = count_acceptable_offers(u_a, u_b, 1, 1, block_size=1000)
+        self.assertGreaterEqual(a, 1)
+        self.assertGreaterEqual(b, 1)
+
+    def test_convolution_counts_integer_matrices_exactly(self):
+        np.random.seed(0)
+        for _ in range(20):
+            u_a = np.random.randint(0, 10, (4, 5))
+            u_b = np.random.randint(0, 10, (4, 5))
+            rho_a, rho_b = np.random.rand(2)
+            self.assertEqual(count_acceptable_offers_by_convolution(u_a, u_b, rho_a, rho_b),
+                             count_acceptable_offers(u_a, u_b, rho_a, rho_b))
+
+    def test_convolution_bounds_contain_exact_counts(self):
+        np.random.seed(0)
+        u_a = np.random.rand(5, 4)
+        u_b = np.random.rand(5, 4)
+        w_a = np.random.dirichlet(np.ones(5))
+        expected = count_acceptable_offers(u_a, u_b, 0.6, 0.7, w_a=w_a)
+        lower, upper = count_acceptable_offers_by_convolution(
+            u_a, u_b, 0.6, 0.7, w_a=w_a, num_bins=100, bounds=True)
+        for low, exact, high in zip(lower, expected, upper):
+            self.assertLessEqual(low, exact)
+            self.assertLessEqual(exact, high)
+
+    def test_convolution_rounds_large_integer_utilities(self):
+        np.random.seed(0)
+        u_a = np.random.randint(0, 10 ** 5, (5, 10))
+        u_b = np.random.randint(0, 10 ** 5, (5, 10))
+        expected = count_acceptable_offers(u_a, u_b, 0.5, 0.5)
+        lower, upper = count_acceptable_offers_by_convolution(
+            u_a, u_b, 0.5, 0.5, num_bins=100, bounds=True)
+        for low, exact, high in zip(lower, expected, upper):
+            self.assertLessEqual(low, exact)
+            self.assertLessEqual(exact, high)
+
+        # the integers themselves would need a histogram with more than 10**12 bins
+        u_a = np.random.randint(0, 10 ** 5, (30, 10))
+        u_b = np.random.randint(0, 10 ** 5, (30, 10))
+        a, b, both = count_acceptable_offers_by_convolution(u_a, u_b, 0.5, 0.5, num_bins=200)
+        self.assertLessEqual(both, min(a, b))
+        self.assertLessEqual(max(a, b), 10 ** 30)
+
+    def test_convolution_counts_spaces_too_large_to_enumerate(self):
+        u_a, u_b = generate_binary_utility_matrices((40, 2), 0)
+        a, b, both = count_acceptable_offers_by_convolution(u_a, u_b, 0, 0)
+        self.assertEqual((a, b, both), (2**40, 2**40, 2**40))
+
     def test_neg_scenario_from_util_matrices_returns_propper_types(self):
         u_a, u_b = generate_binary_utility_matrices(self.u_a.shape, 1)
         issues, utils_a, utils_b = neg_scenario_from_util_matrices(u_a, u_b)
@@ -98,3 +170,22 @@ class TestUtils(unittest.TestCase):
         self.assertTrue(isinstance(utils_b, dict))
         self.assertTrue(isinstance(next(iter(utils_b.values())), float))
         self.assertTrue(isinstance(next(iter(utils_b.keys())), str))
+
+    def test_constraints_go_to_the_opponents_best_assignments(self):
+        a = np.array([[1, 2, 3], [4, 5, 6]])
+        b = np.array([[9, 0, 7], [7, 1, 2]])
+        constr_a, constr_b = insert_difficult_constraints(a, b, 2)
+        # b has a tie for second place, the last one is picked first
+        np.testing.assert_array_equal(constr_a, [[-1000, 2, 3], [-1000, 5, 6]])
+        np.testing.assert_array_equal(constr_b, [[9, 0, 7], [7, -1000, -1000]])
+
+    def test_constraint_levels_match_single_levels(self):
+        rng = np.random.default_rng(0)
+        a = rng.integers(0, 5, (20, 4, 5))
+        b = rng.integers(0, 5, (20, 4, 5))
+        stack_a, stack_b = insert_difficult_constraint_levels(a, b, 6)
+        self.assertEqual(stack_a.shape, (20, 6, 4, 5))
+        for numb in range(6):
+            expected_a, expected_b = insert_difficult_constraints(a, b, numb)
+            np.testing.assert_array_equal(stack_a[:, numb], expected_a)
+            np.testing.assert_array_equal(stack_b[:, numb], expected_b)